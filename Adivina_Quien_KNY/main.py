@@ -1,47 +1,75 @@
 import json
+import os
+import sys
+
+# El motor compartido vive en la raíz del repositorio
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from motor_akinator import indice, lotes
+from motor_akinator.motor import (ADIVINADO, SIN_CANDIDATOS, AkinatorEngine, Adivinanza,
+                                  normalizar_respuesta)
 
 def cargar_personajes(archivo):
     with open(archivo, "r", encoding="utf-8") as f:
         return json.load(f)
 
+# Lo que se puede escribir para volver a la pregunta anterior
+ATRAS = ("atras", "atrás", "a")
+
 def hacer_pregunta(caracteristica):
-    respuesta = ""
-    while respuesta not in ["si" or "SI" or "Si", "no" or "NO" or "No"]:
-        respuesta = input(f"¿El personaje {caracteristica.replace('_', ' ')}? (si/no): ").lower()
+    # Acepta si/sí/s y no/n en cualquier combinación de mayúsculas,
+    # o "atrás" para deshacer la respuesta anterior
+    respuesta = None
+    if isinstance(caracteristica, Adivinanza):
+        pregunta = f"¿Tu personaje es {caracteristica.personaje}?"
+    else:
+        pregunta = f"¿El personaje {caracteristica.replace('_', ' ')}?"
+    while respuesta not in ("si", "no", "atras"):
+        texto = input(f"{pregunta} (si/no/atrás): ")
+        respuesta = "atras" if texto.strip().lower() in ATRAS else normalizar_respuesta(texto)
     return respuesta
 
 def filtrar_personajes(personajes, caracteristica, respuesta):
-    return {
-        nombre: datos for nombre, datos in personajes.items()
-        if datos.get(caracteristica) == respuesta
-    }
+    # Solo quedan los que tienen exactamente esa respuesta registrada
+    return indice.filtrar_personajes(personajes, {caracteristica: respuesta}, estricto=True)
+
+def crear_motor():
+    # Mismo motor que la versión gráfica. En este archivo solo se
+    # anotan las características que el personaje sí tiene, así que
+    # una característica que falta cuenta como "no". Si un personaje ya es
+    # mucho más probable que los demás, pregunta directamente por él.
+    # El archivo se busca junto a este script, se ejecute desde donde se ejecute
+    archivo = os.path.join(os.path.dirname(os.path.abspath(__file__)), "personajes.json")
+    return AkinatorEngine({"personajes": cargar_personajes(archivo)}, faltante="no",
+                          anticipar=True)
 
 def main():
+    # python main.py --lotes < eventos.jsonl > salida.jsonl
+    # juega muchas partidas sin teclado (ver motor_akinator/lotes.py)
+    if sys.argv[1:2] == ["--lotes"]:
+        lotes.correr(crear_motor())
+        return
+
     print(" Bienvenido a 'Adivina Quién: Kimetsu no Yaiba' ")
     print("Responde las preguntas con 'sí' o 'no' para que el sistema adivine el personaje.")
     print("-" * 60)
 
-    personajes = cargar_personajes("personajes.json")
-
-    caracteristicas = set()
-    for datos in personajes.values():
-        caracteristicas.update(datos.keys())
-
-    for c in caracteristicas:
-        if len(personajes) <= 1:
-            break
-        respuesta = hacer_pregunta(c)
-        personajes = filtrar_personajes(personajes, c, respuesta)
+    sesion = crear_motor().nueva_sesion()
 
-        if len(personajes) == 0:
-            print(" No encontré ningún personaje con esas respuestas.")
-            return
+    while sesion.current_question() is not None:
+        respuesta = hacer_pregunta(sesion.current_question())
+        if respuesta != "atras":
+            sesion.answer(respuesta)
+        elif not sesion.deshacer():
+            print("No hay ninguna respuesta que deshacer.")
 
-    if len(personajes) == 1:
-        print(f" ¡Tu personaje es {list(personajes.keys())[0]}!")
+    resultado = sesion.result()
+    if resultado.estado == SIN_CANDIDATOS:
+        print(" No encontré ningún personaje con esas respuestas.")
+    elif resultado.estado == ADIVINADO:
+        print(f" ¡Tu personaje es {resultado.personajes[0]}!")
     else:
         print(" No estoy seguro, pero podría ser uno de estos:")
-        for nombre in personajes.keys():
+        for nombre in resultado.personajes:
             print("-", nombre)
 
 if __name__ == "__main__":
@@ -1,10 +1,19 @@
-import json
 import tkinter as tk
 from tkinter import messagebox, simpledialog
-from PIL import Image, ImageTk
-import cv2
 import os
-import threading
+import sys
+
+# El motor compartido vive en la raíz del repositorio
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from motor_akinator import indice, metricas, motor
+from motor_akinator.analisis import revisar_personaje
+from motor_akinator.aprendizaje import Aprendizaje
+from motor_akinator.arranque import Carga, cargar_juego
+from motor_akinator.camara import CapturaCamara, VentanaCamara
+from motor_akinator.imagenes import ServicioImagenes
+from motor_akinator.motor import ADIVINADO, DUDOSO, SIN_CANDIDATOS, Adivinanza, texto_pregunta
+from motor_akinator.popularidad import registrar_partida
+from motor_akinator.recarga import INTERVALO_RECARGA, Recarga
 
 # ==============================
 # Funciones de manejo de datos
@@ -12,68 +21,31 @@ import threading
 
 DATA_FILE = "personajes_kimetsu.json"
 IMAGES_DIR = "imagenes_personajes"
-os.makedirs(IMAGES_DIR, exist_ok=True)
+IMAGENES = ServicioImagenes([IMAGES_DIR, "imagenes"], tamano=(200, 250))
 
 def cargar_datos(archivo):
-    try:
-        with open(archivo, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {"humanos": {}, "demonios": {}}
+    return motor.cargar_datos(archivo)
 
 def filtrar_personajes(candidatos, respuestas):
-    resultado = {}
-    for nombre, atributos in candidatos.items():
-        coincide = True
-        for a, v in respuestas.items():
-            if a in atributos and atributos[a] != v:
-                coincide = False
-                break
-        if coincide:
-            resultado[nombre] = atributos
-    return resultado
+    return indice.filtrar_personajes(candidatos, respuestas)
 
 def atributos_utiles(candidatos, respuestas):
-    utiles = []
-    for a in set().union(*[c.keys() for c in candidatos.values()]):
-        if a in respuestas:
-            continue
-        valores = set([c[a] for c in candidatos.values() if a in c])
-        if len(valores) > 1:
-            utiles.append(a)
-    return utiles
+    return indice.atributos_utiles(candidatos, respuestas)
 
 def get_all_attributes(candidatos):
-    atributos = set()
-    for personaje in candidatos.values():
-        atributos.update(personaje.keys())
-    return atributos
+    return indice.get_all_attributes(candidatos)
 
 # ==============================
-# Función para captura de cámara en hilo
+# Captura de cámara (hilos propios, resultados por root.after)
 # ==============================
-def tomar_foto(nombre):
-    def _captura():
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
-            messagebox.showerror("Error", "No se pudo abrir la cámara.")
-            return
-        messagebox.showinfo("Cámara", "Presiona 's' para capturar la foto o 'q' para salir.")
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                continue
-            cv2.imshow("Presiona 's' para capturar", frame)
-            key = cv2.waitKey(1)
-            if key & 0xFF == ord('s'):
-                ruta = os.path.join(IMAGES_DIR, f"{nombre}.jpg")
-                cv2.imwrite(ruta, frame)
-                break
-            elif key & 0xFF == ord('q'):
-                break
-        cap.release()
-        cv2.destroyAllWindows()
-    threading.Thread(target=_captura, daemon=True).start()
+CAMARA = CapturaCamara()
+
+@metricas.cronometrado("gui.tomar_foto")
+def tomar_foto(root, nombre):
+    os.makedirs(IMAGES_DIR, exist_ok=True)
+    ruta = os.path.join(IMAGES_DIR, f"{nombre}.jpg")
+    VentanaCamara(root, CAMARA, "Presiona 's' para capturar la foto o 'q' para salir", ruta,
+                  despues=lambda: IMAGENES.generar_miniatura(nombre))
 
 # ==============================
 # Interfaz principal
@@ -85,12 +57,13 @@ class AkinatorDinamico:
         self.root.geometry("600x550")
         self.root.config(bg="#1c1c1c")
 
-        self.data = cargar_datos(DATA_FILE)
-        self.respuestas = {}
-        self.candidatos = {}
-        self.atributos_pendientes = []
-        self.grupo = None
+        # Los datos se cargan en otro hilo; la ventana aparece enseguida
+        # Con anticipar, pregunta "¿Es X?" antes de tiempo si conviene
+        self.carga = Carga(cargar_juego, DATA_FILE, especular=True, anticipar=True)
+        self.almacen = self.data = self.motor = self.sesion = self.recarga = None
         self.candidato_final = None
+        self.partida_registrada = False
+        self.root.protocol("WM_DELETE_WINDOW", self.salir)
 
         # UI
         self.titulo = tk.Label(root, text="Akinator Kimetsu no Yaiba 🔥",
@@ -113,109 +86,146 @@ class AkinatorDinamico:
                                        bg="#3498db", fg="white", font=("Arial", 11))
         self.reiniciar_btn.pack(side="bottom", pady=15)
 
+        self.atras_btn = tk.Button(root, text="⬅ Atrás", command=self.deshacer,
+                                   bg="#95a5a6", fg="white", font=("Arial", 11))
+        self.atras_btn.pack(side="bottom", pady=5)
+
         self.imagen_label = tk.Label(root, bg="#1c1c1c")
         self.imagen_label.pack(pady=10)
 
+        self.pregunta.config(text="Cargando personajes...")
+        self.boton_si.config(state="disabled")
+        self.boton_no.config(state="disabled")
+        self.root.after(20, self.esperar_carga)
+
+    def esperar_carga(self):
+        if not self.carga.lista():
+            self.root.after(20, self.esperar_carga)
+            return
+        try:
+            self.almacen, self.data, self.motor = self.carga.resultado()
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudieron cargar los personajes: {e}")
+            return
+        self.sesion = self.motor.nueva_sesion()
+        self.recarga = Recarga(self.motor, self.almacen)
+        self.root.after(INTERVALO_RECARGA, self.recargar)
         self.iniciar()
 
+    # Personajes aprendidos en otros kioscos: la partida en curso no cambia,
+    # la siguiente ya los incluye
+    def recargar(self):
+        self.recarga.revisar()
+        self.root.after(INTERVALO_RECARGA, self.recargar)
+
     # ==============================
     # Inicio del juego
     # ==============================
     def iniciar(self):
-        self.respuestas.clear()
-        self.candidatos.clear()
-        self.atributos_pendientes.clear()
-        self.grupo = None
+        if self.sesion is None:
+            return
+        self.sesion.start()
         self.candidato_final = None
+        self.partida_registrada = False
         self.boton_si.config(state="normal")
         self.boton_no.config(state="normal")
-        self.pregunta.config(text="¿Es un demonio?")
+        self.pregunta.config(text=texto_pregunta(self.sesion.current_question()))
         self.imagen_label.config(image="")
 
     # ==============================
     # Manejar respuesta
     # ==============================
+    @metricas.cronometrado("gui.responder")
     def responder(self, r):
         # Si estamos en la etapa de confirmar candidato final
         if self.candidato_final:
             if r == "si":
                 self.pregunta.config(text=f"🥳 ¡Lo adiviné! Es {self.candidato_final}!")
                 self.mostrar_imagen(self.candidato_final)
+                self.registrar(self.candidato_final)
             else:
                 messagebox.showinfo("Aprender personaje", "¡Vamos a aprender sobre tu personaje!")
                 self.aprender_personaje()
             self.candidato_final = None
             return
 
-        if self.grupo is None:
-            self.grupo = "demonios" if r == "si" else "humanos"
-            if self.grupo not in self.data:
-                messagebox.showerror("Error", f"No se encontró el grupo '{self.grupo}' en el JSON.")
-                self.iniciar()
-                return
-            self.candidatos = self.data[self.grupo].copy()
-            self.atributos_pendientes = atributos_utiles(self.candidatos, self.respuestas)
-            self.siguiente_pregunta()
+        if self.sesion is None or self.sesion.current_question() is None:
             return
 
-        if not self.atributos_pendientes:
-            return
+        # Guardar respuesta y filtrar candidatos en la sesión
+        pregunta = self.sesion.current_question()
+        self.sesion.answer(r)
+        resultado = self.sesion.result()
 
-        # Guardar respuesta del atributo actual
-        atributo = self.atributos_pendientes.pop(0)
-        self.respuestas[atributo] = r
-
-        # Filtrar candidatos
-        self.candidatos = filtrar_personajes(self.candidatos, self.respuestas)
+        # Respondió "sí" a "¿Es X?": ya está confirmado
+        if resultado.estado == ADIVINADO and isinstance(pregunta, Adivinanza) and r == "si":
+            self.candidato_final = resultado.personajes[0]
+            self.responder("si")
+            return
 
         # Si queda un solo candidato
-        if len(self.candidatos) == 1:
-            self.candidato_final = list(self.candidatos.keys())[0]
+        if resultado.estado == ADIVINADO:
+            self.candidato_final = resultado.personajes[0]
             self.pregunta.config(text=f"🎯 ¿Tu personaje es {self.candidato_final}?")
             return
 
         # Si no hay candidatos
-        if len(self.candidatos) == 0:
+        if resultado.estado == SIN_CANDIDATOS:
             messagebox.showinfo("No encontrado", "No encontré ningún personaje con esas respuestas.")
             self.aprender_personaje()
             return
 
-        # Actualizar atributos pendientes
-        self.atributos_pendientes = atributos_utiles(self.candidatos, self.respuestas)
+        IMAGENES.precargar(self.sesion.probables(3))
+        self.siguiente_pregunta()
+
+    # Cuenta para la popularidad del personaje (ver motor_akinator/popularidad.py):
+    # una vez por partida, aunque se deshaga y se vuelva a confirmar
+    def registrar(self, nombre):
+        if self.partida_registrada:
+            return
+        self.partida_registrada = True
+        registrar_partida(self.almacen, nombre, self.sesion.preguntas_hechas())
+
+    # ==============================
+    # Deshacer la última respuesta
+    # ==============================
+    @metricas.cronometrado("gui.deshacer")
+    def deshacer(self):
+        # También sirve en "¿Tu personaje es...?": vuelve a la pregunta anterior
+        if self.sesion is None or not self.sesion.deshacer():
+            return
+        self.candidato_final = None
+        self.imagen_label.config(image="")
+        self.boton_si.config(state="normal")
+        self.boton_no.config(state="normal")
         self.siguiente_pregunta()
 
     # ==============================
     # Siguiente pregunta
     # ==============================
+    @metricas.cronometrado("gui.siguiente_pregunta")
     def siguiente_pregunta(self):
-        while self.atributos_pendientes:
-            atributo = self.atributos_pendientes[0]
-
-            # Saltar atributos irrelevantes según el grupo
-            if self.grupo == "humanos" and "luna" in atributo:
-                self.atributos_pendientes.pop(0)
-                continue
-            if self.grupo == "demonios" and ("pilar" in atributo or "respira" in atributo):
-                self.atributos_pendientes.pop(0)
-                continue
-
-            self.pregunta.config(text=f"¿{atributo.replace('_', ' ')}?")
-            break
+        # La sesión nunca elige un atributo que no aplica a los candidatos
+        atributo = self.sesion.current_question()
+        if atributo is not None:
+            self.pregunta.config(text=texto_pregunta(atributo))
+            return
 
         # Si no quedan atributos y hay varios candidatos
-        if not self.atributos_pendientes and len(self.candidatos) > 1:
-            posibles = "\n".join(self.candidatos.keys())
+        resultado = self.sesion.result()
+        if resultado.estado == DUDOSO:
+            posibles = "\n".join(resultado.personajes)
             messagebox.showinfo("Posibles personajes", f"No estoy seguro, pero podría ser:\n\n{posibles}")
             self.iniciar()
 
     # ==============================
     # Mostrar imagen
     # ==============================
+    @metricas.cronometrado("gui.mostrar_imagen")
     def mostrar_imagen(self, nombre):
-        path = os.path.join(IMAGES_DIR, f"{nombre}.jpg")
-        if os.path.exists(path):
-            img = Image.open(path)
-            img = img.resize((200, 250))
+        img = IMAGENES.obtener(nombre)
+        if img is not None:
+            from PIL import ImageTk
             self.tkimg = ImageTk.PhotoImage(img)
             self.imagen_label.config(image=self.tkimg)
         else:
@@ -224,32 +234,48 @@ class AkinatorDinamico:
     # ==============================
     # Aprender personaje nuevo
     # ==============================
+    @metricas.cronometrado("gui.aprender_personaje")
     def aprender_personaje(self):
         nombre = simpledialog.askstring("Aprender personaje", "¿Cuál era el personaje que pensabas?")
         if not nombre:
             self.iniciar()
             return
 
-        if nombre in self.data[self.grupo]:
+        if nombre in self.motor.indice.posicion:
             messagebox.showinfo("Ya existe", f"El personaje '{nombre}' ya está en la base de datos.")
             self.iniciar()
             return
 
-        atributos_nuevos = {}
-        todos_atributos = get_all_attributes(self.data[self.grupo])
-        for atributo in todos_atributos:
-            r = messagebox.askquestion("Atributo", f"¿{atributo.replace('_',' ')}?")
-            atributos_nuevos[atributo] = "si" if r == "yes" else "no"
+        # Solo se pregunta lo que lo separa de los personajes parecidos
+        # (Cancelar = no lo sé); el resto sale de las respuestas de la partida
+        aprendizaje = Aprendizaje(self.motor, self.sesion.respuestas)
+        while aprendizaje.current_question() is not None:
+            r = messagebox.askyesnocancel("Atributo", texto_pregunta(aprendizaje.current_question()))
+            aprendizaje.answer({True: "si", False: "no"}.get(r))
+        grupo = aprendizaje.grupo()
+        atributos_nuevos = aprendizaje.atributos()
+
+        # Si queda idéntico a otro personaje, completar lo que mejor los separa
+        confusion = revisar_personaje(self.motor, grupo, nombre, atributos_nuevos)
+        for atributo in confusion.sugerencias:
+            if not confusion.personajes:
+                break
+            r = messagebox.askyesnocancel("Atributo", f"Es idéntico a: {', '.join(confusion.personajes)}\n\n{texto_pregunta(atributo)}")
+            if r is not None:
+                atributos_nuevos[atributo] = "si" if r else "no"
+                confusion = revisar_personaje(self.motor, grupo, nombre, atributos_nuevos)
+        if confusion.personajes:
+            messagebox.showwarning("Personajes idénticos", f"'{nombre}' queda idéntico a: {', '.join(confusion.personajes)}.\nNo podré distinguirlos.")
 
-        self.data[self.grupo][nombre] = atributos_nuevos
+        self.motor.aprender(grupo, nombre, atributos_nuevos)
 
         # Tomar foto en hilo
         if messagebox.askyesno("Imagen", f"¿Deseas tomar una foto para {nombre}?"):
-            tomar_foto(nombre)
+            tomar_foto(self.root, nombre)
 
-        # Guardar JSON
-        with open(DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        # Guardar solo el personaje nuevo en el almacén
+        self.almacen.guardar_personaje(grupo, nombre, atributos_nuevos)
+        self.registrar(nombre)
 
         messagebox.showinfo("Aprendido", f"✅ He aprendido sobre '{nombre}' 🎉")
         self.iniciar()
@@ -260,6 +286,10 @@ class AkinatorDinamico:
     def reiniciar(self):
         self.iniciar()
 
+    def salir(self):
+        CAMARA.cerrar()
+        self.root.destroy()
+
 
 # ==============================
 # Ejecutar aplicación
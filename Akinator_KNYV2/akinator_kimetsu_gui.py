@@ -1,9 +1,20 @@
-import json
 import os
+import sys
 import tkinter as tk
 from tkinter import simpledialog
-from PIL import Image, ImageTk
-import cv2
+
+# El motor compartido vive en la raíz del repositorio
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from motor_akinator import indice, metricas, motor
+from motor_akinator.analisis import revisar_personaje
+from motor_akinator.aprendizaje import Aprendizaje
+from motor_akinator.arranque import Carga, cargar_juego
+from motor_akinator.arbol import ruta_arbol
+from motor_akinator.camara import CapturaCamara, VentanaCamara
+from motor_akinator.imagenes import ServicioImagenes
+from motor_akinator.motor import ADIVINADO, DUDOSO, SIN_CANDIDATOS, texto_pregunta
+from motor_akinator.popularidad import registrar_partida
+from motor_akinator.recarga import INTERVALO_RECARGA, Recarga
 
 # =======================================================
 # 🧠 AKINATOR KIMETSU NO YAIBA
@@ -15,6 +26,13 @@ import cv2
 # =======================================================
 
 
+# Cuántas imágenes de candidatos se precargan mientras se responde
+IMAGENES_PRECARGADAS = 3
+
+# Cada cuántos milisegundos se revisa si terminó la carga de los datos
+INTERVALO_CARGA = 20
+
+
 # ==============================
 # Funciones de manejo de datos
 # ==============================
@@ -23,28 +41,16 @@ def cargar_datos(archivo):
     Carga el archivo JSON que contiene los personajes.
     Si no existe, crea una estructura vacía con 'humanos' y 'demonios'.
     """
-    try:
-        with open(archivo, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {"humanos": {}, "demonios": {}}
+    return motor.cargar_datos(archivo)
 
 
 def filtrar_personajes(candidatos, respuestas):
     """
     Filtra los personajes que coinciden con las respuestas dadas.
     Solo se mantienen aquellos cuyos atributos coinciden con las respuestas.
+    Acepta un diccionario o una vista del índice (sin recorrer diccionarios).
     """
-    resultado = {}
-    for nombre, atributos in candidatos.items():
-        coincide = True
-        for a, v in respuestas.items():
-            if a in atributos and atributos[a] != v:
-                coincide = False
-                break
-        if coincide:
-            resultado[nombre] = atributos
-    return resultado
+    return indice.filtrar_personajes(candidatos, respuestas)
 
 
 def atributos_utiles(candidatos, respuestas):
@@ -52,24 +58,14 @@ def atributos_utiles(candidatos, respuestas):
     Determina qué atributos todavía no se han preguntado
     y que pueden servir para distinguir a los personajes restantes.
     """
-    utiles = []
-    for a in set().union(*[c.keys() for c in candidatos.values()]):
-        if a in respuestas:
-            continue
-        valores = set([c[a] for c in candidatos.values() if a in c])
-        if len(valores) > 1:
-            utiles.append(a)
-    return utiles
+    return indice.atributos_utiles(candidatos, respuestas)
 
 
 def get_all_attributes(candidatos):
     """
     Devuelve todos los atributos posibles dentro del grupo de personajes.
     """
-    atributos = set()
-    for personaje in candidatos.values():
-        atributos.update(personaje.keys())
-    return atributos
+    return indice.get_all_attributes(candidatos)
 
 
 # ==============================
@@ -77,7 +73,8 @@ def get_all_attributes(candidatos):
 # ==============================
 class AkinatorDinamico:
     """
-    Clase principal que maneja la lógica del juego y la interfaz gráfica.
+    Clase principal que maneja la interfaz gráfica.
+    El estado de la partida vive en una sesión del motor.
     """
 
     def __init__(self, root):
@@ -87,15 +84,36 @@ class AkinatorDinamico:
         self.root.geometry("600x500")
         self.root.config(bg="#1c1c1c")
 
-        # Cargar los datos desde el archivo JSON
-        self.data = cargar_datos("personajes_kimetsu.json")
+        # Cargar los datos desde el almacén SQLite en otro hilo, para que la
+        # ventana aparezca enseguida (se importa personajes_kimetsu.json la
+        # primera vez). El motor usa la estrategia para escoger la siguiente
+        # pregunta ("ganancia", "candidatos_esperados" u "orden") y el modo
+        # ("filtro" descarta personajes, "bayes" tolera respuestas equivocadas,
+        # "arbol" usa un árbol precompilado guardado junto a los datos).
+        # Con especular=True la siguiente pregunta se calcula mientras se lee
+        # la actual; con anticipar=True pregunta "¿Es X?" por el más probable
+        # cuando eso acorta la partida
+        modo = os.environ.get("AKINATOR_MODO", "filtro")
+        opciones = {"ruta": ruta_arbol("personajes_kimetsu.json")} if modo == "arbol" else {}
+        self.carga = Carga(cargar_juego, "personajes_kimetsu.json",
+                           estrategia=os.environ.get("AKINATOR_ESTRATEGIA", "ganancia"),
+                           modo=modo, especular=True, anticipar=True, **opciones)
+        self.almacen = None
+        self.data = None
+        self.motor = None
+        self.recarga = None
 
         # Variables de estado del juego
-        self.respuestas = {}
-        self.candidatos = {}
-        self.atributos_pendientes = []
-        self.grupo = None
+        self.sesion = None
         self.personaje_actual = None
+        self.partida_registrada = False
+
+        # Miniaturas de los personajes (caché y precarga en segundo plano)
+        self.imagenes = ServicioImagenes(["imagenes_personajes", "imagenes"])
+
+        # Cámara en hilos propios, reutilizada entre personajes aprendidos
+        self.camara = CapturaCamara()
+        self.root.protocol("WM_DELETE_WINDOW", self.salir)
 
         # ======================
         # Elementos de la Interfaz
@@ -120,111 +138,175 @@ class AkinatorDinamico:
         self.boton_si.pack(side="left", padx=50, pady=10)
         self.boton_no.pack(side="right", padx=50, pady=10)
 
+        # Respuestas con duda (solo en modo bayesiano)
+        self.botones_duda = []
+        if modo == "bayes":
+            for texto, respuesta in (("Probablemente sí", "probablemente_si"),
+                                     ("No sé", "no_se"),
+                                     ("Probablemente no", "probablemente_no")):
+                boton = tk.Button(root, text=texto, command=lambda r=respuesta: self.responder(r),
+                                  width=14, bg="#7f8c8d", fg="white", font=("Arial", 10))
+                boton.pack(side="bottom", pady=2)
+                self.botones_duda.append(boton)
+
+        # Botón para deshacer la última respuesta (por si fue un clic equivocado)
+        self.atras_btn = tk.Button(root, text="⬅ Atrás", command=self.deshacer,
+                                   bg="#95a5a6", fg="white", font=("Arial", 11))
+        self.atras_btn.pack(side="bottom", pady=5)
+
         # Botón de reinicio
         self.reiniciar_btn = tk.Button(root, text="🔄 Reiniciar", command=self.reiniciar,
                                        bg="#3498db", fg="white", font=("Arial", 11))
         self.reiniciar_btn.pack(side="bottom", pady=10)
 
-        # Iniciar el juego
+        # El juego empieza cuando terminen de cargarse los datos
+        self.pregunta.config(text="Cargando personajes...")
+        self.estado_botones("disabled")
+        self.root.after(INTERVALO_CARGA, self.esperar_carga)
+
+    def esperar_carga(self):
+        """
+        Revisa si ya se cargaron los datos y, si es así, empieza la partida.
+        """
+        if not self.carga.lista():
+            self.root.after(INTERVALO_CARGA, self.esperar_carga)
+            return
+        try:
+            self.almacen, self.data, self.motor = self.carga.resultado()
+        except Exception as e:
+            self.pregunta.config(text=f"⚠️ No se pudieron cargar los personajes: {e}")
+            return
+        self.sesion = self.motor.nueva_sesion()
+        self.recarga = Recarga(self.motor, self.almacen)
+        self.root.after(INTERVALO_RECARGA, self.recargar)
         self.iniciar()
 
+    def recargar(self):
+        """
+        Aplica los personajes que otras instancias aprendieron en el mismo
+        almacén. La partida en curso no cambia; la siguiente ya los incluye.
+        """
+        self.recarga.revisar()
+        self.root.after(INTERVALO_RECARGA, self.recargar)
+
     # ==============================
     # Inicio del juego
     # ==============================
     def iniciar(self):
         """
-        Reinicia todas las variables y comienza preguntando si el personaje es un demonio.
+        Reinicia todas las variables y muestra la primera pregunta.
         """
-        self.respuestas.clear()
-        self.candidatos.clear()
-        self.atributos_pendientes.clear()
-        self.grupo = None
+        if self.sesion is None:
+            return  # todavía se están cargando los datos
+        self.sesion.start()
         self.personaje_actual = None
-        self.boton_si.config(state="normal")
-        self.boton_no.config(state="normal")
-        self.pregunta.config(text="¿Es un demonio?")
+        self.partida_registrada = False
+        self.estado_botones("normal")
+        self.pregunta.config(text=texto_pregunta(self.sesion.current_question()))
         self.imagen_label.config(image="")
 
+    def estado_botones(self, estado):
+        """
+        Activa ("normal") o desactiva ("disabled") los botones de respuesta.
+        """
+        for boton in [self.boton_si, self.boton_no] + self.botones_duda:
+            boton.config(state=estado)
+
     # ==============================
     # Manejo de respuestas
     # ==============================
+    @metricas.cronometrado("gui.responder")
     def responder(self, r):
         """
-        Procesa la respuesta del usuario ("si" o "no") y actualiza el estado del juego.
+        Procesa la respuesta del usuario ("si", "no" o, en modo bayesiano,
+        "no_se" / "probablemente_si" / "probablemente_no") y actualiza el estado del juego.
         """
-        # Primera pregunta: define si es humano o demonio
-        if self.grupo is None:
-            self.grupo = "demonios" if r == "si" else "humanos"
-            self.candidatos = self.data.get(self.grupo, {}).copy()
-            self.atributos_pendientes = atributos_utiles(self.candidatos, self.respuestas)
-            self.siguiente_pregunta()
-            return
-
-        # Si ya se definió el grupo, procesar las respuestas siguientes
-        if not self.atributos_pendientes:
+        # La partida ya terminó (o los datos aún no se cargan)
+        if self.sesion is None or self.sesion.current_question() is None:
             return
 
-        atributo = self.atributos_pendientes.pop(0)
-        self.respuestas[atributo] = r
-        self.candidatos = filtrar_personajes(self.candidatos, self.respuestas)
+        # La sesión filtra los candidatos (el grupo es una pregunta más)
+        self.sesion.answer(r)
+        resultado = self.sesion.result()
 
         # Caso 1: Queda un solo personaje
-        if len(self.candidatos) == 1:
-            self.personaje_actual = list(self.candidatos.keys())[0]
+        if resultado.estado == ADIVINADO:
+            self.personaje_actual = resultado.personajes[0]
             self.pregunta.config(text=f"🎯 Tu personaje es {self.personaje_actual}!")
             self.mostrar_imagen(self.personaje_actual)
-            self.boton_si.config(state="disabled")
-            self.boton_no.config(state="disabled")
+            self.estado_botones("disabled")
+            self.registrar(self.personaje_actual)
             return
 
         # Caso 2: No hay coincidencias → aprender personaje nuevo
-        if len(self.candidatos) == 0:
+        if resultado.estado == SIN_CANDIDATOS:
             self.aprender_personaje()
             return
 
         # Caso 3: Aún quedan varios → seguir preguntando
-        self.atributos_pendientes = atributos_utiles(self.candidatos, self.respuestas)
+        # (mientras tanto se preparan las imágenes de los más probables)
+        self.imagenes.precargar(self.sesion.probables(IMAGENES_PRECARGADAS))
+        self.siguiente_pregunta()
+
+    def registrar(self, nombre):
+        """
+        Cuenta la partida para la popularidad del personaje (ver
+        motor_akinator/popularidad.py) con las preguntas hechas, "¿Es X?"
+        incluidas. Una sola vez por partida, aunque se deshaga y se vuelva
+        a llegar al mismo final.
+        """
+        if self.partida_registrada:
+            return
+        self.partida_registrada = True
+        registrar_partida(self.almacen, nombre, self.sesion.preguntas_hechas())
+
+    @metricas.cronometrado("gui.deshacer")
+    def deshacer(self):
+        """
+        Deshace la última respuesta y vuelve a la pregunta anterior, también
+        después de adivinar. La sesión guarda cada estado anterior, así que
+        no se vuelve a filtrar nada.
+        """
+        if self.sesion is None or not self.sesion.deshacer():
+            return
+        self.personaje_actual = None
+        self.imagen_label.config(image="")
+        self.estado_botones("normal")
         self.siguiente_pregunta()
 
     # ==============================
     # Hacer la siguiente pregunta
     # ==============================
+    @metricas.cronometrado("gui.siguiente_pregunta")
     def siguiente_pregunta(self):
         """
-        Escoge el siguiente atributo a preguntar, evitando atributos que no aplican al grupo.
+        Muestra el atributo que la sesión escogió (nunca uno que no aplica a los candidatos).
         """
-        while self.atributos_pendientes:
-            atributo = self.atributos_pendientes[0]
-            # Evita atributos irrelevantes
-            if self.grupo == "humanos" and "luna" in atributo:
-                self.atributos_pendientes.pop(0)
-                continue
-            if self.grupo == "demonios" and ("pilar" in atributo or "respira" in atributo):
-                self.atributos_pendientes.pop(0)
-                continue
-            # Mostrar la pregunta
-            self.pregunta.config(text=f"¿{atributo.replace('_',' ')}?")
-            break
+        atributo = self.sesion.current_question()
+        if atributo is not None:
+            self.pregunta.config(text=texto_pregunta(atributo))
+            return
 
         # Si no hay más preguntas posibles, muestra posibles coincidencias
-        if not self.atributos_pendientes and len(self.candidatos) > 1:
-            posibles = "\n".join(self.candidatos.keys())
+        resultado = self.sesion.result()
+        if resultado.estado == DUDOSO:
+            posibles = "\n".join(resultado.personajes)
             self.pregunta.config(text=f"No estoy seguro, pero podría ser:\n{posibles}")
-            self.boton_si.config(state="disabled")
-            self.boton_no.config(state="disabled")
+            self.estado_botones("disabled")
 
     # ==============================
     # Mostrar imagen del personaje
     # ==============================
+    @metricas.cronometrado("gui.mostrar_imagen")
     def mostrar_imagen(self, nombre):
         """
         Muestra la imagen del personaje adivinado si existe en la carpeta.
+        Normalmente la miniatura ya está precargada en la caché.
         """
-        carpeta = "imagenes_personajes"
-        os.makedirs(carpeta, exist_ok=True)
-        ruta = os.path.join(carpeta, f"{nombre}.jpg")
-        if os.path.exists(ruta):
-            img = Image.open(ruta).resize((250, 250))
+        img = self.imagenes.obtener(nombre)
+        if img is not None:
+            from PIL import ImageTk
+
             self.img_tk = ImageTk.PhotoImage(img)
             self.imagen_label.config(image=self.img_tk)
         else:
@@ -233,6 +315,7 @@ class AkinatorDinamico:
     # ==============================
     # Aprender personaje nuevo
     # ==============================
+    @metricas.cronometrado("gui.aprender_personaje")
     def aprender_personaje(self):
         """
         Si el programa no logra adivinar, pide los datos de un nuevo personaje y lo guarda.
@@ -242,24 +325,26 @@ class AkinatorDinamico:
             self.iniciar()
             return
 
-        # Verificar si ya existe
-        if nombre in self.data[self.grupo]:
+        # Verificar si ya existe (en cualquier grupo)
+        if nombre in self.motor.indice.posicion:
             self.pregunta.config(text=f"El personaje '{nombre}' ya existe en la base de datos.")
             return
 
-        atributos_nuevos = {}
-        todos_atributos = get_all_attributes(self.data[self.grupo])
-
-        # Preguntar por los atributos conocidos
-        for atributo in todos_atributos:
-            r = simpledialog.askstring("Atributo", f"¿{atributo.replace('_',' ')}? (si/no)")
-            if not r: 
-                r = "no"
-            atributos_nuevos[atributo] = "si" if r.lower() == "si" else "no"
+        # Se parte de las respuestas de la partida y solo se pregunta lo que
+        # separa al personaje de los que se le parecen; lo demás queda desconocido
+        aprendizaje = Aprendizaje(self.motor, self.sesion.respuestas)
+        while aprendizaje.current_question() is not None:
+            atributo = aprendizaje.current_question()
+            r = simpledialog.askstring("Atributo", f"{texto_pregunta(atributo)} (si/no, Enter si no sabes)")
+            aprendizaje.answer(r.strip().lower() if r else None)
+        grupo = aprendizaje.grupo()
+        atributos_nuevos = aprendizaje.atributos()
 
         # Permitir agregar nuevos atributos personalizados
+        confundidos = aprendizaje.confundidos()
+        aviso = f"\nAún se confunde con: {', '.join(confundidos)}" if confundidos else ""
         while True:
-            extra = simpledialog.askstring("Atributo extra", "Agregar nuevo atributo personalizado (Enter para omitir)")
+            extra = simpledialog.askstring("Atributo extra", "Agregar nuevo atributo personalizado (Enter para omitir)" + aviso)
             if not extra:
                 break
             r = simpledialog.askstring("Atributo", f"¿{extra.replace('_',' ')}? (si/no)")
@@ -267,42 +352,59 @@ class AkinatorDinamico:
                 r = "no"
             atributos_nuevos[extra] = "si" if r.lower() == "si" else "no"
 
+        # Si queda idéntico a otro personaje el juego nunca podrá separarlos
+        self.separar_identicos(grupo, nombre, atributos_nuevos)
+
         # Guardar el nuevo personaje
-        self.data[self.grupo][nombre] = atributos_nuevos
+        self.motor.aprender(grupo, nombre, atributos_nuevos)
 
         # Tomar una foto con la cámara
         self.tomar_foto(nombre)
 
-        # Guardar cambios en el archivo JSON
-        with open("personajes_kimetsu.json", "w", encoding="utf-8") as f:
-            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        # Guardar solo el personaje nuevo en el almacén
+        self.almacen.guardar_personaje(grupo, nombre, atributos_nuevos)
+        self.registrar(nombre)
 
         # Confirmar aprendizaje
         self.pregunta.config(text=f"✅ He aprendido sobre '{nombre}' 🎉")
         self.iniciar()
 
+    def separar_identicos(self, grupo, nombre, atributos_nuevos):
+        """
+        Antes de guardar, revisa si el personaje nuevo queda idéntico a otro
+        y pide los atributos que mejor los separarían (o uno nuevo).
+        """
+        confusion = revisar_personaje(self.motor, grupo, nombre, atributos_nuevos)
+        sugerencias = iter(confusion.sugerencias)
+        while confusion.personajes:
+            aviso = f"Aún es idéntico a: {', '.join(confusion.personajes)}\n"
+            atributo = next(sugerencias, None)
+            if atributo is None:
+                atributo = simpledialog.askstring("Atributo extra", aviso + "Agrega un atributo que los distinga (Enter para guardar igual)")
+                if not atributo:
+                    return
+            r = simpledialog.askstring("Atributo", aviso + f"{texto_pregunta(atributo)} (si/no, Enter si no sabes)")
+            r = r.strip().lower() if r else ""
+            if r in ("si", "no"):
+                atributos_nuevos[atributo] = r
+                confusion = revisar_personaje(self.motor, grupo, nombre, atributos_nuevos)
+
     # ==============================
     # Tomar foto con cámara
     # ==============================
+    @metricas.cronometrado("gui.tomar_foto")
     def tomar_foto(self, nombre):
         """
         Usa la cámara para tomar una foto del personaje nuevo.
         Guarda la imagen en la carpeta 'imagenes_personajes'.
+        La ventana de la cámara no bloquea el juego: la lectura y el
+        guardado de la foto ocurren en hilos aparte.
         """
         carpeta = "imagenes_personajes"
         os.makedirs(carpeta, exist_ok=True)
         ruta = os.path.join(carpeta, f"{nombre}.jpg")
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
-            return
-        ret, frame = cap.read()
-        if ret:
-            cv2.imshow(f"Toma la foto de {nombre}. Pulsa 's' para guardar", frame)
-            key = cv2.waitKey(0)
-            if key & 0xFF == ord('s'):
-                cv2.imwrite(ruta, frame)
-        cap.release()
-        cv2.destroyAllWindows()
+        VentanaCamara(self.root, self.camara, f"Toma la foto de {nombre}", ruta,
+                      despues=lambda: self.imagenes.generar_miniatura(nombre))
 
     # ==============================
     # Reiniciar el juego
@@ -313,6 +415,13 @@ class AkinatorDinamico:
         """
         self.iniciar()
 
+    def salir(self):
+        """
+        Libera la cámara y cierra la ventana.
+        """
+        self.camara.cerrar()
+        self.root.destroy()
+
 
 # ==============================
 # Ejecutar la aplicación
@@ -0,0 +1,3 @@
+"""
+Lógica del Akinator Kimetsu no Yaiba independiente de la interfaz.
+"""
@@ -0,0 +1,430 @@
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+from abc import ABC, abstractmethod
+from itertools import islice
+
+from . import metricas
+
+# =======================================================
+# 🧠 ALMACÉN DE PERSONAJES
+# -------------------------------------------------------
+# Guarda la base de conocimiento en SQLite con registro
+# WAL: aprender un personaje es un INSERT atómico de una
+# sola fila (no se reescribe todo el archivo), un corte a
+# mitad de escritura no corrompe lo ya guardado y varias
+# instancias pueden aprender a la vez sin pisarse.
+# El JSON original se importa una sola vez y se puede
+# exportar de nuevo para editarlo a mano.
+# =======================================================
+
+
+GRUPOS_BASE = ("humanos", "demonios")
+
+# Cada cuántos personajes aprendidos se vacía el WAL en la base
+COMPACTAR_CADA = 100
+
+# Filas que se juntan para cada executemany en una carga masiva
+FILAS_POR_LOTE = 5000
+
+# Cambios que se conservan en el registro al compactar (una instancia que
+# se quede más atrás vuelve a leer todo)
+CAMBIOS_CONSERVADOS = 10000
+
+
+def ruta_base_datos(archivo):
+    """
+    Archivo SQLite que corresponde a un JSON de personajes
+    (personajes_kimetsu.json → personajes_kimetsu.db).
+    """
+    base, extension = os.path.splitext(archivo)
+    return base + ".db" if extension == ".json" else archivo
+
+
+# ==============================
+# Interfaz del almacén
+# ==============================
+class AlmacenPersonajes(ABC):
+    """
+    Interfaz mínima que usan el juego y las herramientas.
+    """
+
+    @abstractmethod
+    def cargar(self):
+        """
+        Devuelve {grupo: {nombre: {atributo: "si"/"no"}}}.
+        """
+
+    @abstractmethod
+    def personajes(self):
+        """
+        Recorre (grupo, nombre, atributos) de a uno, sin juntarlos en memoria.
+        """
+
+    @abstractmethod
+    def guardar_personaje(self, grupo, nombre, atributos):
+        """
+        Guarda un personaje nuevo. Devuelve False si ya existía.
+        """
+
+    def compactar(self):
+        pass
+
+    def cerrar(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+# ==============================
+# SQLite con WAL
+# ==============================
+class AlmacenSQLite(AlmacenPersonajes):
+    """
+    Una fila por personaje con sus atributos en JSON.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        # isolation_level=None: las transacciones se abren a mano.
+        # check_same_thread=False: la interfaz abre el almacén en un hilo
+        # de carga y lo usa después desde el de Tkinter (nunca a la vez)
+        self.conexion = sqlite3.connect(ruta, timeout=30, isolation_level=None,
+                                        check_same_thread=False)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA synchronous=NORMAL")
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS personajes ("
+            " grupo TEXT NOT NULL,"
+            " nombre TEXT NOT NULL,"
+            " atributos TEXT NOT NULL,"
+            " PRIMARY KEY (grupo, nombre))")
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT)")
+        # Cada cambio en personajes sube la revisión (también los hechos
+        # desde otra instancia o a mano), así se sabe si una copia quedó vieja
+        for evento in ("INSERT", "UPDATE", "DELETE"):
+            self.conexion.execute(
+                f"CREATE TRIGGER IF NOT EXISTS revision_{evento.lower()}"
+                f" AFTER {evento} ON personajes BEGIN"
+                " INSERT INTO meta (clave, valor) VALUES ('revision', 1)"
+                " ON CONFLICT (clave) DO UPDATE SET valor = valor + 1; END")
+        # Registro de personajes agregados o cambiados, para que otras
+        # instancias apliquen solo eso en vez de volver a cargar todo
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS cambios ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " grupo TEXT NOT NULL,"
+            " nombre TEXT NOT NULL)")
+        for evento in ("INSERT", "UPDATE"):
+            self.conexion.execute(
+                f"CREATE TRIGGER IF NOT EXISTS cambio_{evento.lower()}"
+                f" AFTER {evento} ON personajes BEGIN"
+                " INSERT INTO cambios (grupo, nombre) VALUES (NEW.grupo, NEW.nombre); END")
+        # Partidas terminadas por personaje, con pesos que decaen con el
+        # tiempo (los pesos ya vienen escalados, ver popularidad.py)
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS partidas ("
+            " nombre TEXT PRIMARY KEY,"
+            " peso REAL NOT NULL,"
+            " preguntas REAL NOT NULL)")
+        self.insertados = 0
+        # Último cambio que ya se leyó (con cargar o con cambios)
+        self.ultimo_cambio = 0
+
+    def cargar(self):
+        data = {grupo: {} for grupo in GRUPOS_BASE}
+        # Una sola transacción de lectura: los datos y la posición en el
+        # registro de cambios corresponden al mismo momento
+        self.conexion.execute("BEGIN")
+        try:
+            self.ultimo_cambio = self._ultimo_registrado()
+            filas = self.conexion.execute(
+                "SELECT grupo, nombre, atributos FROM personajes ORDER BY rowid")
+            for grupo, nombre, atributos in filas:
+                data.setdefault(grupo, {})[nombre] = json.loads(atributos)
+        finally:
+            self.conexion.execute("COMMIT")
+        return data
+
+    def personajes(self):
+        for grupo, nombre, atributos in self.conexion.execute(
+                "SELECT grupo, nombre, atributos FROM personajes ORDER BY rowid"):
+            yield grupo, nombre, json.loads(atributos)
+
+    def cambios(self):
+        """
+        Personajes agregados o cambiados desde la última lectura, como
+        [(grupo, nombre, atributos)]. None si el registro ya se recortó
+        más allá de esa lectura (hay que usar cargar()).
+        """
+        self.conexion.execute("BEGIN")
+        try:
+            primero = self.conexion.execute("SELECT MIN(id) FROM cambios").fetchone()[0]
+            if primero is not None and primero > self.ultimo_cambio + 1:
+                return None
+            filas = self.conexion.execute(
+                "SELECT c.id, c.grupo, c.nombre, p.atributos FROM cambios c"
+                " LEFT JOIN personajes p ON p.grupo = c.grupo AND p.nombre = c.nombre"
+                " WHERE c.id > ? ORDER BY c.id", (self.ultimo_cambio,)).fetchall()
+        finally:
+            self.conexion.execute("COMMIT")
+        cambios = {}
+        for id_cambio, grupo, nombre, atributos in filas:
+            self.ultimo_cambio = id_cambio
+            if atributos is not None:  # se borró después
+                cambios[grupo, nombre] = json.loads(atributos)
+        return [(grupo, nombre, atributos) for (grupo, nombre), atributos in cambios.items()]
+
+    def firma(self):
+        """
+        Tamaño y fecha de la base y de su WAL: si no cambian, nadie
+        escribió (sirve para no consultar la base en cada sondeo).
+        """
+        firma = []
+        for ruta in (self.ruta, self.ruta + "-wal"):
+            try:
+                estado = os.stat(ruta)
+            except OSError:
+                firma.append(None)
+            else:
+                firma.append((estado.st_mtime_ns, estado.st_size))
+        return tuple(firma)
+
+    def _ultimo_registrado(self):
+        fila = self.conexion.execute("SELECT MAX(id) FROM cambios").fetchone()
+        return fila[0] or 0
+
+    def revision(self):
+        fila = self.conexion.execute(
+            "SELECT valor FROM meta WHERE clave = 'revision'").fetchone()
+        return int(fila[0]) if fila else 0
+
+    def cargar_compacto(self):
+        """
+        Como cargar(), pero leyendo una copia en formato binario
+        (personajes_kimetsu.akb) con mmap. La copia se rehace cuando
+        la base cambió desde que se escribió.
+        """
+        from .binario import ArchivoBinario, escribir_binario, ruta_binaria
+
+        ruta = ruta_binaria(self.ruta)
+        # Antes de leer: un cambio que entre mientras tanto se vuelve a
+        # aplicar en la próxima recarga (aplicarlo dos veces no cambia nada)
+        self.ultimo_cambio = self._ultimo_registrado()
+        marca = self.revision()
+        try:
+            binario = ArchivoBinario(ruta)
+        except (OSError, ValueError):
+            binario = None
+        if binario is not None and binario.marca == marca:
+            data = binario.grupos()
+        else:
+            if binario is not None:
+                binario.cerrar()
+            data = self.cargar()
+            try:
+                escribir_binario(ruta, data, marca=marca)
+            except (OSError, ValueError):
+                return data  # otra instancia tiene la copia abierta, o valores raros
+            data = ArchivoBinario(ruta).grupos()
+        for grupo in GRUPOS_BASE:
+            data.setdefault(grupo, {})
+        return data
+
+    def guardar_personaje(self, grupo, nombre, atributos):
+        with metricas.paso("almacen.guardar", atributos=len(atributos)):
+            cursor = self.conexion.execute(
+                "INSERT INTO personajes (grupo, nombre, atributos) VALUES (?, ?, ?)"
+                " ON CONFLICT (grupo, nombre) DO NOTHING",
+                (grupo, nombre, json.dumps(atributos, ensure_ascii=False)))
+        self.insertados += 1
+        if self.insertados % COMPACTAR_CADA == 0:
+            self.conexion.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        return cursor.rowcount == 1
+
+    def sumar_partida(self, nombre, peso, preguntas):
+        """
+        Suma una partida terminada en `nombre` que duró `preguntas`.
+        """
+        self.conexion.execute(
+            "INSERT INTO partidas (nombre, peso, preguntas) VALUES (?, ?, ?)"
+            " ON CONFLICT (nombre) DO UPDATE SET peso = peso + excluded.peso,"
+            " preguntas = preguntas + excluded.preguntas",
+            (nombre, peso, peso * preguntas))
+
+    def partidas(self):
+        """
+        {nombre: (peso, preguntas × peso)} de las partidas sumadas.
+        """
+        return {nombre: (peso, preguntas) for nombre, peso, preguntas in
+                self.conexion.execute("SELECT nombre, peso, preguntas FROM partidas")}
+
+    def tiene_marca(self, marca):
+        """
+        True si ya se hizo la importación de esa marca.
+        """
+        return self.conexion.execute(
+            "SELECT 1 FROM meta WHERE clave = ?", (marca,)).fetchone() is not None
+
+    def importar(self, data, marca=None, reemplazar=False):
+        """
+        Inserta todos los personajes de data en una sola transacción.
+        Con marca, la importación se hace una sola vez aunque dos
+        procesos la intenten a la vez. Con reemplazar, los personajes
+        que ya existen toman los atributos de data.
+        """
+        conflicto = ("DO UPDATE SET atributos = excluded.atributos"
+                     if reemplazar else "DO NOTHING")
+        self.conexion.execute("BEGIN IMMEDIATE")
+        try:
+            if marca is not None:
+                # Otra instancia pudo importar entre la lectura y el bloqueo
+                if self.tiene_marca(marca):
+                    self.conexion.execute("ROLLBACK")
+                    return 0
+                self.conexion.execute(
+                    "INSERT INTO meta (clave, valor) VALUES (?, 'si')", (marca,))
+            filas = [(grupo, nombre, json.dumps(atributos, ensure_ascii=False))
+                     for grupo, personajes in data.items()
+                     for nombre, atributos in personajes.items()]
+            self.conexion.executemany(
+                "INSERT INTO personajes (grupo, nombre, atributos) VALUES (?, ?, ?)"
+                " ON CONFLICT (grupo, nombre) " + conflicto, filas)
+            self.conexion.execute("COMMIT")
+        except BaseException:
+            self.conexion.execute("ROLLBACK")
+            raise
+        return len(filas)
+
+    def insertar_filas(self, filas, por_lote=FILAS_POR_LOTE):
+        """
+        Inserta (grupo, nombre, atributos_json) desde un iterable sin
+        juntarlos en memoria (de a `por_lote` filas), en una sola
+        transacción: si algo falla no queda nada a medias. Devuelve
+        cuántos se insertaron (los que ya existían se saltan).
+        """
+        filas = iter(filas)
+        insertadas = 0
+        self.conexion.execute("BEGIN IMMEDIATE")
+        try:
+            while True:
+                lote = list(islice(filas, por_lote))
+                if not lote:
+                    break
+                cursor = self.conexion.executemany(
+                    "INSERT INTO personajes (grupo, nombre, atributos) VALUES (?, ?, ?)"
+                    " ON CONFLICT (grupo, nombre) DO NOTHING", lote)
+                insertadas += max(cursor.rowcount, 0)
+            self.conexion.execute("COMMIT")
+        except BaseException:
+            self.conexion.execute("ROLLBACK")
+            raise
+        self.conexion.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        return insertadas
+
+    def compactar(self):
+        """
+        Pasa el WAL a la base y reconstruye el archivo sin huecos.
+        Del registro de cambios quedan solo los últimos.
+        """
+        self.conexion.execute(
+            "DELETE FROM cambios WHERE id <= (SELECT MAX(id) FROM cambios) - ?",
+            (CAMBIOS_CONSERVADOS,))
+        self.conexion.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.conexion.execute("VACUUM")
+
+    def cerrar(self):
+        self.conexion.close()
+
+
+# ==============================
+# JSON (para exportar y editar)
+# ==============================
+def escribir_json_atomico(archivo, data):
+    """
+    Escribe el JSON en un temporal y lo renombra encima del original,
+    así un corte nunca deja el archivo a medias.
+    """
+    carpeta = os.path.dirname(os.path.abspath(archivo))
+    descriptor, temporal = tempfile.mkstemp(dir=carpeta, suffix=".tmp")
+    try:
+        permisos = os.stat(archivo).st_mode & 0o777
+    except FileNotFoundError:
+        permisos = 0o644
+    try:
+        with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temporal, permisos)
+        os.replace(temporal, archivo)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+
+
+def importar_json(archivo, almacen):
+    """
+    Copia una sola vez los personajes del JSON al almacén.
+    """
+    marca = f"importado:{os.path.basename(archivo)}"
+    # Lo normal es que ya esté importado: una lectura, sin leer el JSON
+    # ni tomar el bloqueo de escritura
+    if almacen.tiene_marca(marca):
+        return 0
+    try:
+        with open(archivo, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return 0
+    return almacen.importar(data, marca=marca)
+
+
+def abrir_almacen(archivo):
+    """
+    Abre el almacén que corresponde al JSON de personajes,
+    importando el JSON la primera vez.
+    """
+    almacen = AlmacenSQLite(ruta_base_datos(archivo))
+    if archivo.endswith(".json"):
+        importar_json(archivo, almacen)
+    return almacen
+
+
+# ==============================
+# Línea de comandos
+# ==============================
+def main(argv=None):
+    """
+    python -m motor_akinator.almacen exportar personajes_kimetsu.json
+    python -m motor_akinator.almacen importar personajes_kimetsu.json
+    python -m motor_akinator.almacen compactar personajes_kimetsu.json
+
+    exportar escribe el contenido del almacén en el JSON para editarlo;
+    importar vuelve a cargar el JSON editado sobre el almacén.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2 or argv[0] not in ("exportar", "importar", "compactar"):
+        print(main.__doc__.strip())
+        return 2
+    orden, archivo = argv
+    with abrir_almacen(archivo) as almacen:
+        if orden == "exportar":
+            escribir_json_atomico(archivo, almacen.cargar())
+        elif orden == "importar":
+            with open(archivo, "r", encoding="utf-8") as f:
+                print(f"{almacen.importar(json.load(f), reemplazar=True)} personajes importados")
+        else:
+            almacen.compactar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
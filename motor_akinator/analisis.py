@@ -0,0 +1,288 @@
+import argparse
+import json
+import sys
+from collections import defaultdict, namedtuple
+from itertools import combinations
+from math import comb
+
+from .indice import contar_bits, posiciones_bits
+
+# =======================================================
+# 🧠 ANÁLISIS DE LA BASE DE CONOCIMIENTO
+# -------------------------------------------------------
+# El juego solo separa a dos personajes con un atributo en
+# el que uno dice "si" y el otro "no": un desconocido sigue
+# siendo candidato con cualquier respuesta. Dos personajes
+# que no se contradicen en ningún atributo (ya con los
+# valores que pone el grupo) nunca se pueden separar y la
+# partida termina en "No estoy seguro, pero podría ser...".
+# Para toda la base, los personajes se agrupan en tablas
+# por los atributos que conocen y sus valores: cada uno se
+# busca en las tablas de los conjuntos que caben en el
+# suyo (sin comparar por parejas), y con atributos borrados
+# salen los que se contradicen en pocos (`distancia`). Para
+# un personaje nuevo basta con las columnas de bits.
+# Para cada grupo sugiere qué atributos conviene completar
+# para separarlo. Se usa al aprender un personaje y como
+# revisión de toda la base:
+#   python -m motor_akinator.analisis Akinator_KNYV2/personajes_kimetsu.json
+# =======================================================
+
+
+# Personajes que no se pueden separar (o casi), los atributos en los que
+# se contradicen y los atributos que convendría completar para separarlos
+Confusion = namedtuple("Confusion", ["personajes", "diferencias", "sugerencias"])
+
+SUGERENCIAS = 5
+
+# Atributos que un personaje puede desconocer de más que otro para
+# buscarlo como idéntico o parecido a él en toda la base
+DESCONOCIDOS = 2
+
+
+def columnas_de(indice):
+    """
+    [(atributo, columna "si", columna "no")] con los valores tal como los
+    ve el juego (incluye el grupo y los rellenos).
+    """
+    return [(a, indice.si.get(a, 0), indice.no.get(a, 0)) for a in sorted(indice.atributos())]
+
+
+def diferencias(columnas, i, j):
+    """
+    Atributos en los que los personajes i y j se contradicen
+    (uno en "si" y el otro en "no").
+    """
+    return [a for a, si, no in columnas
+            if (si >> i & 1 and no >> j & 1) or (no >> i & 1 and si >> j & 1)]
+
+
+def contradicciones(columnas, todos, posicion, distancia=0):
+    """
+    niveles[k]: máscara de los personajes (sin el indicado) que lo
+    contradicen en k atributos o menos, para k = 0..distancia.
+    """
+    bit = 1 << posicion
+    niveles = [todos & ~bit] * (distancia + 1)
+    for _, si, no in columnas:
+        if si & bit:
+            contrarios = no
+        elif no & bit:
+            contrarios = si
+        else:
+            continue
+        if not contrarios:
+            continue
+        for k in range(distancia, 0, -1):
+            niveles[k] = (niveles[k] & ~contrarios) | niveles[k - 1]
+        niveles[0] &= ~contrarios
+    return niveles
+
+
+def sugerir(indice, mascara, limite=SUGERENCIAS):
+    """
+    Atributos que algún personaje de la máscara no tiene y que aplican a
+    su grupo, empezando por los que mejor dividen a toda la base
+    (los que más sirven en cualquier partida).
+    """
+    puntajes = []
+    for a in indice.atributos():
+        si, no, desconocidos = indice.contar(mascara, a)
+        if not desconocidos or not indice.aplica(a, mascara):
+            continue
+        g_si, g_no, _ = indice.contar(indice.todos, a)
+        puntajes.append((-min(g_si, g_no), a))
+    return [a for _, a in sorted(puntajes)[:limite]]
+
+
+# ==============================
+# Toda la base
+# ==============================
+def firmas(indice, columnas):
+    """
+    {posición: (conocidos, si)}: máscaras sobre el número de cada atributo
+    en `columnas` con los que el personaje tiene valor y los que tiene en "si".
+    """
+    firma = {i: (0, 0) for i in _posiciones(indice.todos)}
+    for k, (_, si, no) in enumerate(columnas):
+        bit = 1 << k
+        for i in _posiciones(si):
+            conocidos, valores = firma[i]
+            firma[i] = (conocidos | bit, valores | bit)
+        for i in _posiciones(no):
+            conocidos, valores = firma[i]
+            firma[i] = (conocidos | bit, valores)
+    return firma
+
+
+def _posiciones(mascara):
+    """
+    Como posiciones_bits, pero recorriendo el texto binario de la máscara:
+    lineal en su largo aunque tenga miles de bits encendidos.
+    """
+    bits = bin(mascara)[:1:-1]
+    i = bits.find("1")
+    while i >= 0:
+        yield i
+        i = bits.find("1", i + 1)
+
+
+def _borrados(conocidos, distancia):
+    """
+    Máscaras de `distancia` atributos conocidos (o de todos, si hay menos).
+    """
+    bits = [1 << k for k in posiciones_bits(conocidos)]
+    for elegidos in combinations(bits, min(distancia, len(bits))):
+        yield sum(elegidos)
+
+
+def _caben(conocidos, esquemas, maximo):
+    """
+    Conjuntos de `esquemas` que caben en `conocidos` y les faltan a lo
+    sumo `maximo` de sus atributos. Recorre lo más corto: los esquemas o
+    las formas de quitar atributos.
+    """
+    bits = [1 << k for k in posiciones_bits(conocidos)]
+    if len(esquemas) <= sum(comb(len(bits), h) for h in range(maximo + 1)):
+        return [otros for otros in esquemas
+                if not otros & ~conocidos and contar_bits(conocidos & ~otros) <= maximo]
+    return [conocidos & ~sum(quitados) for h in range(maximo + 1)
+            for quitados in combinations(bits, h) if conocidos & ~sum(quitados) in esquemas]
+
+
+def analizar(indice, distancia=1, limite=SUGERENCIAS, desconocidos=DESCONOCIDOS):
+    """
+    {"identicos": [Confusion], "parecidos": [Confusion]}.
+    Idénticos: un personaje con los que no lo contradicen y no conocen
+    ningún atributo que él no conozca; entre ellos tampoco se
+    contradicen, así que ninguna pregunta los separa. Parecidos: parejas
+    así que se contradicen en 1..`distancia` atributos.
+    Los personajes se agrupan en tablas por el conjunto de atributos que
+    conocen y por sus valores, y cada uno se busca solo en las tablas de
+    los conjuntos que caben en el suyo con hasta `desconocidos`
+    atributos menos: lineal en personajes.
+    """
+    columnas = columnas_de(indice)
+    firma = firmas(indice, columnas)
+    tablas = defaultdict(lambda: defaultdict(list))
+    for i, (conocidos, si) in firma.items():
+        tablas[conocidos][si].append(i)
+
+    caben = {conocidos: _caben(conocidos, tablas, desconocidos) for conocidos in tablas}
+    grupos = {}
+    contenidos = set()
+    for i, (conocidos, si) in firma.items():
+        miembros = []
+        for otros in caben[conocidos]:
+            encontrados = tablas[otros].get(si & otros, ())
+            miembros.extend(encontrados)
+            if otros != conocidos:
+                contenidos.update(encontrados)
+        if len(miembros) > 1:
+            # Los de la misma firma arman el mismo grupo
+            grupos.setdefault(tuple(sorted(miembros)), i)
+    identicos = [Confusion(indice.nombres_de(sum(1 << i for i in miembros)), [],
+                           sugerir(indice, sum(1 << i for i in miembros), limite))
+                 for miembros, origen in sorted(grupos.items()) if origen not in contenidos]
+
+    parecidos = []
+    if distancia > 0:
+        # Un representante por firma; cada uno con sus atributos borrados
+        representantes = [lista[0] for tabla in tablas.values() for lista in tabla.values()]
+        # (la clave junta en un entero los valores que quedan y, más arriba,
+        # los atributos borrados)
+        ancho = len(columnas)
+        quitas = {conocidos: list(_borrados(conocidos, distancia)) for conocidos in tablas}
+        sin = {conocidos: defaultdict(list) for conocidos in tablas}
+        for i in representantes:
+            conocidos, si = firma[i]
+            for borrados in quitas[conocidos]:
+                sin[conocidos][si & ~borrados | borrados << ancho].append(i)
+        parejas = {}
+        for i in representantes:
+            conocidos, si = firma[i]
+            for otros in caben[conocidos]:
+                tabla = sin[otros]
+                valores = si & otros
+                for borrados in quitas[otros]:
+                    for j in tabla.get(valores & ~borrados | borrados << ancho, ()):
+                        cambios = (si ^ firma[j][1]) & otros
+                        if cambios:
+                            parejas[min(i, j), max(i, j)] = cambios
+        for (i, j), cambios in sorted(parejas.items()):
+            mascara = 1 << i | 1 << j
+            parecidos.append(Confusion(indice.nombres_de(mascara),
+                                       [columnas[k][0] for k in posiciones_bits(cambios)],
+                                       sugerir(indice, mascara, limite)))
+    return {"identicos": identicos, "parecidos": parecidos}
+
+
+# ==============================
+# Un personaje nuevo
+# ==============================
+def parecidos_a(indice, nombre, distancia=0):
+    """
+    Máscara de los personajes (sin el indicado) que lo contradicen en
+    `distancia` atributos o menos: con 0, los que no se pueden separar
+    de él.
+    """
+    return contradicciones(columnas_de(indice), indice.todos, indice.posicion[nombre],
+                           distancia)[distancia]
+
+
+def revisar_personaje(motor, grupo, nombre, atributos, distancia=0, limite=SUGERENCIAS):
+    """
+    Antes de guardar un personaje: con quién se confundiría si se
+    aprendiera con estos atributos. Confusion vacía si con nadie.
+    """
+    indice = motor.indice.agregar(nombre, {**atributos, **motor.atributos_grupo(grupo)}, grupo)
+    otros = parecidos_a(indice, nombre, distancia)
+    if not otros:
+        return Confusion([], [], [])
+    yo = indice.posicion[nombre]
+    distintos = []
+    if distancia:
+        columnas = columnas_de(indice)
+        distintos = sorted({a for i in posiciones_bits(otros)
+                            for a in diferencias(columnas, yo, i)})
+    mascara = otros | 1 << yo
+    return Confusion(indice.nombres_de(otros), distintos, sugerir(indice, mascara, limite))
+
+
+# ==============================
+# Línea de comandos
+# ==============================
+def main(argv=None):
+    from .motor import AkinatorEngine, leer_json
+
+    parser = argparse.ArgumentParser(
+        prog="python -m motor_akinator.analisis",
+        description="Busca personajes que el juego no puede separar.")
+    parser.add_argument("archivo", nargs="?", default="personajes_kimetsu.json")
+    parser.add_argument("--distancia", type=int, default=1,
+                        help="máximo de atributos distintos para contar como parecidos")
+    parser.add_argument("--faltante", choices=("si", "no"),
+                        help="valor de un atributo que el personaje no tiene")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    indice = AkinatorEngine(leer_json(args.archivo), faltante=args.faltante).indice
+    resultado = analizar(indice, args.distancia)
+    if args.json:
+        print(json.dumps({k: [c._asdict() for c in v] for k, v in resultado.items()},
+                         ensure_ascii=False, indent=2))
+    else:
+        for clave, titulo in (("identicos", "Idénticos"), ("parecidos", "Parecidos")):
+            print(f"{titulo}: {len(resultado[clave])}")
+            for c in resultado[clave]:
+                print(f"  {', '.join(c.personajes)}")
+                if c.diferencias:
+                    print(f"    solo difieren en: {', '.join(c.diferencias)}")
+                if c.sugerencias:
+                    print(f"    conviene completar: {', '.join(c.sugerencias)}")
+        print(f"{len(indice)} personajes revisados")
+    return 1 if resultado["identicos"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+# =======================================================
+# 🧠 APRENDIZAJE CON POCAS PREGUNTAS
+# -------------------------------------------------------
+# Para aprender un personaje nuevo no hace falta preguntar
+# todos los atributos: las respuestas de la partida ya
+# dicen mucho de él. Primero se averigua su grupo (si la
+# partida no lo preguntó) y luego solo lo que lo separa
+# de sus vecinos (los personajes que esas respuestas no
+# descartan), eligiendo cada vez el atributo que más
+# vecinos puede descartar. Lo que no se pregunta
+# no se guarda: un atributo ausente es "desconocido" y el
+# filtro y la selección de preguntas ya lo tratan así.
+# =======================================================
+
+
+# Tope de preguntas al aprender un personaje
+PREGUNTAS_MAXIMAS = 8
+
+# Respuestas de la partida que se guardan en el personaje nuevo
+# ("no_se" del modo bayesiano se deja como desconocido)
+VALORES = {"si": "si", "no": "no", "probablemente_si": "si", "probablemente_no": "no"}
+
+
+def respuestas_conocidas(respuestas):
+    """
+    Las respuestas de la partida reducidas a "si"/"no".
+    """
+    return {a: VALORES[r] for a, r in respuestas.items() if r in VALORES}
+
+
+class Aprendizaje:
+    """
+    Preguntas para aprender un personaje nuevo, con la misma forma que
+    una Sesion: current_question() / answer() y, al terminar, atributos().
+    """
+
+    __slots__ = ("motor", "indice", "conocidas", "vecinos", "preguntadas",
+                 "pregunta", "maximo")
+
+    def __init__(self, motor, respuestas, maximo=PREGUNTAS_MAXIMAS):
+        self.motor = motor
+        self.indice = indice = motor.indice
+        self.conocidas = respuestas_conocidas(respuestas)
+        # Vecinos: los personajes que las respuestas no contradicen
+        self.vecinos = indice.filtrar_respuestas(indice.todos, self.conocidas)
+        self.preguntadas = set()
+        self.maximo = maximo
+        self._siguiente_pregunta()
+
+    def current_question(self):
+        """
+        Atributo que conviene preguntar, o None si ya no hace falta.
+        """
+        return self.pregunta
+
+    def answer(self, respuesta):
+        """
+        Respuesta "si"/"no" a la pregunta actual; cualquier otra la deja
+        como desconocida.
+        """
+        if self.pregunta is None:
+            return
+        atributo = self.pregunta
+        self.preguntadas.add(atributo)
+        if respuesta in VALORES:
+            self.conocidas[atributo] = VALORES[respuesta]
+            self.vecinos = self.indice.filtrar(self.vecinos, atributo, VALORES[respuesta])
+        self._siguiente_pregunta()
+
+    def grupo(self):
+        """
+        Grupo del personaje nuevo según sus respuestas. Si no se sabe,
+        el de sus vecinos o, en último caso, el primero.
+        """
+        return (self._grupo_respondido() or self.indice.grupo_de(self.vecinos)
+                or next(iter(self.motor.data), None))
+
+    def atributos(self):
+        """
+        Atributos conocidos del personaje nuevo (sin los desconocidos
+        ni el atributo del grupo, que el motor ya añade por su cuenta).
+        """
+        return {a: v for a, v in self.conocidas.items()
+                if not self.motor.es_atributo_grupo(a)}
+
+    def confundidos(self):
+        """
+        Vecinos que las respuestas aún no separan del personaje nuevo.
+        """
+        return self.indice.nombres_de(self.vecinos)
+
+    def _grupo_respondido(self):
+        # El único grupo que no contradicen las respuestas, si lo hay
+        posibles = [grupo for grupo, distintivos in self.motor.distintivos.items()
+                    if all(self.conocidas.get(a, v) == v for a, v in distintivos.items())]
+        return posibles[0] if len(posibles) == 1 else None
+
+    def _siguiente_pregunta(self):
+        self.pregunta = None
+        if len(self.preguntadas) >= self.maximo:
+            return
+        # Sin grupo no se sabe qué atributos aplican: se pregunta primero
+        if self.motor.distintivos and self._grupo_respondido() is None:
+            for distintivos in self.motor.distintivos.values():
+                for atributo in distintivos:
+                    if atributo not in self.conocidas and atributo not in self.preguntadas:
+                        self.pregunta = atributo
+                        return
+        if not self.vecinos:
+            return
+        grupo = self.grupo()
+        mascara = self.indice.grupos.get(grupo, self.vecinos)
+        mejor = None
+        for atributo in sorted(self.indice.atributos()):
+            if (atributo in self.conocidas or atributo in self.preguntadas
+                    or not self.indice.aplica(atributo, mascara)):
+                continue
+            si, no, _ = self.indice.contar(self.vecinos, atributo)
+            if not si and not no:
+                continue
+            # Vecinos que puede descartar y, a igualdad, cuánto divide al grupo
+            # (así la ficha nueva también sirve para partidas futuras)
+            g_si, g_no, _ = self.indice.contar(self.indice.todos, atributo)
+            puntaje = (si + no, min(si, no), min(g_si, g_no))
+            if mejor is None or puntaje > mejor[0]:
+                mejor = (puntaje, atributo)
+        if mejor is not None:
+            self.pregunta = mejor[1]
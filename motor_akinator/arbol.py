@@ -0,0 +1,281 @@
+import atexit
+import hashlib
+import json
+import os
+
+from .almacen import escribir_json_atomico
+from .indice import posiciones_bits
+from .motor import (ADIVINADO, DUDOSO, PREGUNTANDO, SIN_CANDIDATOS, Resultado, contar_preguntas,
+                    copiar_campos, mejor_pregunta)
+
+# =======================================================
+# 🧠 ÁRBOL DE DECISIÓN PRECOMPILADO
+# -------------------------------------------------------
+# Para una base de conocimiento fija, las preguntas que se
+# hacen después de cada secuencia de respuestas son
+# siempre las mismas. Este modo las calcula una vez para
+# todos los personajes y las guarda en un árbol:
+#   nodo de pregunta → {"pregunta": atributo, "si": nodo, "no": nodo}
+#   hoja             → {"personajes": [posiciones en el índice]}
+# Jugar es solo bajar por el árbol. El árbol se guarda
+# junto a los datos y, al aprender un personaje, solo se
+# reconstruyen los nodos por los que pasa ese personaje;
+# su huella se actualiza con la de ese personaje y el
+# archivo se reescribe cada GUARDAR_CADA aprendidos.
+# =======================================================
+
+
+# 2: un solo árbol para todos los grupos (antes, uno por grupo)
+# 3: las hojas guardan posiciones (un nombre puede estar en dos grupos)
+VERSION = 3
+
+
+# Personajes aprendidos entre una escritura del árbol y la siguiente (al
+# salir del programa se escribe lo que quede pendiente)
+GUARDAR_CADA = 20
+
+
+def _sha1(partes):
+    contenido = json.dumps(partes, sort_keys=True, ensure_ascii=False)
+    return int.from_bytes(hashlib.sha1(contenido.encode("utf-8")).digest(), "big")
+
+
+def huella_configuracion(estrategia, faltante):
+    """
+    Parte de la huella que no depende de los personajes.
+    """
+    partes = [VERSION, estrategia.nombre, faltante]
+    # Con popularidad las preguntas dependen también de los pesos
+    priores = getattr(estrategia, "priores", None)
+    if priores is not None:
+        partes.append(priores.pesos)
+    return _sha1(partes)
+
+
+def huella_personaje(posicion, grupo, nombre, atributos):
+    """
+    Parte de la huella de un personaje. Las de todos se combinan con XOR,
+    así que aprender uno solo suma la suya. Incluye la posición porque
+    las hojas guardan posiciones.
+    """
+    return _sha1([posicion, grupo, nombre, dict(atributos)])
+
+
+def huella_personajes(data, indice):
+    huella = 0
+    for grupo, personajes in data.items():
+        for nombre, atributos in personajes.items():
+            huella ^= huella_personaje(indice.buscar(nombre, grupo), grupo, nombre, atributos)
+    return huella
+
+
+def ruta_arbol(archivo):
+    """
+    personajes_kimetsu.json → personajes_kimetsu.arbol.json
+    """
+    return os.path.splitext(archivo)[0] + ".arbol.json"
+
+
+# ==============================
+# Árbol de todos los personajes
+# ==============================
+class ArbolDecision:
+    """
+    Árbol construido con la misma estrategia que usa el motor para que
+    las partidas sean idénticas a las del modo filtro. El grupo es una
+    pregunta más del árbol.
+    """
+
+    def __init__(self, motor, ruta=None):
+        self.motor = motor
+        self.ruta = ruta
+        self.pendientes = 0
+        if ruta is not None:
+            atexit.register(self.guardar_pendientes)
+
+        guardado = self._leer()
+        self.configuracion = huella_configuracion(motor.estrategia, motor.faltante)
+        self.personajes = huella_personajes(motor.data, motor.indice)
+        if guardado.get("huella") == self.huella:
+            self.raiz = guardado["arbol"]
+        else:
+            self.raiz = self.construir()
+            self.guardar()
+
+    def construir(self):
+        """
+        Construye el árbol completo.
+        """
+        return self._construir(self.motor.indice.vista(), {})
+
+    def aprender(self, *personajes):
+        """
+        Actualiza el árbol después de que el motor aprendió personajes
+        ((grupo, nombre), buscados en el índice por los dos).
+        Se copian solo los nodos del camino de los personajes nuevos; las
+        ramas por las que no pasan se comparten con el árbol anterior, así
+        que las partidas en curso siguen con su árbol sin cambios.
+        """
+        indice = self.motor.indice
+        bits = 0
+        for grupo, nombre in personajes:
+            posicion = indice.buscar(nombre, grupo)
+            bits |= 1 << posicion
+            self.personajes ^= huella_personaje(posicion, grupo, nombre,
+                                                self.motor.data[grupo][nombre])
+        self.raiz = self._actualizar(self.raiz, indice.vista(), {}, bits)
+        # Escribir el árbol entero cuesta lo mismo que toda la base: se
+        # junta para varios personajes
+        self.pendientes += len(personajes)
+        if self.pendientes >= GUARDAR_CADA:
+            self.guardar()
+
+    def reconstruir(self):
+        """
+        Vuelve a construir todo el árbol (cuando cambiaron personajes que
+        ya estaban, sus caminos viejos también cambian).
+        """
+        self.raiz = self.construir()
+        self.personajes = huella_personajes(self.motor.data, self.motor.indice)
+        self.guardar()
+
+    @property
+    def huella(self):
+        """
+        Resumen de la configuración, los datos y el orden del índice; si
+        cambia, el árbol guardado ya no sirve.
+        """
+        return format(self.configuracion ^ self.personajes, "040x")
+
+    def guardar(self):
+        self.pendientes = 0
+        if self.ruta is None:
+            return
+        escribir_json_atomico(self.ruta, {"version": VERSION,
+                                          "huella": self.huella,
+                                          "arbol": self.raiz})
+
+    def guardar_pendientes(self):
+        if self.pendientes:
+            self.guardar()
+
+    # ------------------------------
+    # Cálculos internos
+    # ------------------------------
+
+    def _leer(self):
+        if self.ruta is None:
+            return {}
+        try:
+            with open(self.ruta, "r", encoding="utf-8") as f:
+                guardado = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+        return guardado if guardado.get("version") == VERSION else {}
+
+    def _construir(self, candidatos, respuestas):
+        pregunta = mejor_pregunta(self.motor.estrategia, candidatos, respuestas)
+        if pregunta is None:
+            return {"personajes": list(posiciones_bits(candidatos.mascara))}
+        nodo = {"pregunta": pregunta}
+        for r in ("si", "no"):
+            nodo[r] = self._construir(candidatos.filtrar(pregunta, r),
+                                      {**respuestas, pregunta: r})
+        return nodo
+
+    def _actualizar(self, nodo, candidatos, respuestas, bit):
+        pregunta = mejor_pregunta(self.motor.estrategia, candidatos, respuestas)
+        # Si cambia la pregunta de este nodo, todo lo que cuelga de él cambia
+        if "personajes" in nodo or pregunta != nodo["pregunta"]:
+            return self._construir(candidatos, respuestas)
+        nuevo = dict(nodo)
+        for r in ("si", "no"):
+            rama = candidatos.filtrar(pregunta, r)
+            # Cada personaje nuevo entra en la rama de su valor (o en las dos si no lo tiene)
+            if rama.mascara & bit:
+                nuevo[r] = self._actualizar(nodo[r], rama, {**respuestas, pregunta: r}, bit)
+        return nuevo
+
+
+# ==============================
+# Sesión que recorre el árbol
+# ==============================
+class SesionArbol:
+    """
+    Misma interfaz que Sesion; cada respuesta solo baja un nivel del árbol.
+    """
+
+    __slots__ = ("motor", "nodo", "respuestas", "pregunta", "historial")
+
+    def __init__(self, motor):
+        self.motor = motor
+        self.start()
+
+    def start(self):
+        self.nodo = self.motor.arbol.raiz
+        self.respuestas = {}
+        self.historial = None
+        self.pregunta = self.nodo.get("pregunta")
+
+    @property
+    def grupo(self):
+        """
+        Grupo de los personajes que aún se pueden alcanzar, o None si son de varios.
+        """
+        indice = self.motor.indice
+        return indice.grupo_de(sum(1 << i for i in self._alcanzables(len(indice))))
+
+    def current_question(self):
+        return self.pregunta
+
+    def answer(self, respuesta):
+        if self.pregunta is None:
+            return
+        self.historial = ((self.nodo, self.pregunta), self.historial)
+        self.respuestas[self.pregunta] = respuesta
+        self.nodo = self.nodo["si" if respuesta == "si" else "no"]
+        self.pregunta = self.nodo.get("pregunta")
+
+    def result(self):
+        if self.pregunta is not None:
+            return Resultado(PREGUNTANDO, [])
+        personajes = [self.motor.indice.nombres[i] for i in self.nodo["personajes"]]
+        if len(personajes) == 1:
+            return Resultado(ADIVINADO, personajes)
+        if not personajes:
+            return Resultado(SIN_CANDIDATOS, personajes)
+        return Resultado(DUDOSO, self.motor.mas_probables(personajes))
+
+    def deshacer(self):
+        if self.historial is None:
+            return False
+        (self.nodo, self.pregunta), self.historial = self.historial
+        self.respuestas.pop(self.pregunta, None)
+        return True
+
+    def puede_deshacer(self):
+        return self.historial is not None
+
+    def preguntas_hechas(self):
+        return contar_preguntas(self.historial)
+
+    def copiar(self):
+        return copiar_campos(self)
+
+    def probables(self, limite):
+        """
+        Hasta `limite` personajes de las hojas que aún se pueden alcanzar.
+        """
+        nombres = self.motor.indice.nombres
+        return [nombres[i] for i in self._alcanzables(limite)]
+
+    def _alcanzables(self, limite):
+        posiciones = []
+        pendientes = [self.nodo]
+        while pendientes and len(posiciones) < limite:
+            nodo = pendientes.pop()
+            if "personajes" in nodo:
+                posiciones.extend(i for i in nodo["personajes"] if i not in posiciones)
+            else:
+                pendientes.extend((nodo["no"], nodo["si"]))
+        return posiciones[:limite]
@@ -0,0 +1,162 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+# =======================================================
+# 🧠 ARRANQUE RÁPIDO
+# -------------------------------------------------------
+# La ventana tiene que aparecer enseguida: el almacén, los
+# datos y los índices se cargan en un hilo aparte mientras
+# Tkinter ya dibuja, y OpenCV / Pillow / NumPy se importan
+# recién cuando hacen falta (cámara, imágenes, modo bayes).
+# Este módulo tiene la carga en segundo plano y un
+# benchmark del arranque en frío:
+#   python -m motor_akinator.arranque Akinator_KNYV2
+# =======================================================
+
+
+# Módulos pesados que no deberían importarse al arrancar
+PESADOS = ("cv2", "numpy", "PIL.Image", "PIL.ImageTk")
+
+# Tiempo de arranque aceptable (segundos)
+LIMITE = 1.0
+
+
+class Carga:
+    """
+    Ejecuta una función en un hilo aparte. La interfaz consulta
+    lista() con root.after y luego pide resultado().
+    """
+
+    def __init__(self, funcion, *args, **kwargs):
+        self._valor = None
+        self._error = None
+        self._hecha = threading.Event()
+        self._hilo = threading.Thread(target=self._correr, args=(funcion, args, kwargs),
+                                      daemon=True)
+        self._hilo.start()
+
+    def _correr(self, funcion, args, kwargs):
+        try:
+            self._valor = funcion(*args, **kwargs)
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._hecha.set()
+
+    def lista(self):
+        return self._hecha.is_set()
+
+    def resultado(self, espera=None):
+        """
+        El valor que devolvió la función (o su excepción, relanzada).
+        """
+        self._hecha.wait(espera)
+        if self._error is not None:
+            raise self._error
+        return self._valor
+
+
+def cargar_juego(archivo, **opciones):
+    """
+    Abre el almacén, carga los personajes y arma el motor.
+    Devuelve (almacen, data, motor).
+    """
+    from .almacen import abrir_almacen
+    from .motor import AkinatorEngine
+    from .popularidad import leer_popularidad
+
+    almacen = abrir_almacen(archivo)
+    data = almacen.cargar_compacto()
+    # Las partidas registradas inclinan el juego hacia los personajes más elegidos
+    opciones.setdefault("popularidad", leer_popularidad(almacen))
+    return almacen, data, AkinatorEngine(data, **opciones)
+
+
+# ==============================
+# Benchmark de arranque
+# ==============================
+_MEDIR = r"""
+import importlib.util, json, os, sys, time
+inicio = time.perf_counter()
+spec = importlib.util.spec_from_file_location("gui", "akinator_kimetsu_gui.py")
+gui = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(gui)
+importado = time.perf_counter()
+from motor_akinator.arranque import PESADOS, cargar_juego
+medidas = {"importar_s": importado - inicio,
+           "pesados_al_importar": [m for m in PESADOS if m in sys.modules]}
+try:
+    import tkinter as tk
+    root = tk.Tk()
+except Exception:
+    root = None
+if root is not None:
+    antes = time.perf_counter()
+    app = gui.AkinatorDinamico(root)
+    root.update()
+    medidas["ventana_s"] = time.perf_counter() - antes
+    while not app.carga.lista():
+        root.update()
+        time.sleep(0.005)
+    root.update()
+    medidas["listo_s"] = time.perf_counter() - inicio
+    root.destroy()
+else:
+    antes = time.perf_counter()
+    almacen, data, motor = cargar_juego("personajes_kimetsu.json")
+    motor.nueva_sesion()
+    medidas["cargar_juego_s"] = time.perf_counter() - antes
+    medidas["listo_s"] = time.perf_counter() - inicio
+medidas["pesados_al_terminar"] = [m for m in PESADOS if m in sys.modules]
+print(json.dumps(medidas))
+"""
+
+
+def medir_arranque(carpeta, repeticiones=5):
+    """
+    Arranca la interfaz de `carpeta` en procesos nuevos (arranque en frío)
+    y devuelve las medidas de cada uno. Sin pantalla solo se miden la
+    importación del módulo y la carga de los datos.
+    """
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    entorno = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        filter(None, [raiz, os.environ.get("PYTHONPATH")])))
+    corridas = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        salida = subprocess.run([sys.executable, "-c", _MEDIR], cwd=carpeta, env=entorno,
+                                capture_output=True, text=True, check=True).stdout
+        medidas = json.loads(salida.strip().splitlines()[-1])
+        medidas["proceso_s"] = time.perf_counter() - inicio
+        corridas.append(medidas)
+    return corridas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m motor_akinator.arranque",
+        description="Mide el arranque en frío de la interfaz.")
+    parser.add_argument("carpeta", nargs="?", default="Akinator_KNYV2")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--limite", type=float, default=LIMITE,
+                        help="falla si la mediana de 'listo_s' lo supera")
+    args = parser.parse_args(argv)
+
+    corridas = medir_arranque(args.carpeta, args.repeticiones)
+    listos = sorted(c["listo_s"] for c in corridas)
+    mediana = listos[len(listos) // 2]
+    print(json.dumps({"carpeta": args.carpeta, "mediana_listo_s": mediana,
+                      "corridas": corridas}, indent=2))
+    if mediana > args.limite:
+        print(f"El arranque tarda {mediana:.3f} s (límite {args.limite} s)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+import math
+import weakref
+
+import numpy as np
+
+from . import metricas
+from .motor import (ADIVINADO, DUDOSO, PREGUNTANDO, SIN_CANDIDATOS, Resultado, contar_preguntas,
+                    copiar_campos)
+
+# =======================================================
+# 🧠 MODO PROBABILÍSTICO (BAYESIANO)
+# -------------------------------------------------------
+# En vez de descartar para siempre a un personaje con una
+# respuesta que no coincide, cada personaje guarda una
+# log-probabilidad que se actualiza con cada respuesta
+# suponiendo que el usuario se equivoca con cierta tasa.
+# Las actualizaciones son operaciones de NumPy sobre todos
+# los personajes a la vez (el grupo también es un atributo,
+# así que equivocarse en "¿Es un demonio?" se puede
+# corregir). El juego adivina cuando el personaje más
+# probable supera el umbral. Con popularidad, cada
+# personaje empieza con su probabilidad previa.
+# NumPy ya llega instalado como dependencia de OpenCV.
+# =======================================================
+
+
+# Respuestas aceptadas y con qué tasa de error se interpretan
+NO_SE = "no_se"
+PROBABLEMENTE_SI = "probablemente_si"
+PROBABLEMENTE_NO = "probablemente_no"
+
+TASA_ERROR = 0.05
+TASA_ERROR_DUDOSA = 0.25
+UMBRAL = 0.9
+
+# Por debajo de esta probabilidad un personaje no cuenta para elegir preguntas
+PROBABILIDAD_MINIMA = 1e-6
+
+
+# ==============================
+# Matriz de atributos
+# ==============================
+def columna_numpy(indice, bits):
+    """
+    Convierte una columna de bits del índice en un arreglo booleano.
+    """
+    n = len(indice)
+    crudo = np.frombuffer(bits.to_bytes((n + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(crudo, bitorder="little")[:n].astype(bool)
+
+
+class MatrizAtributos:
+    """
+    Matriz (atributos × personajes) con +1 = "si", -1 = "no", 0 = desconocido.
+    Ocupa un byte por celda y se construye una sola vez por índice.
+    """
+
+    def __init__(self, indice):
+        self.atributos = sorted(indice.atributos())
+        self.fila = {a: i for i, a in enumerate(self.atributos)}
+        self.valores = np.zeros((len(self.atributos), len(indice)), dtype=np.int8)
+        for i, a in enumerate(self.atributos):
+            self.valores[i, columna_numpy(indice, indice.si.get(a, 0))] = 1
+            self.valores[i, columna_numpy(indice, indice.no.get(a, 0))] = -1
+
+
+_matrices = weakref.WeakKeyDictionary()
+
+
+def matriz_de(indice):
+    """
+    Matriz del índice; los índices no cambian, así que se guarda en caché.
+    """
+    matriz = _matrices.get(indice)
+    if matriz is None:
+        matriz = _matrices[indice] = MatrizAtributos(indice)
+    return matriz
+
+
+def entropia(p):
+    """
+    Entropía binaria en bits, elemento a elemento.
+    """
+    p = np.clip(p, 1e-12, 1 - 1e-12)
+    return -(p * np.log2(p) + (1 - p) * np.log2(1 - p))
+
+
+# ==============================
+# Sesión bayesiana
+# ==============================
+class SesionBayesiana:
+    """
+    Misma interfaz que Sesion (start / answer / current_question / result)
+    pero con puntuación probabilística que tolera respuestas equivocadas.
+    Además de "si" y "no" acepta "no_se", "probablemente_si" y "probablemente_no".
+    """
+
+    __slots__ = ("motor", "indice", "matriz", "log_p", "respuestas", "pregunta",
+                 "historial", "tasa_error", "tasa_error_dudosa", "umbral")
+
+    def __init__(self, motor, tasa_error=TASA_ERROR, tasa_error_dudosa=TASA_ERROR_DUDOSA,
+                 umbral=UMBRAL):
+        self.motor = motor
+        self.tasa_error = tasa_error
+        self.tasa_error_dudosa = tasa_error_dudosa
+        self.umbral = umbral
+        self.start()
+
+    def start(self):
+        self.indice = self.motor.indice
+        self.matriz = matriz_de(self.indice)
+        if self.motor.priores is None or not len(self.indice):
+            self.log_p = np.full(len(self.indice), -math.log(max(len(self.indice), 1)))
+        else:
+            # Los personajes más elegidos empiezan más probables
+            pesos = np.array(self.motor.priores.lista(self.indice))
+            self.log_p = np.log(pesos / pesos.sum())
+        self.respuestas = {}
+        self.historial = None
+        self._siguiente_pregunta()
+
+    @property
+    def grupo(self):
+        """
+        Grupo de los personajes con probabilidad apreciable, o None si son de varios.
+        """
+        if not len(self.indice):
+            return None
+        probables = [nombre for nombre, p in self.probabilidades(len(self.indice)) if p >= 0.01]
+        return self.indice.grupo_de(self.indice.mascara_de(probables))
+
+    def current_question(self):
+        return self.pregunta
+
+    def answer(self, respuesta):
+        if self.pregunta is None:
+            return
+        atributo = self.pregunta
+        # log_p nunca se modifica en su lugar, así que apilarlo no lo copia
+        self.historial = ((self.log_p, atributo), self.historial)
+        self.respuestas[atributo] = respuesta
+        if respuesta != NO_SE:
+            with metricas.paso("bayes.actualizar", personajes=len(self.indice)):
+                self._actualizar(atributo, respuesta)
+        with metricas.paso("bayes.siguiente_pregunta", atributos=len(self.matriz.atributos)):
+            self._siguiente_pregunta()
+
+    def result(self):
+        if self.pregunta is not None:
+            return Resultado(PREGUNTANDO, [])
+        if not len(self.indice):
+            return Resultado(SIN_CANDIDATOS, [])
+        probables = self.probabilidades()
+        if probables[0][1] >= self.umbral or len(probables) == 1:
+            return Resultado(ADIVINADO, [probables[0][0]])
+        return Resultado(DUDOSO, [nombre for nombre, p in probables if p >= 0.01])
+
+    def probabilidades(self, limite=10):
+        """
+        Los personajes más probables con su probabilidad, de mayor a menor.
+        """
+        p = self._posterior()
+        orden = np.argsort(-p)[:limite]
+        return [(self.indice.nombres[i], float(p[i])) for i in orden]
+
+    def deshacer(self):
+        if self.historial is None:
+            return False
+        (self.log_p, self.pregunta), self.historial = self.historial
+        self.respuestas.pop(self.pregunta, None)
+        return True
+
+    def puede_deshacer(self):
+        return self.historial is not None
+
+    def preguntas_hechas(self):
+        return contar_preguntas(self.historial)
+
+    def copiar(self):
+        return copiar_campos(self)
+
+    def probables(self, limite):
+        """
+        Nombres de los `limite` personajes más probables.
+        """
+        if not len(self.indice):
+            return []
+        return [nombre for nombre, _ in self.probabilidades(limite)]
+
+    # ------------------------------
+    # Cálculos internos
+    # ------------------------------
+    def _posterior(self):
+        p = np.exp(self.log_p - self.log_p.max())
+        return p / p.sum()
+
+    def _actualizar(self, atributo, respuesta):
+        fila = self.matriz.fila.get(atributo)
+        if fila is None:
+            return
+        dudosa = respuesta in (PROBABLEMENTE_SI, PROBABLEMENTE_NO)
+        error = self.tasa_error_dudosa if dudosa else self.tasa_error
+        signo = 1 if respuesta in ("si", PROBABLEMENTE_SI) else -1
+        valores = self.matriz.valores[fila]
+        # Coincide: 1 - error; contradice: error; desconocido: 1/2
+        delta = np.where(valores == signo, math.log(1 - error),
+                         np.where(valores == -signo, math.log(error), math.log(0.5)))
+        self.log_p = self.log_p + delta
+
+    def _siguiente_pregunta(self):
+        self.pregunta = None
+        if not len(self.indice):
+            return
+        p = self._posterior()
+        if p.max() >= self.umbral:
+            return
+        activos = p >= PROBABILIDAD_MINIMA
+        p = p[activos] / p[activos].sum()
+        valores = self.matriz.valores[:, activos]
+
+        # Información mutua entre la respuesta y el personaje para cada atributo
+        e = self.tasa_error
+        masa_si = (valores == 1) @ p
+        masa_no = (valores == -1) @ p
+        masa_desconocida = 1 - masa_si - masa_no
+        p_si = masa_si * (1 - e) + masa_no * e + masa_desconocida * 0.5
+        ruido = (masa_si + masa_no) * entropia(np.array(e)) + masa_desconocida
+        ganancia = entropia(p_si) - ruido
+
+        for i in np.argsort(-ganancia, kind="stable"):
+            atributo = self.matriz.atributos[i]
+            if ganancia[i] <= 1e-9:
+                return
+            if atributo in self.respuestas:
+                continue
+            self.pregunta = atributo
+            return
@@ -0,0 +1,250 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from .almacen import abrir_almacen, escribir_json_atomico
+from .indice import filtrar_personajes
+from .motor import AkinatorEngine, cargar_datos
+from .seleccion import crear_estrategia
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# =======================================================
+# 🧠 BENCHMARK DE ESCALABILIDAD
+# -------------------------------------------------------
+# Genera catálogos sintéticos del tamaño que se pida y
+# mide los caminos calientes del juego:
+#   - cargar_datos (importando el JSON y ya importado),
+#   - filtrar_personajes por respuesta,
+#   - atributos_utiles por pregunta,
+#   - guardar un personaje aprendido (y reescribir el JSON
+#     completo, como se hacía antes).
+# También mide el pico de memoria y escribe los resultados
+# en JSON para comparar una versión con otra:
+#   python -m motor_akinator.benchmark --personajes 10000 --atributos 200
+# =======================================================
+
+
+# ==============================
+# Catálogos sintéticos
+# ==============================
+def generar_catalogo(personajes, atributos, correlacion=0.5, dispersion=0.0,
+                     arquetipos=8, grupos=("humanos", "demonios"), semilla=0):
+    """
+    Catálogo {grupo: {nombre: {atributo: "si"/"no"}}} aleatorio.
+    Cada personaje sigue a uno de `arquetipos` perfiles: con probabilidad
+    `correlacion` copia el valor del perfil y si no lo sortea. Con
+    probabilidad `dispersion` un atributo queda desconocido (no se guarda).
+    """
+    azar = random.Random(semilla)
+    nombres_atributos = [f"atributo_{k:04d}" for k in range(atributos)]
+    perfiles = [[azar.random() < 0.5 for _ in range(atributos)] for _ in range(arquetipos)]
+    data = {grupo: {} for grupo in grupos}
+    for i in range(personajes):
+        perfil = perfiles[azar.randrange(arquetipos)]
+        ficha = {}
+        for k, a in enumerate(nombres_atributos):
+            if dispersion and azar.random() < dispersion:
+                continue
+            valor = perfil[k] if azar.random() < correlacion else azar.random() < 0.5
+            ficha[a] = "si" if valor else "no"
+        data[grupos[i % len(grupos)]][f"personaje_{i:06d}"] = ficha
+    return data
+
+
+# ==============================
+# Medición
+# ==============================
+def resumen(tiempos):
+    """
+    Estadísticas en milisegundos de una lista de tiempos en segundos.
+    """
+    if not tiempos:
+        return {"veces": 0}
+    ordenados = sorted(tiempos)
+    return {"veces": len(ordenados),
+            "media_ms": 1000 * sum(ordenados) / len(ordenados),
+            "p50_ms": 1000 * ordenados[len(ordenados) // 2],
+            "p95_ms": 1000 * ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))],
+            "max_ms": 1000 * ordenados[-1]}
+
+
+def cronometrar(funcion, *args):
+    inicio = time.perf_counter()
+    valor = funcion(*args)
+    return valor, time.perf_counter() - inicio
+
+
+def pico_memoria(funcion, *args):
+    """
+    Pico de memoria (MB) que reserva Python mientras corre la función.
+    """
+    tracemalloc.start()
+    try:
+        funcion(*args)
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def medir_partidas(motor, data, partidas, semilla=0):
+    """
+    Juega `partidas` partidas con personajes al azar y mide cada
+    llamada a filtrar_personajes y a atributos_utiles.
+    """
+    azar = random.Random(semilla)
+    estrategia = motor.estrategia
+    filtrar, utiles, preguntas = [], [], []
+    jugadores = [(g, n) for g, personajes in data.items() for n in personajes]
+    for grupo, nombre in azar.sample(jugadores, min(partidas, len(jugadores))):
+        ficha = data[grupo][nombre]
+        candidatos = motor.vista()
+        ficha = {**ficha, **motor.atributos_grupo(grupo)}
+        respuestas = {}
+        while len(candidatos) > 1:
+            lista, t = cronometrar(candidatos.indice.atributos_utiles,
+                                   candidatos.mascara, respuestas)
+            utiles.append(t)
+            atributo = estrategia.elegir(candidatos, lista)
+            if atributo is None:
+                break
+            respuestas[atributo] = ficha.get(atributo) or azar.choice(("si", "no"))
+            candidatos, t = cronometrar(filtrar_personajes, candidatos,
+                                        {atributo: respuestas[atributo]})
+            filtrar.append(t)
+        preguntas.append(len(respuestas))
+    return {"filtrar_personajes": resumen(filtrar),
+            "atributos_utiles": resumen(utiles),
+            "preguntas_por_partida": sum(preguntas) / max(len(preguntas), 1)}
+
+
+def correr(personajes, atributos, correlacion=0.5, dispersion=0.0, partidas=50,
+           guardados=50, estrategia="ganancia", semilla=0, memoria=True):
+    """
+    Corre todas las mediciones sobre un catálogo sintético y devuelve
+    los resultados como diccionario.
+    """
+    resultados = {}
+    memoria_mb = {}
+    data, t = cronometrar(generar_catalogo, personajes, atributos, correlacion,
+                          dispersion, 8, ("humanos", "demonios"), semilla)
+    resultados["generar_catalogo_s"] = t
+
+    carpeta = tempfile.mkdtemp(prefix="akinator_benchmark_")
+    try:
+        archivo = os.path.join(carpeta, "personajes.json")
+        _, t = cronometrar(escribir_json_atomico, archivo, data)
+        resultados["escribir_json_s"] = t
+        resultados["tamano_json_mb"] = os.path.getsize(archivo) / 2 ** 20
+
+        # Primera carga: importa el JSON al almacén; las siguientes ya no
+        _, t = cronometrar(cargar_datos, archivo)
+        resultados["cargar_datos_importando_s"] = t
+        cargados, t = cronometrar(cargar_datos, archivo)
+        resultados["cargar_datos_s"] = t
+        with abrir_almacen(archivo) as almacen:
+            _, t = cronometrar(almacen.cargar_compacto)
+            resultados["cargar_compacto_creando_s"] = t
+            compacto, t = cronometrar(almacen.cargar_compacto)
+            resultados["cargar_compacto_s"] = t
+        motor, t = cronometrar(AkinatorEngine, cargados, crear_estrategia(estrategia))
+        resultados["crear_indices_s"] = t
+        _, t = cronometrar(AkinatorEngine, compacto, crear_estrategia(estrategia))
+        resultados["crear_indices_compacto_s"] = t
+
+        resultados.update(medir_partidas(motor, cargados, partidas, semilla))
+
+        # Guardar personajes aprendidos (una fila cada uno en el almacén)
+        tiempos = []
+        with abrir_almacen(archivo) as almacen:
+            for i in range(guardados):
+                ficha = data["humanos"][next(iter(data["humanos"]))]
+                _, t = cronometrar(almacen.guardar_personaje, "humanos", f"nuevo_{i:04d}", ficha)
+                tiempos.append(t)
+        resultados["guardar_personaje"] = resumen(tiempos)
+        # Lo que costaba antes: reescribir todo el JSON por cada personaje
+        _, t = cronometrar(escribir_json_atomico, archivo, cargados)
+        resultados["reescribir_json_s"] = t
+
+        if memoria:
+            memoria_mb["cargar_datos"] = pico_memoria(cargar_datos, archivo)
+            with abrir_almacen(archivo) as almacen:
+                memoria_mb["cargar_compacto"] = pico_memoria(almacen.cargar_compacto)
+            memoria_mb["crear_indices"] = pico_memoria(AkinatorEngine, cargados)
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    if resource is not None:
+        maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux lo da en KB y macOS en bytes
+        memoria_mb["proceso_max"] = maximo / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+
+    return {"parametros": {"personajes": personajes, "atributos": atributos,
+                           "correlacion": correlacion, "dispersion": dispersion,
+                           "partidas": partidas, "guardados": guardados,
+                           "estrategia": estrategia, "semilla": semilla},
+            "entorno": {"python": platform.python_version(),
+                        "plataforma": platform.platform()},
+            "resultados": resultados,
+            "memoria_mb": memoria_mb}
+
+
+# ==============================
+# Línea de comandos
+# ==============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m motor_akinator.benchmark",
+        description="Mide carga, filtrado, selección de preguntas y guardado "
+                    "sobre catálogos sintéticos.")
+    parser.add_argument("--personajes", type=int, nargs="+", default=[1000],
+                        help="tamaños del catálogo (hasta 100000)")
+    parser.add_argument("--atributos", type=int, default=100, help="atributos (hasta 1000)")
+    parser.add_argument("--correlacion", type=float, default=0.5,
+                        help="0 = atributos independientes, 1 = copias del arquetipo")
+    parser.add_argument("--dispersion", type=float, default=0.0,
+                        help="fracción de atributos desconocidos")
+    parser.add_argument("--partidas", type=int, default=50)
+    parser.add_argument("--guardados", type=int, default=50)
+    parser.add_argument("--estrategia", default="ganancia")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--sin-memoria", action="store_true",
+                        help="no medir el pico de memoria (tracemalloc es lento)")
+    parser.add_argument("--salida", help="archivo JSON de resultados (por defecto, stdout)")
+    args = parser.parse_args(argv)
+
+    corridas = []
+    for personajes in args.personajes:
+        corrida = correr(personajes, args.atributos, args.correlacion, args.dispersion,
+                         args.partidas, args.guardados, args.estrategia, args.semilla,
+                         memoria=not args.sin_memoria)
+        corridas.append(corrida)
+        r = corrida["resultados"]
+        print(f"{personajes} personajes × {args.atributos} atributos: "
+              f"cargar_datos {r['cargar_datos_s']:.3f} s, "
+              f"filtrar {r['filtrar_personajes'].get('media_ms', 0):.3f} ms, "
+              f"atributos_utiles {r['atributos_utiles'].get('media_ms', 0):.3f} ms, "
+              f"guardar {r['guardar_personaje'].get('media_ms', 0):.3f} ms",
+              file=sys.stderr)
+
+    texto = json.dumps(corridas, ensure_ascii=False, indent=2)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from collections.abc import Mapping, MutableMapping
+
+from .indice import IndiceAtributos
+
+# =======================================================
+# 🧠 FORMATO BINARIO COMPACTO
+# -------------------------------------------------------
+# En el JSON cada personaje repite el nombre de todos sus
+# atributos y un "si"/"no" en texto. Este formato guarda:
+#   - un diccionario de atributos con un número por atributo,
+#   - por grupo, una fila por personaje con 2 bits por
+#     atributo (0 = desconocido, 1 = "si", 2 = "no"),
+#   - por grupo, las columnas de bits que usa el índice.
+# Los nombres van una sola vez en una cabecera JSON corta.
+# El archivo se abre con mmap: al arrancar solo se leen la
+# cabecera y las columnas (que pasan tal cual al índice);
+# la fila de un personaje se decodifica cuando se consulta.
+# =======================================================
+
+
+MAGIA = b"AKB1"
+VERSION = 1
+EXTENSION = ".akb"
+
+DESCONOCIDO, SI, NO = 0, 1, 2
+CODIGOS = {"si": SI, "no": NO}
+VALORES = {SI: "si", NO: "no"}
+
+_LARGO_CABECERA = struct.Struct("<4sI")
+
+
+def ruta_binaria(archivo):
+    """
+    personajes_kimetsu.json (o .db) → personajes_kimetsu.akb
+    """
+    return os.path.splitext(archivo)[0] + EXTENSION
+
+
+# ==============================
+# Escritura
+# ==============================
+def escribir_binario(archivo, data, marca=None):
+    """
+    Escribe {grupo: {nombre: {atributo: "si"/"no"}}} en formato binario.
+    Se escribe en un temporal y se renombra, igual que el JSON.
+    """
+    # Diccionario de atributos en el orden en que aparecen
+    ids = {}
+    for personajes in data.values():
+        for atributos in personajes.values():
+            for a, v in atributos.items():
+                if v not in CODIGOS:
+                    raise ValueError(f"{a!r} = {v!r}: el formato binario solo admite 'si'/'no'")
+                ids.setdefault(a, len(ids))
+    ancho = (len(ids) + 3) // 4
+
+    grupos = []
+    cuerpo = bytearray()
+    for grupo, personajes in data.items():
+        nombres = list(personajes)
+        filas = len(cuerpo)
+        si = [0] * len(ids)
+        no = [0] * len(ids)
+        for i, atributos in enumerate(personajes.values()):
+            fila = bytearray(ancho)
+            bit = 1 << i
+            for a, v in atributos.items():
+                k = ids[a]
+                fila[k >> 2] |= CODIGOS[v] << ((k & 3) * 2)
+                if v == "si":
+                    si[k] |= bit
+                else:
+                    no[k] |= bit
+            cuerpo += fila
+        columnas = len(cuerpo)
+        bytes_columna = (len(nombres) + 7) // 8
+        for k in range(len(ids)):
+            cuerpo += si[k].to_bytes(bytes_columna, "little")
+            cuerpo += no[k].to_bytes(bytes_columna, "little")
+        grupos.append({"grupo": grupo, "personajes": nombres,
+                       "filas": filas, "columnas": columnas})
+
+    cabecera = json.dumps({"version": VERSION, "marca": marca, "atributos": list(ids),
+                           "ancho": ancho, "grupos": grupos},
+                          ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    carpeta = os.path.dirname(os.path.abspath(archivo))
+    descriptor, temporal = tempfile.mkstemp(dir=carpeta, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            f.write(_LARGO_CABECERA.pack(MAGIA, len(cabecera)))
+            f.write(cabecera)
+            f.write(cuerpo)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temporal, 0o644)
+        os.replace(temporal, archivo)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+
+
+# ==============================
+# Lectura con mmap
+# ==============================
+class ArchivoBinario:
+    """
+    Archivo binario abierto con mmap. grupos() devuelve un diccionario
+    {grupo: GrupoBinario} que se usa como los datos cargados del JSON.
+    """
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        with open(archivo, "rb") as f:
+            self.mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magia, largo = _LARGO_CABECERA.unpack_from(self.mapa, 0)
+        if magia != MAGIA:
+            self.mapa.close()
+            raise ValueError(f"{archivo} no es un archivo de personajes binario")
+        inicio = _LARGO_CABECERA.size
+        cabecera = json.loads(self.mapa[inicio:inicio + largo].decode("utf-8"))
+        if cabecera["version"] != VERSION:
+            self.mapa.close()
+            raise ValueError(f"{archivo}: versión {cabecera['version']} no soportada")
+        self.base = inicio + largo
+        self.marca = cabecera["marca"]
+        self.ancho = cabecera["ancho"]
+        self.atributos = [sys.intern(a) for a in cabecera["atributos"]]
+        self.id_atributo = {a: k for k, a in enumerate(self.atributos)}
+        self._grupos = cabecera["grupos"]
+
+    def grupos(self):
+        return {g["grupo"]: GrupoBinario(self, g) for g in self._grupos}
+
+    def cerrar(self):
+        self.mapa.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+class Personaje(Mapping):
+    """
+    Atributos de un personaje leídos de su fila en el archivo.
+    Se usa como el diccionario {atributo: "si"/"no"} del JSON; los
+    atributos desconocidos no aparecen.
+    """
+
+    __slots__ = ("archivo", "inicio")
+
+    def __init__(self, archivo, inicio):
+        self.archivo = archivo
+        self.inicio = inicio
+
+    def _codigo(self, k):
+        return self.archivo.mapa[self.inicio + (k >> 2)] >> ((k & 3) * 2) & 3
+
+    def __getitem__(self, atributo):
+        k = self.archivo.id_atributo.get(atributo)
+        codigo = DESCONOCIDO if k is None else self._codigo(k)
+        if codigo == DESCONOCIDO:
+            raise KeyError(atributo)
+        return VALORES[codigo]
+
+    def __iter__(self):
+        fila = self.archivo.mapa[self.inicio:self.inicio + self.archivo.ancho]
+        atributos = self.archivo.atributos
+        for j, byte in enumerate(fila):
+            while byte:
+                bajo = (byte & -byte).bit_length() - 1
+                yield atributos[j * 4 + bajo // 2]
+                byte &= ~(3 << (bajo & ~1))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class GrupoBinario(MutableMapping):
+    """
+    Personajes de un grupo: {nombre: Personaje}. Los personajes que se
+    aprenden después de abrir el archivo se guardan aparte en memoria.
+    """
+
+    def __init__(self, archivo, cabecera):
+        self.archivo = archivo
+        self.nombres = [sys.intern(n) for n in cabecera["personajes"]]
+        self.posicion = {n: i for i, n in enumerate(self.nombres)}
+        self.filas = archivo.base + cabecera["filas"]
+        self.columnas = archivo.base + cabecera["columnas"]
+        self.nuevos = {}
+        self.borrados = set()
+
+    def __getitem__(self, nombre):
+        if nombre in self.nuevos:
+            return self.nuevos[nombre]
+        i = self.posicion.get(nombre)
+        if i is None or nombre in self.borrados:
+            raise KeyError(nombre)
+        return self.ficha(i)
+
+    def __setitem__(self, nombre, atributos):
+        if nombre in self.posicion:
+            self.borrados.add(nombre)
+        self.nuevos[nombre] = atributos
+
+    def __delitem__(self, nombre):
+        if nombre in self.nuevos:
+            del self.nuevos[nombre]
+        elif nombre in self.posicion and nombre not in self.borrados:
+            self.borrados.add(nombre)
+        else:
+            raise KeyError(nombre)
+
+    def __iter__(self):
+        for nombre in self.nombres:
+            if nombre not in self.borrados:
+                yield nombre
+        yield from self.nuevos
+
+    def __len__(self):
+        return len(self.nombres) - len(self.borrados) + len(self.nuevos)
+
+    def __contains__(self, nombre):
+        return nombre in self.nuevos or (nombre in self.posicion and nombre not in self.borrados)
+
+    def ficha(self, i):
+        return Personaje(self.archivo, self.filas + i * self.archivo.ancho)
+
+    def indice(self, faltante=None):
+        """
+        Índice del grupo armado directamente con las columnas del archivo.
+        """
+        if self.borrados:
+            return IndiceAtributos(self, faltante)
+        n = len(self.nombres)
+        bytes_columna = (n + 7) // 8
+        mapa = self.archivo.mapa
+        si, no = {}, {}
+        inicio = self.columnas
+        for a in self.archivo.atributos:
+            columna_si = int.from_bytes(mapa[inicio:inicio + bytes_columna], "little")
+            inicio += bytes_columna
+            columna_no = int.from_bytes(mapa[inicio:inicio + bytes_columna], "little")
+            inicio += bytes_columna
+            if columna_si:
+                si[a] = columna_si
+            if columna_no:
+                no[a] = columna_no
+        fichas = [self.ficha(i) for i in range(n)]
+        indice = IndiceAtributos.desde_columnas(self.nombres, fichas, si, no, faltante)
+        for nombre, atributos in self.nuevos.items():
+            indice = indice.agregar(nombre, atributos)
+        return indice
+
+
+def abrir_binario(archivo):
+    """
+    Abre el archivo y devuelve {grupo: GrupoBinario}. El mmap queda
+    abierto mientras se usen los grupos.
+    """
+    return ArchivoBinario(archivo).grupos()
+
+
+def como_diccionarios(data):
+    """
+    Copia los grupos a diccionarios comunes (para el JSON).
+    """
+    return {grupo: {nombre: dict(atributos) for nombre, atributos in personajes.items()}
+            for grupo, personajes in data.items()}
+
+
+# ==============================
+# Línea de comandos
+# ==============================
+def main(argv=None):
+    """
+    python -m motor_akinator.binario importar personajes_kimetsu.json
+    python -m motor_akinator.binario exportar personajes_kimetsu.json
+
+    importar escribe personajes_kimetsu.akb con lo que hay en el almacén
+    (que importa el JSON la primera vez), marcado con su revisión para
+    que el juego lo use sin rehacerlo;
+    exportar vuelve a escribir el JSON a partir del .akb para editarlo.
+    """
+    from .almacen import abrir_almacen, escribir_json_atomico
+
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2 or argv[0] not in ("importar", "exportar"):
+        print(main.__doc__.strip())
+        return 2
+    orden, archivo = argv
+    if orden == "importar":
+        with abrir_almacen(archivo) as almacen:
+            # La revisión antes de leer, como en cargar_compacto
+            marca = almacen.revision()
+            escribir_binario(ruta_binaria(archivo), almacen.cargar(), marca=marca)
+    else:
+        with ArchivoBinario(ruta_binaria(archivo)) as binario:
+            escribir_json_atomico(archivo, como_diccionarios(binario.grupos()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+import queue
+import threading
+import time
+import tkinter as tk
+
+from . import metricas
+
+# =======================================================
+# 🧠 CAPTURA DE CÁMARA SIN BLOQUEAR LA INTERFAZ
+# -------------------------------------------------------
+# Un hilo productor lee cuadros de la cámara y los deja en
+# una cola de un solo lugar (si nadie recogió el anterior,
+# se descarta: siempre se muestra el cuadro más reciente).
+# Un hilo trabajador reduce el cuadro para la vista previa
+# o, cuando se pide la foto, la codifica en JPEG y la
+# guarda. Tkinter nunca espera a la cámara: la ventana
+# consulta los resultados con root.after.
+# La cámara se abre una vez y se reutiliza entre fotos; se
+# libera sola después de un rato sin usarse.
+# OpenCV y Pillow se importan en los hilos la primera vez
+# que se usa la cámara: el juego arranca sin cargarlos.
+# =======================================================
+
+
+# Fallos seguidos de cap.read() antes de dar la cámara por muerta
+FALLOS_MAXIMOS = 10
+# Segundos sin usar la cámara antes de liberarla
+ESPERA_CIERRE = 60
+# Milisegundos entre consultas de la ventana
+INTERVALO_SONDEO = 30
+
+
+class CapturaCamara:
+    """
+    Tubería productor → cola acotada → trabajador. No usa Tkinter:
+    la vista previa y los eventos se recogen con vista() y eventos().
+    """
+
+    def __init__(self, indice=0, tamano_vista=(320, 240), espera_cierre=ESPERA_CIERRE):
+        self.indice = indice
+        self.tamano_vista = tamano_vista
+        self.espera_cierre = espera_cierre
+        self._cuadros = queue.Queue(maxsize=1)
+        self._eventos = queue.Queue()
+        self._activa = threading.Event()
+        self._parar = threading.Event()
+        self._candado = threading.Lock()
+        self._vista = None
+        self._pedido = None
+        self._hilos = []
+
+    # ------------------------------
+    # Control
+    # ------------------------------
+    def empezar(self):
+        """
+        Empieza (o reanuda) la captura. Abrir la cámara ocurre en el hilo
+        productor, así que esta llamada vuelve de inmediato.
+        """
+        with self._candado:
+            self._vista = None
+        self.eventos()  # lo que haya quedado de una captura anterior
+        self._activa.set()
+        if not self._hilos:
+            self._hilos = [threading.Thread(target=self._producir, daemon=True),
+                           threading.Thread(target=self._trabajar, daemon=True)]
+            for hilo in self._hilos:
+                hilo.start()
+
+    def capturar(self, ruta, despues=None):
+        """
+        Guarda el próximo cuadro en `ruta` (JPEG). `despues` se ejecuta en
+        el hilo trabajador una vez guardada la foto (p. ej. la miniatura).
+        """
+        with self._candado:
+            self._pedido = (ruta, despues)
+
+    def pausar(self):
+        """
+        Deja de leer cuadros; la cámara queda abierta un rato para la próxima foto.
+        """
+        self._activa.clear()
+        with self._candado:
+            self._pedido = None
+
+    def cerrar(self):
+        self._parar.set()
+        self._activa.set()
+        for hilo in self._hilos:
+            hilo.join(timeout=2)
+        self._hilos = []
+
+    # ------------------------------
+    # Resultados para la interfaz
+    # ------------------------------
+    def vista(self):
+        """
+        Última vista previa (PIL.Image) o None si no hay una nueva.
+        """
+        with self._candado:
+            vista, self._vista = self._vista, None
+        return vista
+
+    def eventos(self):
+        """
+        Eventos pendientes: ("foto", ruta) o ("error", mensaje).
+        """
+        pendientes = []
+        while True:
+            try:
+                pendientes.append(self._eventos.get_nowait())
+            except queue.Empty:
+                return pendientes
+
+    # ------------------------------
+    # Hilos
+    # ------------------------------
+    def _producir(self):
+        import cv2
+
+        cap = None
+        fallos = 0
+        ultimo_uso = time.monotonic()
+        while not self._parar.is_set():
+            if not self._activa.wait(timeout=0.5):
+                if cap is not None and time.monotonic() - ultimo_uso > self.espera_cierre:
+                    cap.release()
+                    cap = None
+                continue
+            if self._parar.is_set():
+                break
+            ultimo_uso = time.monotonic()
+            if cap is None:
+                cap = cv2.VideoCapture(self.indice)
+                if not cap.isOpened():
+                    cap = None
+                    self._fallar("No se pudo abrir la cámara.")
+                    continue
+                fallos = 0
+            ret, frame = cap.read()
+            if not ret:
+                fallos += 1
+                if fallos >= FALLOS_MAXIMOS:
+                    cap.release()
+                    cap = None
+                    self._fallar("La cámara dejó de responder.")
+                else:
+                    # Espera creciente en vez de girar sin parar
+                    time.sleep(min(0.02 * 2 ** fallos, 0.5))
+                continue
+            fallos = 0
+            try:
+                self._cuadros.put_nowait(frame)
+            except queue.Full:
+                # Se descarta el cuadro viejo que nadie recogió
+                try:
+                    self._cuadros.get_nowait()
+                except queue.Empty:
+                    pass
+                self._cuadros.put_nowait(frame)
+        if cap is not None:
+            cap.release()
+
+    def _trabajar(self):
+        import cv2
+        from PIL import Image
+
+        while not self._parar.is_set():
+            try:
+                frame = self._cuadros.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            with self._candado:
+                pedido, self._pedido = self._pedido, None
+            if pedido is not None:
+                ruta, despues = pedido
+                with metricas.paso("camara.guardar_foto"):
+                    guardada = cv2.imwrite(ruta, frame)
+                if guardada:
+                    if despues is not None:
+                        despues()
+                    self._eventos.put(("foto", ruta))
+                else:
+                    self._eventos.put(("error", f"No se pudo guardar {ruta}."))
+                continue
+            vista = cv2.cvtColor(cv2.resize(frame, self.tamano_vista), cv2.COLOR_BGR2RGB)
+            with self._candado:
+                self._vista = Image.fromarray(vista)
+
+    def _fallar(self, mensaje):
+        self._activa.clear()
+        self._eventos.put(("error", mensaje))
+
+
+# ==============================
+# Ventana de Tkinter
+# ==============================
+class VentanaCamara:
+    """
+    Ventana con la vista previa y los botones Capturar / Cancelar
+    (o las teclas 's' y 'q'). Todo ocurre en el hilo de Tkinter;
+    al_terminar(ruta o None) se llama al cerrar.
+    """
+
+    def __init__(self, root, captura, titulo, ruta, despues=None, al_terminar=None):
+        self.root = root
+        self.captura = captura
+        self.ruta = ruta
+        self.despues = despues
+        self.al_terminar = al_terminar
+        self.cerrada = False
+
+        self.ventana = tk.Toplevel(root)
+        self.ventana.title(titulo)
+        self.ventana.config(bg="#1c1c1c")
+        self.ventana.protocol("WM_DELETE_WINDOW", self.cancelar)
+        self.ventana.bind("s", lambda e: self.tomar())
+        self.ventana.bind("q", lambda e: self.cancelar())
+
+        self.vista = tk.Label(self.ventana, text="Abriendo cámara...", fg="white", bg="#1c1c1c",
+                              width=40, height=12)
+        self.vista.pack(padx=10, pady=10)
+        self.boton_tomar = tk.Button(self.ventana, text="📸 Capturar (s)", command=self.tomar,
+                                     bg="#2ecc71", fg="white", font=("Arial", 11, "bold"))
+        self.boton_tomar.pack(side="left", padx=20, pady=10)
+        tk.Button(self.ventana, text="Cancelar (q)", command=self.cancelar,
+                  bg="#e74c3c", fg="white", font=("Arial", 11)).pack(side="right", padx=20, pady=10)
+
+        self.captura.empezar()
+        self.root.after(INTERVALO_SONDEO, self._sondear)
+
+    def tomar(self):
+        self.boton_tomar.config(state="disabled")
+        self.captura.capturar(self.ruta, self.despues)
+
+    def cancelar(self):
+        self._cerrar(None)
+
+    def _sondear(self):
+        if self.cerrada:
+            return
+        imagen = self.captura.vista()
+        if imagen is not None:
+            from PIL import ImageTk
+
+            self.foto_tk = ImageTk.PhotoImage(imagen)
+            self.vista.config(image=self.foto_tk, text="", width=0, height=0)
+        for tipo, dato in self.captura.eventos():
+            if tipo == "foto":
+                self._cerrar(dato)
+                return
+            self.vista.config(text=f"⚠️ {dato}", image="")
+            self.boton_tomar.config(state="disabled")
+        self.root.after(INTERVALO_SONDEO, self._sondear)
+
+    def _cerrar(self, ruta):
+        if self.cerrada:
+            return
+        self.cerrada = True
+        self.captura.pausar()
+        self.ventana.destroy()
+        if self.al_terminar is not None:
+            self.al_terminar(ruta)
@@ -0,0 +1,115 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from . import metricas
+
+# =======================================================
+# 🧠 RESPUESTA ESPECULATIVA
+# -------------------------------------------------------
+# Mientras el usuario lee la pregunta el proceso no hace
+# nada. En cuanto se muestra una pregunta, un hilo aparte
+# ya calcula cómo quedaría la partida con "si" y con "no"
+# (sobre copias de la sesión). Al responder se toma la
+# rama que corresponde y la otra se descarta, así que lo
+# que tarda el clic es buscar en un diccionario aunque
+# filtrar o elegir la pregunta sea caro.
+# =======================================================
+
+
+class Especulador:
+    """
+    Hilo trabajador compartido por todas las partidas de un motor.
+    """
+
+    def __init__(self, hilos=1):
+        self.ejecutor = ThreadPoolExecutor(hilos, thread_name_prefix="especulacion")
+
+    def envolver(self, sesion):
+        return SesionEspeculativa(self, sesion)
+
+    def calcular(self, sesion, respuesta):
+        """
+        Encarga responder `respuesta` sobre una copia de la sesión.
+        """
+        return self.ejecutor.submit(_responder, sesion.copiar(), respuesta)
+
+    def cerrar(self):
+        self.ejecutor.shutdown(wait=False, cancel_futures=True)
+
+
+def _responder(copia, respuesta):
+    with metricas.paso("especulacion.calcular"):
+        copia.answer(respuesta)
+    return copia
+
+
+class SesionEspeculativa:
+    """
+    Envuelve una sesión con la misma interfaz. `ramas` guarda, por
+    historial de respuestas, la partida ya calculada (o en cálculo).
+    """
+
+    __slots__ = ("especulador", "sesion", "historia", "ramas")
+
+    def __init__(self, especulador, sesion):
+        self.especulador = especulador
+        self.sesion = sesion
+        self.historia = ()
+        self.ramas = {}
+        self._especular()
+
+    def __getattr__(self, nombre):
+        # current_question, result, probables, respuestas, grupo...
+        return getattr(self.sesion, nombre)
+
+    def start(self):
+        self._descartar()
+        self.sesion.start()
+        self.historia = ()
+        self._especular()
+
+    def answer(self, respuesta):
+        pregunta = self.sesion.current_question()
+        if pregunta is None:
+            return
+        historia = self.historia + ((pregunta, respuesta),)
+        rama = self.ramas.pop(historia, None)
+        self._descartar()
+        siguiente = None
+        if rama is not None:
+            try:
+                # Si el hilo aún no terminó se espera: ya lleva parte del trabajo
+                siguiente = rama.result()
+            except Exception:
+                siguiente = None
+        if siguiente is None:
+            metricas.contar("especulacion.fallo")
+            self.sesion.answer(respuesta)
+        else:
+            metricas.contar("especulacion.acierto")
+            self.sesion = siguiente
+        self.historia = historia
+        self._especular()
+
+    def deshacer(self):
+        if not self.sesion.deshacer():
+            return False
+        self._descartar()
+        self.historia = self.historia[:-1]
+        self._especular()
+        return True
+
+    def copiar(self):
+        return self.sesion.copiar()
+
+    def _especular(self):
+        pregunta = self.sesion.current_question()
+        if pregunta is None:
+            return
+        for respuesta in ("si", "no"):
+            self.ramas[self.historia + ((pregunta, respuesta),)] = \
+                self.especulador.calcular(self.sesion, respuesta)
+
+    def _descartar(self):
+        for rama in self.ramas.values():
+            rama.cancel()
+        self.ramas.clear()
@@ -0,0 +1,184 @@
+import argparse
+import json
+import os
+import random
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from .motor import ADIVINADO, DUDOSO, SIN_CANDIDATOS, AkinatorEngine, Adivinanza, leer_json
+
+# =======================================================
+# 🧠 EVALUADOR POR AUTOJUEGO
+# -------------------------------------------------------
+# Juega una partida por cada personaje de la base, con un
+# jugador simulado que responde según los atributos del
+# personaje (y, si se pide, se equivoca con cierta tasa).
+# Las partidas se reparten entre varios procesos: cada uno
+# arma su propio motor una sola vez y juega un lote.
+# Sirve para comparar estrategias y modos con números:
+#   python -m motor_akinator.evaluador Akinator_KNYV2/personajes_kimetsu.json
+# =======================================================
+
+
+# Resultados posibles de una partida simulada
+ACIERTO = "acierto"
+ERROR = "error"            # adivinó otro personaje
+NO_SEGURO = "no_seguro"    # "No estoy seguro, pero podría ser..."
+SIN_RESULTADO = "sin_candidatos"
+
+# Tope de preguntas por partida (por si una sesión no termina)
+PREGUNTAS_MAXIMAS = 200
+
+
+def jugar(motor, grupo, ficha, nombre, ruido=0.0, azar=None):
+    """
+    Juega una partida respondiendo con la ficha del personaje, como si
+    se pulsaran los botones de la interfaz. Con `ruido` cada respuesta
+    se invierte con esa probabilidad. Un atributo que el personaje no
+    tiene se responde "no"; "¿Es X?" se responde según el nombre.
+    Devuelve (resultado, preguntas).
+    """
+    azar = azar or random.Random()
+    sesion = motor.nueva_sesion()
+    preguntas = 0
+    # El jugador también conoce el grupo de su personaje
+    ficha = {**ficha, **motor.atributos_grupo(grupo)}
+    while sesion.current_question() is not None and preguntas < PREGUNTAS_MAXIMAS:
+        pregunta = sesion.current_question()
+        if isinstance(pregunta, Adivinanza):
+            respuesta = "si" if pregunta.personaje == nombre else "no"
+        else:
+            respuesta = ficha.get(pregunta, "no")
+        if ruido and azar.random() < ruido:
+            respuesta = "no" if respuesta == "si" else "si"
+        sesion.answer(respuesta)
+        preguntas += 1
+    resultado = sesion.result()
+    if resultado.estado == ADIVINADO:
+        return (ACIERTO if resultado.personajes == [nombre] else ERROR), preguntas
+    if resultado.estado == DUDOSO:
+        return NO_SEGURO, preguntas
+    if resultado.estado == SIN_CANDIDATOS:
+        return SIN_RESULTADO, preguntas
+    return NO_SEGURO, preguntas
+
+
+# ==============================
+# Trabajo de cada proceso
+# ==============================
+_motor = None
+
+
+def _preparar(data, opciones):
+    global _motor
+    _motor = AkinatorEngine(data, **opciones)
+
+
+def _jugar_lote(lote, ruido, semilla):
+    partidas = []
+    for grupo, nombre, repeticion in lote:
+        # Semilla por partida: el resultado no depende de cómo se reparte el trabajo
+        azar = random.Random(f"{semilla}:{grupo}:{nombre}:{repeticion}")
+        ficha = _motor.data[grupo][nombre]
+        resultado, preguntas = jugar(_motor, grupo, ficha, nombre, ruido, azar)
+        partidas.append((grupo, nombre, resultado, preguntas))
+    return partidas
+
+
+def evaluar(data, ruido=0.0, repeticiones=1, procesos=None, semilla=0, **opciones):
+    """
+    Juega todas las partidas y devuelve el resumen por grupo.
+    `opciones` se pasan a AkinatorEngine (estrategia, modo, faltante...).
+    Con procesos=1 todo se juega en este proceso.
+    """
+    trabajos = [(grupo, nombre, r) for grupo, personajes in data.items()
+                for nombre in personajes for r in range(repeticiones)]
+    procesos = procesos or os.cpu_count() or 1
+    if procesos == 1 or len(trabajos) < 2:
+        _preparar(data, opciones)
+        partidas = _jugar_lote(trabajos, ruido, semilla)
+    else:
+        tamano = max(1, len(trabajos) // (procesos * 4))
+        lotes = [trabajos[i:i + tamano] for i in range(0, len(trabajos), tamano)]
+        partidas = []
+        with ProcessPoolExecutor(procesos, initializer=_preparar,
+                                 initargs=(data, opciones)) as pool:
+            for resultado in pool.map(_jugar_lote, lotes, [ruido] * len(lotes),
+                                      [semilla] * len(lotes)):
+                partidas.extend(resultado)
+    return resumir(partidas)
+
+
+def resumir(partidas):
+    """
+    {grupo: {partidas, preguntas_media, resultados, histograma, fallidos}}
+    """
+    grupos = {}
+    for grupo, nombre, resultado, preguntas in partidas:
+        g = grupos.setdefault(grupo, {"partidas": 0, "preguntas": 0,
+                                      "resultados": Counter(), "histograma": Counter(),
+                                      "fallidos": Counter()})
+        g["partidas"] += 1
+        g["preguntas"] += preguntas
+        g["resultados"][resultado] += 1
+        g["histograma"][preguntas] += 1
+        if resultado != ACIERTO:
+            g["fallidos"][nombre] += 1
+    for g in grupos.values():
+        g["preguntas_media"] = g.pop("preguntas") / g["partidas"]
+        g["resultados"] = dict(g["resultados"])
+        g["histograma"] = dict(sorted(g["histograma"].items()))
+        g["fallidos"] = dict(g["fallidos"].most_common())
+    return grupos
+
+
+def mostrar(resumen, salida=sys.stdout):
+    for grupo, g in resumen.items():
+        aciertos = g["resultados"].get(ACIERTO, 0)
+        print(f"{grupo}: {g['partidas']} partidas, {g['preguntas_media']:.2f} preguntas de media, "
+              f"{100 * aciertos / g['partidas']:.1f}% aciertos", file=salida)
+        print("  " + ", ".join(f"{r}: {n}" for r, n in sorted(g["resultados"].items())),
+              file=salida)
+        mayor = max(g["histograma"].values())
+        for preguntas, n in g["histograma"].items():
+            barra = "█" * max(1, round(40 * n / mayor))
+            print(f"  {preguntas:>3} preguntas | {barra} {n}", file=salida)
+
+
+# ==============================
+# Línea de comandos
+# ==============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m motor_akinator.evaluador",
+        description="Juega una partida por personaje y resume los resultados.")
+    parser.add_argument("archivo", nargs="?", default="personajes_kimetsu.json")
+    parser.add_argument("--estrategia", default="ganancia")
+    parser.add_argument("--modo", default="filtro", choices=("filtro", "bayes", "arbol"))
+    parser.add_argument("--faltante", choices=("si", "no"),
+                        help="valor de un atributo que el personaje no tiene")
+    parser.add_argument("--ruido", type=float, default=0.0,
+                        help="probabilidad de que el jugador se equivoque en cada respuesta")
+    parser.add_argument("--repeticiones", type=int, default=1,
+                        help="partidas por personaje (útil con --ruido)")
+    parser.add_argument("--procesos", type=int, help="por defecto, uno por núcleo")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--anticipar", action="store_true",
+                        help="preguntar \"¿Es X?\" antes de tiempo cuando conviene")
+    parser.add_argument("--json", action="store_true", help="resumen en JSON")
+    args = parser.parse_args(argv)
+
+    resumen = evaluar(leer_json(args.archivo), ruido=args.ruido,
+                      repeticiones=args.repeticiones, procesos=args.procesos,
+                      semilla=args.semilla, estrategia=args.estrategia,
+                      modo=args.modo, faltante=args.faltante, anticipar=args.anticipar)
+    if args.json:
+        print(json.dumps(resumen, ensure_ascii=False, indent=2))
+    else:
+        mostrar(resumen)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from . import metricas
+
+# =======================================================
+# 🧠 SERVICIO DE IMÁGENES
+# -------------------------------------------------------
+# Las fotos de la cámara se reducen una sola vez a una
+# miniatura del tamaño en que se muestran. Las miniaturas
+# ya decodificadas se guardan en una caché LRU con tamaño
+# máximo, y un hilo de fondo va precargando las de los
+# candidatos más probables mientras el usuario responde,
+# así la imagen del personaje adivinado sale al instante.
+# Pillow se importa la primera vez que hace falta una imagen.
+# =======================================================
+
+
+EXTENSIONES = (".png", ".jpg", ".jpeg")
+CARPETA_MINIATURAS = "miniaturas"
+
+
+class ServicioImagenes:
+    """
+    Busca la imagen de un personaje en varias carpetas, genera su
+    miniatura y la entrega decodificada (PIL.Image) desde la caché.
+    """
+
+    def __init__(self, carpetas, carpeta_miniaturas=CARPETA_MINIATURAS,
+                 tamano=(250, 250), capacidad=32):
+        self.carpetas = list(carpetas)
+        self.carpeta_miniaturas = carpeta_miniaturas
+        self.tamano = tamano
+        self.capacidad = capacidad
+        self._cache = OrderedDict()
+        self._candado = threading.Lock()
+        self._pedido = threading.Condition()
+        self._por_cargar = []
+        self._hilo = None
+
+    # ------------------------------
+    # Archivos
+    # ------------------------------
+    def buscar_original(self, nombre):
+        """
+        Ruta de la foto original del personaje (.png, .jpg o .jpeg), o None.
+        """
+        for carpeta in self.carpetas:
+            for extension in EXTENSIONES:
+                ruta = os.path.join(carpeta, nombre + extension)
+                if os.path.exists(ruta):
+                    return ruta
+        return None
+
+    def ruta_miniatura(self, nombre):
+        ancho, alto = self.tamano
+        return os.path.join(self.carpeta_miniaturas, f"{ancho}x{alto}", nombre + ".png")
+
+    def generar_miniatura(self, nombre):
+        """
+        Crea (o renueva, si la foto cambió) la miniatura del personaje.
+        Devuelve su ruta, o None si no hay foto.
+        """
+        original = self.buscar_original(nombre)
+        if original is None:
+            return None
+        miniatura = self.ruta_miniatura(nombre)
+        if (os.path.exists(miniatura)
+                and os.path.getmtime(miniatura) >= os.path.getmtime(original)):
+            return miniatura
+        from PIL import Image
+
+        os.makedirs(os.path.dirname(miniatura), exist_ok=True)
+        # Se escribe aparte y se renombra: el hilo de fondo puede estar leyendo
+        temporal = f"{miniatura}.{threading.get_ident()}.tmp"
+        with metricas.paso("imagen.miniatura"), Image.open(original) as img:
+            img.draft("RGB", self.tamano)  # los JPEG se decodifican ya reducidos
+            img.resize(self.tamano).save(temporal, format="PNG")
+        os.replace(temporal, miniatura)
+        self.olvidar(nombre)
+        return miniatura
+
+    def generar_todas(self):
+        """
+        Genera las miniaturas de todas las fotos de las carpetas.
+        """
+        nombres = set()
+        for carpeta in self.carpetas:
+            if not os.path.isdir(carpeta):
+                continue
+            for archivo in os.listdir(carpeta):
+                nombre, extension = os.path.splitext(archivo)
+                if extension.lower() in EXTENSIONES:
+                    nombres.add(nombre)
+        return [n for n in sorted(nombres) if self.generar_miniatura(n)]
+
+    # ------------------------------
+    # Caché LRU
+    # ------------------------------
+    def obtener(self, nombre):
+        """
+        Miniatura decodificada del personaje, o None si no tiene foto.
+        """
+        with self._candado:
+            if nombre in self._cache:
+                self._cache.move_to_end(nombre)
+                metricas.contar("imagen.cache_acierto")
+                return self._cache[nombre]
+        metricas.contar("imagen.cache_fallo")
+        ruta = self.generar_miniatura(nombre)
+        if ruta is None:
+            return None
+        from PIL import Image
+
+        with metricas.paso("imagen.decodificar"), Image.open(ruta) as img:
+            img.load()
+            imagen = img.copy()
+        with self._candado:
+            self._cache[nombre] = imagen
+            self._cache.move_to_end(nombre)
+            while len(self._cache) > self.capacidad:
+                self._cache.popitem(last=False)
+        return imagen
+
+    def olvidar(self, nombre):
+        with self._candado:
+            self._cache.pop(nombre, None)
+
+    # ------------------------------
+    # Precarga en segundo plano
+    # ------------------------------
+    def precargar(self, nombres):
+        """
+        Pide al hilo de fondo que decodifique estas miniaturas.
+        Un pedido nuevo reemplaza al anterior si aún no terminó.
+        """
+        with self._pedido:
+            self._por_cargar = list(nombres)[:self.capacidad]
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._trabajar, daemon=True)
+                self._hilo.start()
+            self._pedido.notify()
+
+    def _trabajar(self):
+        while True:
+            with self._pedido:
+                while not self._por_cargar:
+                    self._pedido.wait()
+                nombre = self._por_cargar.pop(0)
+            try:
+                self.obtener(nombre)
+            except OSError:
+                pass  # foto dañada: se mostrará sin imagen
+
+
+def main(argv=None):
+    """
+    Genera las miniaturas de antemano:
+        python -m motor_akinator.imagenes imagenes_personajes imagenes
+    """
+    carpetas = (sys.argv[1:] if argv is None else argv) or ["imagenes_personajes", "imagenes"]
+    servicio = ServicioImagenes(carpetas)
+    for nombre in servicio.generar_todas():
+        print(servicio.ruta_miniatura(nombre))
+
+
+if __name__ == "__main__":
+    main()
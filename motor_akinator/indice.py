@@ -0,0 +1,395 @@
+from collections.abc import Mapping
+
+# =======================================================
+# 🧠 ÍNDICE DE ATRIBUTOS POR COLUMNAS
+# -------------------------------------------------------
+# Compila un grupo de personajes en columnas de bits: por
+# cada atributo hay un entero cuyo bit i vale 1 si el
+# personaje i tiene ese atributo en "si", y otro para "no".
+# Un conjunto de candidatos es una máscara de bits, filtrar
+# es un AND y contar una división es un popcount.
+# =======================================================
+
+
+if hasattr(int, "bit_count"):
+    contar_bits = int.bit_count
+else:  # Python < 3.10
+    def contar_bits(mascara):
+        return bin(mascara).count("1")
+
+
+def posiciones_bits(mascara):
+    """
+    Recorre las posiciones de los bits encendidos, de menor a mayor.
+    """
+    while mascara:
+        bajo = mascara & -mascara
+        yield bajo.bit_length() - 1
+        mascara ^= bajo
+
+
+# ==============================
+# Índice compilado
+# ==============================
+class IndiceAtributos:
+    """
+    Índice de solo lectura sobre un grupo de personajes
+    ({nombre: {atributo: "si"/"no"}}).
+    Un atributo que el personaje no tiene cuenta como desconocido,
+    salvo que se indique faltante="si"/"no" para darle ese valor.
+
+    Un índice de varios grupos (ver unir) guarda la máscara de cada
+    grupo. Un atributo que nadie de un grupo tiene en "si" no aplica a
+    ese grupo, y sus personajes que no lo tienen cuentan como "no"
+    (la parte rellenada de cada columna "no" queda en relleno).
+    """
+
+    def __init__(self, personajes, faltante=None):
+        self.nombres = []
+        self.posicion = {}
+        self.fichas = []
+        self.si = {}
+        self.no = {}
+        self.faltante = faltante
+        self.grupos = {}
+        self.relleno = {}
+        for nombre, atributos in personajes.items():
+            self._anotar(nombre, atributos)
+        self._completar()
+
+    @classmethod
+    def desde_columnas(cls, nombres, fichas, si, no, faltante=None):
+        """
+        Índice armado con columnas ya calculadas (p. ej. leídas del
+        formato binario), sin recorrer los atributos de cada personaje.
+        """
+        indice = cls({}, faltante)
+        indice.nombres = list(nombres)
+        indice.posicion = {n: i for i, n in enumerate(indice.nombres)}
+        indice.fichas = list(fichas)
+        indice.si = dict(si)
+        indice.no = dict(no)
+        indice._completar()
+        return indice
+
+    @classmethod
+    def unir(cls, indices, atributos_grupo=None, faltante=None):
+        """
+        Un solo índice con los personajes de varios grupos
+        ({grupo: IndiceAtributos}), uno detrás de otro.
+        atributos_grupo ({grupo: {atributo: valor}}) son los atributos que
+        tienen todos los personajes del grupo, como "Es un demonio".
+        Si un nombre se repite en dos grupos quedan dos personajes, y
+        posicion apunta al primero.
+        """
+        atributos_grupo = atributos_grupo or {}
+        unido = cls({}, faltante)
+        for grupo, indice in indices.items():
+            desplazamiento = len(unido.nombres)
+            for nombre in indice.nombres:
+                unido.posicion.setdefault(nombre, len(unido.nombres))
+                unido.nombres.append(nombre)
+            unido.fichas.extend(indice.fichas)
+            for propias, columnas in ((unido.si, indice.si), (unido.no, indice.no)):
+                for a, columna in columnas.items():
+                    propias[a] = propias.get(a, 0) | columna << desplazamiento
+            mascara = ((1 << len(indice)) - 1) << desplazamiento
+            unido.grupos[grupo] = mascara
+            for a, v in atributos_grupo.get(grupo, {}).items():
+                columnas = unido.si if v == "si" else unido.no
+                columnas[a] = columnas.get(a, 0) | mascara
+        unido._completar()
+        return unido
+
+    def _completar(self):
+        self.todos = (1 << len(self.nombres)) - 1
+        self._rellenar_grupos()
+        if self.faltante is None:
+            return
+        # Los personajes sin el atributo toman el valor por defecto
+        columnas, contrarias = (self.si, self.no) if self.faltante == "si" else (self.no, self.si)
+        for a in self.atributos():
+            columnas[a] = self.todos & ~contrarias.get(a, 0)
+
+    def _rellenar_grupos(self):
+        if len(self.grupos) < 2:
+            return
+        for a in self.atributos():
+            si = self.si.get(a, 0)
+            anterior = self.relleno.get(a, 0)
+            propios = self.no.get(a, 0) & ~anterior
+            relleno = 0
+            for mascara in self.grupos.values():
+                if not si & mascara:
+                    relleno |= mascara & ~propios
+            if relleno != anterior:
+                self.no[a] = propios | relleno
+                if relleno:
+                    self.relleno[a] = relleno
+                else:
+                    del self.relleno[a]
+
+    def _anotar(self, nombre, atributos):
+        bit = 1 << len(self.nombres)
+        self.posicion[nombre] = len(self.nombres)
+        self.nombres.append(nombre)
+        self.fichas.append(atributos)
+        for a, v in atributos.items():
+            if v == "si":
+                self.si[a] = self.si.get(a, 0) | bit
+            elif v == "no":
+                self.no[a] = self.no.get(a, 0) | bit
+
+    def agregar(self, nombre, atributos, grupo=None):
+        """
+        Devuelve un índice nuevo con el personaje añadido al final
+        (en `grupo`, si el índice tiene grupos).
+        El índice original no cambia, así que las máscaras de las
+        partidas en curso siguen siendo válidas.
+        """
+        if nombre in self.posicion:
+            raise ValueError(f"El personaje {nombre!r} ya está en el índice")
+        return self.actualizar([(nombre, atributos, grupo)])
+
+    def actualizar(self, agregados=(), cambiados=()):
+        """
+        Devuelve un índice nuevo con los personajes agregados
+        ([(nombre, atributos, grupo)]) al final y los cambiados
+        ([(posicion, atributos)]) con sus atributos nuevos, completándolo
+        una sola vez para todos. Como en agregar, el original no cambia.
+        Un nombre agregado que ya existe en otro grupo queda dos veces
+        (como en unir).
+        """
+        nuevo = IndiceAtributos({}, self.faltante)
+        nuevo.nombres = list(self.nombres)
+        nuevo.posicion = dict(self.posicion)
+        nuevo.fichas = list(self.fichas)
+        nuevo.si = dict(self.si)
+        nuevo.no = dict(self.no)
+        nuevo.grupos = dict(self.grupos)
+        nuevo.relleno = dict(self.relleno)
+        for posicion, atributos in cambiados:
+            # Se borra el personaje de todas las columnas y se vuelve a anotar
+            bit = 1 << posicion
+            for columnas in (nuevo.si, nuevo.no, nuevo.relleno):
+                for a, columna in columnas.items():
+                    if columna & bit:
+                        columnas[a] = columna & ~bit
+            nuevo.fichas[posicion] = atributos
+            for a, v in atributos.items():
+                if v == "si":
+                    nuevo.si[a] = nuevo.si.get(a, 0) | bit
+                elif v == "no":
+                    nuevo.no[a] = nuevo.no.get(a, 0) | bit
+        for nombre, atributos, grupo in agregados:
+            if grupo is not None:
+                nuevo.grupos[grupo] = nuevo.grupos.get(grupo, 0) | 1 << len(nuevo.nombres)
+            posicion = nuevo.posicion.get(nombre)
+            nuevo._anotar(nombre, atributos)
+            if posicion is not None:
+                nuevo.posicion[nombre] = posicion
+        nuevo._completar()
+        return nuevo
+
+    def buscar(self, nombre, grupo=None):
+        """
+        Posición del personaje (del grupo indicado, si un nombre se
+        repite en varios), o None si no está.
+        """
+        posicion = self.posicion.get(nombre)
+        if posicion is None or grupo is None or not self.grupos:
+            return posicion
+        mascara = self.grupos.get(grupo, 0)
+        if mascara >> posicion & 1:
+            return posicion
+        for posicion in posiciones_bits(mascara):
+            if self.nombres[posicion] == nombre:
+                return posicion
+        return None
+
+    def __len__(self):
+        return len(self.nombres)
+
+    # ------------------------------
+    # Consultas sobre máscaras
+    # ------------------------------
+    def atributos(self):
+        """
+        Todos los atributos que aparecen en el grupo.
+        """
+        return set(self.si) | set(self.no)
+
+    def mascara_de(self, nombres):
+        """
+        Máscara con los personajes indicados.
+        """
+        mascara = 0
+        for nombre in nombres:
+            mascara |= 1 << self.posicion[nombre]
+        return mascara
+
+    def grupo_de(self, mascara):
+        """
+        El grupo al que pertenecen todos los personajes de la máscara,
+        o None si son de varios (o no hay ninguno).
+        """
+        for grupo, columna in self.grupos.items():
+            if mascara and not mascara & ~columna:
+                return grupo
+        return None
+
+    def aplica(self, atributo, mascara):
+        """
+        Si el atributo tiene sentido para algún grupo presente en la
+        máscara (alguien de ese grupo lo tiene en "si").
+        """
+        si = self.si.get(atributo, 0)
+        if not self.grupos:
+            return bool(si)
+        return any(si & columna for columna in self.grupos.values() if mascara & columna)
+
+    def nombres_de(self, mascara):
+        """
+        Nombres de los personajes de la máscara, en orden de carga.
+        """
+        return [self.nombres[i] for i in posiciones_bits(mascara)]
+
+    def filtrar(self, mascara, atributo, respuesta, estricto=False):
+        """
+        Aplica una respuesta a la máscara.
+        Por defecto un personaje sin el atributo sigue siendo candidato;
+        con estricto=True solo quedan los que tienen exactamente ese valor.
+        """
+        if estricto:
+            columna = self.si if respuesta == "si" else self.no
+            return mascara & columna.get(atributo, 0)
+        contraria = self.no if respuesta == "si" else self.si
+        return mascara & ~contraria.get(atributo, 0)
+
+    def filtrar_respuestas(self, mascara, respuestas, estricto=False):
+        """
+        Aplica todas las respuestas ({atributo: "si"/"no"}) a la máscara.
+        """
+        for atributo, respuesta in respuestas.items():
+            mascara = self.filtrar(mascara, atributo, respuesta, estricto)
+        return mascara
+
+    def contar(self, mascara, atributo):
+        """
+        Cuántos personajes de la máscara tienen el atributo en "si",
+        en "no" y cuántos no lo tienen.
+        """
+        si = contar_bits(mascara & self.si.get(atributo, 0))
+        no = contar_bits(mascara & self.no.get(atributo, 0))
+        return si, no, contar_bits(mascara) - si - no
+
+    def atributos_utiles(self, mascara, respuestas):
+        """
+        Atributos sin responder que tienen al menos un "si" y un "no"
+        entre los personajes de la máscara.
+        """
+        return sorted(a for a, columna in self.si.items()
+                      if a not in respuestas
+                      and mascara & columna
+                      and mascara & self.no.get(a, 0))
+
+    def vista(self, mascara=None):
+        """
+        Candidatos de la máscara vistos como un diccionario de solo lectura.
+        """
+        return Candidatos(self, self.todos if mascara is None else mascara)
+
+
+# ==============================
+# Vista de candidatos
+# ==============================
+class Candidatos(Mapping):
+    """
+    Diccionario de solo lectura {nombre: atributos} respaldado por
+    un índice y una máscara. Se usa donde antes había una copia del
+    diccionario de personajes, sin copiar nada.
+    """
+
+    __slots__ = ("indice", "mascara", "_total")
+
+    def __init__(self, indice, mascara):
+        self.indice = indice
+        self.mascara = mascara
+        self._total = None
+
+    def __len__(self):
+        if self._total is None:
+            self._total = contar_bits(self.mascara)
+        return self._total
+
+    def __iter__(self):
+        nombres = self.indice.nombres
+        return (nombres[i] for i in posiciones_bits(self.mascara))
+
+    def __getitem__(self, nombre):
+        i = self.indice.posicion[nombre]
+        if not self.mascara >> i & 1:
+            raise KeyError(nombre)
+        return self.indice.fichas[i]
+
+    def __contains__(self, nombre):
+        i = self.indice.posicion.get(nombre)
+        return i is not None and bool(self.mascara >> i & 1)
+
+    def contar(self, atributo):
+        return self.indice.contar(self.mascara, atributo)
+
+    def filtrar(self, atributo, respuesta, estricto=False):
+        mascara = self.indice.filtrar(self.mascara, atributo, respuesta, estricto)
+        return Candidatos(self.indice, mascara)
+
+
+def compilar(personajes, faltante=None):
+    """
+    Índice de un grupo. Si el grupo ya sabe armar su índice (como los
+    grupos del formato binario) se usa ese, que no recorre cada personaje.
+    """
+    if hasattr(personajes, "indice"):
+        return personajes.indice(faltante)
+    return IndiceAtributos(personajes, faltante)
+
+
+def como_candidatos(candidatos):
+    """
+    Devuelve los candidatos como vista sobre un índice. Si ya lo son
+    no se compila nada; si es un diccionario se compila en el momento.
+    """
+    if isinstance(candidatos, Candidatos):
+        return candidatos
+    return IndiceAtributos(candidatos).vista()
+
+
+# ==============================
+# Funciones con la firma original
+# ==============================
+def filtrar_personajes(candidatos, respuestas, estricto=False):
+    """
+    Filtra los personajes que coinciden con las respuestas dadas.
+    """
+    vista = como_candidatos(candidatos)
+    mascara = vista.indice.filtrar_respuestas(vista.mascara, respuestas, estricto)
+    return Candidatos(vista.indice, mascara)
+
+
+def atributos_utiles(candidatos, respuestas):
+    """
+    Atributos sin preguntar que todavía distinguen a los candidatos.
+    """
+    vista = como_candidatos(candidatos)
+    return vista.indice.atributos_utiles(vista.mascara, respuestas)
+
+
+def get_all_attributes(candidatos):
+    """
+    Devuelve todos los atributos posibles dentro del grupo de personajes.
+    """
+    if isinstance(candidatos, Candidatos):
+        indice, mascara = candidatos.indice, candidatos.mascara
+        return {a for columnas in (indice.si, indice.no)
+                for a, columna in columnas.items() if mascara & columna}
+    return IndiceAtributos(candidatos).atributos()
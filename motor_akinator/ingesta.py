@@ -0,0 +1,261 @@
+import argparse
+import csv
+import hashlib
+import json
+import sys
+import time
+from collections import Counter
+
+from .almacen import abrir_almacen
+from .motor import normalizar_respuesta
+
+# =======================================================
+# 🧠 CARGA MASIVA DE PERSONAJES (CSV / JSONL)
+# -------------------------------------------------------
+# Para sembrar un catálogo de miles de personajes sin pasar
+# por el diálogo de aprender uno a uno:
+#   python -m motor_akinator.ingesta personajes_kimetsu.json nuevos.csv --grupo humanos
+# CSV:   columnas nombre, grupo (opcional) y una por atributo;
+#        una celda vacía es un atributo desconocido.
+# JSONL: {"nombre": ..., "grupo": ..., "atributos": {...}}
+#        (o los atributos sueltos junto al nombre).
+# Las filas se leen de a una (memoria constante respecto
+# al archivo), se validan, se descartan los repetidos
+# por nombre o por atributos y los atributos de las que
+# se guardan se unen al esquema existente. Todo entra en
+# una sola transacción: o se guardan todas las filas
+# válidas o ninguna.
+# =======================================================
+
+
+# Columnas que no son atributos
+NOMBRE = "nombre"
+GRUPO = "grupo"
+ATRIBUTOS = "atributos"
+
+
+def clave_atributo(nombre):
+    """
+    Forma canónica de un atributo para unirlo al esquema:
+    "Es Pilar", "es_pilar" y " es pilar " son el mismo.
+    """
+    return "_".join(nombre.strip().lower().replace("_", " ").split())
+
+
+def huella_vector(grupo, atributos):
+    """
+    Resumen de los atributos de un personaje (para detectar repetidos
+    sin guardar los atributos completos).
+    """
+    contenido = json.dumps([grupo, sorted(atributos.items())], ensure_ascii=False)
+    return hashlib.blake2b(contenido.encode("utf-8"), digest_size=16).digest()
+
+
+# ==============================
+# Lectura de filas
+# ==============================
+def leer_csv(archivo):
+    lector = csv.DictReader(archivo)
+    for numero, fila in enumerate(lector, 2):
+        nombre = fila.pop(NOMBRE, None)
+        grupo = fila.pop(GRUPO, None)
+        # Celda vacía = desconocido
+        atributos = {a: v for a, v in fila.items() if a is not None and v not in (None, "")}
+        yield numero, nombre, grupo, atributos
+
+
+def leer_jsonl(archivo):
+    for numero, linea in enumerate(archivo, 1):
+        if not linea.strip():
+            continue
+        try:
+            fila = json.loads(linea)
+        except ValueError as e:
+            yield numero, None, None, f"JSON mal formado: {e}"
+            continue
+        if not isinstance(fila, dict):
+            yield numero, None, None, "la línea no es un objeto JSON"
+            continue
+        nombre = fila.pop(NOMBRE, None)
+        grupo = fila.pop(GRUPO, None)
+        atributos = fila.pop(ATRIBUTOS, fila)
+        yield numero, nombre, grupo, atributos
+
+
+LECTORES = {"csv": leer_csv, "jsonl": leer_jsonl}
+
+
+def formato_de(ruta):
+    return "jsonl" if ruta.endswith((".jsonl", ".ndjson")) else "csv"
+
+
+# ==============================
+# Validación y deduplicación
+# ==============================
+class Ingesta:
+    """
+    Valida las filas contra lo que ya hay en el almacén y produce las
+    que hay que insertar. Recuerda los nombres y una huella de 16 bytes
+    por personaje, no sus atributos.
+    """
+
+    def __init__(self, almacen, grupo=None, maximo_errores=20):
+        self.grupo = grupo
+        self.maximo_errores = maximo_errores
+        self.cuentas = Counter()
+        self.errores = []
+        self.nombres = set()
+        self.huellas = set()
+        self.esquema = {}
+        # Nombre de columna tal como viene → atributo del esquema
+        self.columnas = {}
+        self.nuevos = []
+        # Valores ya vistos ("sí", "S", "n"...) → "si"/"no"
+        self.valores = {"si": "si", "no": "no"}
+        for grupo_existente, nombre, atributos in almacen.personajes():
+            self.nombres.add(nombre)
+            self.huellas.add(huella_vector(grupo_existente, atributos))
+            for a in atributos:
+                if a not in self.columnas:
+                    self.columnas[a] = self.esquema.setdefault(clave_atributo(a), a)
+
+    def error(self, numero, mensaje):
+        self.cuentas["invalidas"] += 1
+        if len(self.errores) < self.maximo_errores:
+            self.errores.append(f"fila {numero}: {mensaje}")
+
+    def filas(self, leidas):
+        """
+        Genera (grupo, nombre, atributos_json) de las filas válidas y nuevas.
+        """
+        for numero, nombre, grupo, atributos in leidas:
+            self.cuentas["leidas"] += 1
+            if isinstance(atributos, str):
+                self.error(numero, atributos)
+                continue
+            if not isinstance(nombre, str) or not nombre.strip():
+                self.error(numero, "falta el nombre")
+                continue
+            nombre = nombre.strip()
+            grupo = (grupo or self.grupo or "").strip()
+            if not grupo:
+                self.error(numero, "falta el grupo (columna 'grupo' o --grupo)")
+                continue
+            if not isinstance(atributos, dict):
+                self.error(numero, "los atributos deben ser un objeto")
+                continue
+            validados = self._validar(numero, atributos)
+            if validados is None:
+                continue
+            limpios, pendientes = validados
+            if nombre in self.nombres:
+                self.cuentas["nombre_repetido"] += 1
+                continue
+            huella = huella_vector(grupo, limpios)
+            if huella in self.huellas:
+                self.cuentas["vector_repetido"] += 1
+                continue
+            self.nombres.add(nombre)
+            self.huellas.add(huella)
+            # Las columnas nuevas entran al esquema con la primera fila que se guarda
+            for clave, columna in pendientes.items():
+                self.esquema[clave] = columna
+                self.nuevos.append(columna)
+            yield grupo, nombre, json.dumps(limpios, ensure_ascii=False)
+
+    def _validar(self, numero, atributos):
+        """
+        (atributos normalizados, {clave: columna} de las columnas que aún
+        no están en el esquema), o None si la fila no es válida.
+        """
+        limpios = {}
+        pendientes = {}
+        for atributo, valor in atributos.items():
+            columna = self.columnas.get(atributo) or self._columna(atributo, pendientes)
+            if columna is None:
+                self.error(numero, f"atributo sin nombre: {atributo!r}")
+                return None
+            respuesta = self.valores.get(valor) if isinstance(valor, str) else None
+            if respuesta is None:
+                # "no_se" y "probablemente_*" son respuestas de partida, no
+                # valores que se puedan guardar en un personaje
+                respuesta = normalizar_respuesta(valor)
+                if respuesta not in ("si", "no"):
+                    respuesta = None
+                else:
+                    self.valores[valor] = respuesta
+            if respuesta is None:
+                self.error(numero, f"{atributo}: {valor!r} no es si/no")
+                return None
+            limpios[columna] = respuesta
+        return limpios, pendientes
+
+    def _columna(self, atributo, pendientes):
+        """
+        Atributo del esquema que corresponde a una columna. Si es nueva
+        queda en `pendientes` hasta que se guarde una fila que la use.
+        """
+        if not isinstance(atributo, str) or not clave_atributo(atributo):
+            return None
+        clave = clave_atributo(atributo)
+        if clave not in self.esquema:
+            return pendientes.setdefault(clave, atributo.strip())
+        self.columnas[atributo] = self.esquema[clave]
+        return self.columnas[atributo]
+
+
+def ingerir(archivo_datos, entrada, formato="csv", grupo=None, maximo_errores=20):
+    """
+    Carga todas las filas de `entrada` (un archivo abierto) en el almacén
+    del JSON de personajes, en una sola transacción. Devuelve el resumen.
+    """
+    inicio = time.perf_counter()
+    with abrir_almacen(archivo_datos) as almacen:
+        ingesta = Ingesta(almacen, grupo, maximo_errores)
+        insertadas = almacen.insertar_filas(ingesta.filas(LECTORES[formato](entrada)))
+    segundos = time.perf_counter() - inicio
+    leidas = ingesta.cuentas["leidas"]
+    return {"leidas": leidas, "insertadas": insertadas,
+            "invalidas": ingesta.cuentas["invalidas"],
+            "nombre_repetido": ingesta.cuentas["nombre_repetido"],
+            "vector_repetido": ingesta.cuentas["vector_repetido"],
+            "atributos_nuevos": ingesta.nuevos,
+            "segundos": segundos,
+            "filas_por_segundo": leidas / segundos if segundos else 0.0,
+            "errores": ingesta.errores}
+
+
+# ==============================
+# Línea de comandos
+# ==============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m motor_akinator.ingesta",
+        description="Carga personajes en bloque desde CSV o JSONL.")
+    parser.add_argument("datos", help="JSON de personajes (se usa su almacén .db)")
+    parser.add_argument("entrada", help="archivo CSV o JSONL ('-' para stdin)")
+    parser.add_argument("--formato", choices=tuple(LECTORES),
+                        help="por defecto, según la extensión")
+    parser.add_argument("--grupo", help="grupo de las filas que no lo indican")
+    parser.add_argument("--errores", type=int, default=20, help="errores que se muestran")
+    args = parser.parse_args(argv)
+
+    formato = args.formato or formato_de(args.entrada)
+    if args.entrada == "-":
+        resumen = ingerir(args.datos, sys.stdin, formato, args.grupo, args.errores)
+    else:
+        with open(args.entrada, "r", encoding="utf-8", newline="") as entrada:
+            resumen = ingerir(args.datos, entrada, formato, args.grupo, args.errores)
+    for error in resumen["errores"]:
+        print(error, file=sys.stderr)
+    print(f"{resumen['insertadas']} de {resumen['leidas']} filas insertadas en "
+          f"{resumen['segundos']:.2f} s ({resumen['filas_por_segundo']:.0f} filas/s); "
+          f"{resumen['invalidas']} inválidas, {resumen['nombre_repetido']} con nombre repetido, "
+          f"{resumen['vector_repetido']} con atributos repetidos, "
+          f"{len(resumen['atributos_nuevos'])} atributos nuevos", file=sys.stderr)
+    print(json.dumps({k: v for k, v in resumen.items() if k != "errores"}, ensure_ascii=False))
+    return 1 if resumen["invalidas"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
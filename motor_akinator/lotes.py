@@ -0,0 +1,159 @@
+import argparse
+import json
+import sys
+from collections import OrderedDict
+
+from .motor import AkinatorEngine, leer_json, normalizar_respuesta, texto_pregunta
+
+# =======================================================
+# 🧠 MODO POR LOTES (JSONL)
+# -------------------------------------------------------
+# Juega muchas partidas sin terminal ni ventana: lee por
+# stdin un evento JSON por línea y escribe por stdout las
+# preguntas y los resultados, también uno por línea.
+#   entrada: {"sesion": "a"}                    → empieza
+#            {"sesion": "a", "respuesta": "si"} → responde
+#            {"sesion": "a", "fin": true}       → abandona
+#   salida:  {"sesion": "a", "pregunta": ..., "texto": ...}
+#            {"sesion": "a", "resultado": ..., "personajes": [...]}
+#            {"sesion": "a", "error": ...}
+# Las partidas se pueden intercalar. Todo es una cadena de
+# generadores: se procesa línea a línea y en memoria solo
+# quedan las partidas abiertas (con un tope).
+# =======================================================
+
+
+# Partidas abiertas a la vez; al pasarse se cierra la más antigua
+SESIONES_MAXIMAS = 10000
+
+
+def leer_eventos(lineas):
+    """
+    Convierte líneas JSONL en eventos. Una línea mal formada se
+    convierte en un evento de error en vez de cortar el lote.
+    """
+    for numero, linea in enumerate(lineas, 1):
+        linea = linea.strip()
+        if not linea:
+            continue
+        try:
+            evento = json.loads(linea)
+        except ValueError as e:
+            yield {"error": f"línea {numero}: {e}"}
+            continue
+        if not isinstance(evento, dict) or "sesion" not in evento:
+            yield {"error": f"línea {numero}: falta 'sesion'"}
+            continue
+        sesion = evento["sesion"]
+        # La clave indexa el diccionario de partidas: solo texto o número
+        if isinstance(sesion, bool) or not isinstance(sesion, (str, int)):
+            yield {"error": f"línea {numero}: 'sesion' debe ser texto o número"}
+            continue
+        yield evento
+
+
+def estado_sesion(clave, sesion):
+    """
+    La pregunta actual de la partida o, si terminó, su resultado.
+    """
+    pregunta = sesion.current_question()
+    if pregunta is not None:
+        return {"sesion": clave, "pregunta": pregunta, "texto": texto_pregunta(pregunta)}
+    resultado = sesion.result()
+    return {"sesion": clave, "resultado": resultado.estado, "personajes": resultado.personajes}
+
+
+def respuesta_valida(motor, texto):
+    """
+    La respuesta normalizada, o None si el modo del motor no la acepta.
+    """
+    respuesta = normalizar_respuesta(texto)
+    # "no_se" y "probablemente_*" solo tienen sentido en modo bayes
+    if respuesta is None or (motor.modo != "bayes" and respuesta not in ("si", "no")):
+        return None
+    return respuesta
+
+
+def procesar(motor, eventos, sesiones_maximas=SESIONES_MAXIMAS):
+    """
+    Aplica los eventos a sus partidas y produce una salida por evento.
+    Una partida terminada se olvida en cuanto se informa su resultado.
+    """
+    sesiones = OrderedDict()
+    for evento in eventos:
+        if "error" in evento and "sesion" not in evento:
+            yield evento
+            continue
+        clave = evento["sesion"]
+        if evento.get("fin"):
+            sesiones.pop(clave, None)
+            continue
+
+        sesion = sesiones.get(clave)
+        if "respuesta" not in evento:
+            # Empezar (o volver a empezar) la partida
+            if sesion is None:
+                sesion = motor.nueva_sesion()
+            else:
+                sesion.start()
+        elif sesion is None:
+            yield {"sesion": clave, "error": "la partida no existe o ya terminó"}
+            continue
+        else:
+            respuesta = respuesta_valida(motor, evento["respuesta"])
+            if respuesta is None:
+                yield {"sesion": clave, "error": f"respuesta no válida: {evento['respuesta']!r}"}
+                continue
+            sesion.answer(respuesta)
+
+        salida = estado_sesion(clave, sesion)
+        if sesion.current_question() is None:
+            sesiones.pop(clave, None)
+        else:
+            sesiones[clave] = sesion
+            sesiones.move_to_end(clave)
+            while len(sesiones) > sesiones_maximas:
+                vieja, _ = sesiones.popitem(last=False)
+                yield {"sesion": vieja, "error": "partida cerrada por exceso de partidas abiertas"}
+        yield salida
+
+
+def escribir_eventos(salidas, archivo, al_instante=False):
+    """
+    Escribe cada salida como una línea JSON. Con al_instante se vacía
+    el búfer en cada línea (para usarlo de forma interactiva).
+    """
+    for salida in salidas:
+        archivo.write(json.dumps(salida, ensure_ascii=False) + "\n")
+        if al_instante:
+            archivo.flush()
+    archivo.flush()
+
+
+def correr(motor, entrada=None, salida=None, al_instante=False):
+    entrada = sys.stdin if entrada is None else entrada
+    salida = sys.stdout if salida is None else salida
+    escribir_eventos(procesar(motor, leer_eventos(entrada)), salida, al_instante)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m motor_akinator.lotes",
+        description="Juega partidas leyendo eventos JSONL por stdin.")
+    parser.add_argument("archivo", help="JSON de personajes")
+    parser.add_argument("--faltante", choices=("si", "no"),
+                        help="valor de un atributo que el personaje no tiene")
+    parser.add_argument("--estrategia", default="ganancia")
+    parser.add_argument("--modo", default="filtro", choices=("filtro", "bayes", "arbol"))
+    parser.add_argument("--al-instante", action="store_true",
+                        help="vaciar stdout después de cada línea")
+    args = parser.parse_args(argv)
+
+    motor = AkinatorEngine(leer_json(args.archivo), estrategia=args.estrategia, faltante=args.faltante,
+                           modo=args.modo)
+    correr(motor, al_instante=args.al_instante)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
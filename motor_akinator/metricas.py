@@ -0,0 +1,288 @@
+import atexit
+import json
+import os
+import sys
+import time
+from collections import Counter, deque
+
+# =======================================================
+# 🧠 MÉTRICAS DE CADA PASO DEL JUEGO
+# -------------------------------------------------------
+# Capa opcional de medición: cuánto tarda cada paso
+# (responder, elegir pregunta, decodificar una imagen,
+# guardar un personaje...) y datos como los candidatos
+# antes y después de filtrar. Se activa con una variable
+# de entorno, separando sumideros con comas:
+#   AKINATOR_METRICAS=memoria             anillo en memoria
+#   AKINATOR_METRICAS=jsonl=metricas.jsonl  una línea por paso
+#   AKINATOR_METRICAS=cprofile=perfil.prof  cProfile de todo el proceso
+#   AKINATOR_METRICAS=tracemalloc=memoria.txt  mayores reservas al salir
+# Apagada, paso() devuelve siempre el mismo objeto vacío y
+# cronometrado() deja la función sin envolver, así que se
+# puede dejar en el código de producción.
+#   python -m motor_akinator.metricas metricas.jsonl  → percentiles por paso
+# =======================================================
+
+
+VARIABLE = "AKINATOR_METRICAS"
+CAPACIDAD = 10000
+
+ACTIVO = False
+_sumideros = []
+contadores = Counter()
+
+
+# ==============================
+# Sumideros
+# ==============================
+class SumideroMemoria:
+    """
+    Guarda los últimos `capacidad` eventos en un anillo.
+    """
+
+    def __init__(self, capacidad=CAPACIDAD):
+        self.eventos = deque(maxlen=capacidad)
+
+    def registrar(self, evento):
+        self.eventos.append(evento)
+
+    def cerrar(self):
+        pass
+
+
+class SumideroJSONL:
+    """
+    Añade cada evento como una línea JSON al archivo.
+    """
+
+    def __init__(self, ruta):
+        self.archivo = open(ruta, "a", encoding="utf-8")
+
+    def registrar(self, evento):
+        self.archivo.write(json.dumps(evento, ensure_ascii=False) + "\n")
+
+    def cerrar(self):
+        self.archivo.close()
+
+
+class PerfilCProfile:
+    """
+    Perfila todo el proceso con cProfile y guarda las estadísticas al salir
+    (se leen con python -m pstats perfil.prof).
+    """
+
+    def __init__(self, ruta):
+        import cProfile
+
+        self.ruta = ruta
+        self.perfil = cProfile.Profile()
+        self.perfil.enable()
+
+    def registrar(self, evento):
+        pass
+
+    def cerrar(self):
+        self.perfil.disable()
+        self.perfil.dump_stats(self.ruta)
+
+
+class PerfilMemoria:
+    """
+    Sigue las reservas de memoria con tracemalloc y al salir escribe
+    el pico y las líneas que más memoria retienen.
+    """
+
+    def __init__(self, ruta, lineas=30):
+        import tracemalloc
+
+        self.tracemalloc = tracemalloc
+        self.ruta = ruta
+        self.lineas = lineas
+        tracemalloc.start()
+
+    def registrar(self, evento):
+        pass
+
+    def cerrar(self):
+        actual, pico = self.tracemalloc.get_traced_memory()
+        estadisticas = self.tracemalloc.take_snapshot().statistics("lineno")
+        self.tracemalloc.stop()
+        with open(self.ruta, "w", encoding="utf-8") as f:
+            f.write(f"actual {actual / 2 ** 20:.2f} MB, pico {pico / 2 ** 20:.2f} MB\n")
+            for estadistica in estadisticas[:self.lineas]:
+                f.write(f"{estadistica}\n")
+
+
+SUMIDEROS = {"memoria": SumideroMemoria, "jsonl": SumideroJSONL,
+             "cprofile": PerfilCProfile, "tracemalloc": PerfilMemoria}
+
+
+def activar(*sumideros):
+    """
+    Empieza a medir enviando los eventos a estos sumideros.
+    """
+    global ACTIVO
+    _sumideros.extend(sumideros)
+    ACTIVO = bool(_sumideros)
+
+
+def desactivar():
+    global ACTIVO
+    ACTIVO = False
+    while _sumideros:
+        _sumideros.pop().cerrar()
+
+
+def configurar(texto):
+    """
+    Activa los sumideros descritos en el texto ("memoria,jsonl=archivo").
+    """
+    sumideros = []
+    for parte in filter(None, (p.strip() for p in texto.split(","))):
+        nombre, _, argumento = parte.partition("=")
+        if nombre not in SUMIDEROS:
+            raise ValueError(f"{VARIABLE}: sumidero desconocido {nombre!r}")
+        sumideros.append(SUMIDEROS[nombre](argumento) if argumento else SUMIDEROS[nombre]())
+    activar(*sumideros)
+
+
+def memoria():
+    """
+    El primer sumidero en memoria activo, o None.
+    """
+    for sumidero in _sumideros:
+        if isinstance(sumidero, SumideroMemoria):
+            return sumidero
+    return None
+
+
+# ==============================
+# Registro de pasos
+# ==============================
+def registrar(paso, ms, **datos):
+    evento = {"paso": paso, "ms": ms, "hora": time.time(), **datos}
+    for sumidero in _sumideros:
+        sumidero.registrar(evento)
+
+
+def contar(nombre, cantidad=1):
+    if ACTIVO:
+        contadores[nombre] += cantidad
+
+
+class _Paso:
+    __slots__ = ("nombre", "datos", "inicio")
+
+    def __init__(self, nombre, datos):
+        self.nombre = nombre
+        self.datos = datos
+
+    def anotar(self, clave, valor):
+        self.datos[clave] = valor
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        registrar(self.nombre, 1000 * (time.perf_counter() - self.inicio), **self.datos)
+
+
+class _PasoApagado:
+    __slots__ = ()
+
+    def anotar(self, clave, valor):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_APAGADO = _PasoApagado()
+
+
+def paso(nombre, **datos):
+    """
+    with paso("filtrar", antes=n) as p: ...; p.anotar("despues", m)
+    mide la duración del bloque y la registra con los datos anotados.
+    """
+    if not ACTIVO:
+        return _APAGADO
+    return _Paso(nombre, datos)
+
+
+def cronometrado(nombre):
+    """
+    Decorador que mide cada llamada a la función. Si las métricas están
+    apagadas al importar el módulo, la función queda tal cual.
+    """
+    def decorar(funcion):
+        if not ACTIVO:
+            return funcion
+
+        def medida(*args, **kwargs):
+            with paso(nombre):
+                return funcion(*args, **kwargs)
+        medida.__name__ = funcion.__name__
+        medida.__doc__ = funcion.__doc__
+        medida.__wrapped__ = funcion
+        return medida
+    return decorar
+
+
+# ==============================
+# Percentiles
+# ==============================
+def percentiles(eventos, puntos=(50, 90, 99)):
+    """
+    {paso: {"veces": n, "p50_ms": ..., ...}} a partir de los eventos.
+    """
+    tiempos = {}
+    for evento in eventos:
+        tiempos.setdefault(evento["paso"], []).append(evento["ms"])
+    resumen = {}
+    for nombre, lista in sorted(tiempos.items()):
+        lista.sort()
+        fila = {"veces": len(lista)}
+        for p in puntos:
+            fila[f"p{p}_ms"] = lista[min(len(lista) - 1, len(lista) * p // 100)]
+        fila["max_ms"] = lista[-1]
+        resumen[nombre] = fila
+    return resumen
+
+
+def resumen():
+    """
+    Percentiles del anillo en memoria y contadores acumulados.
+    """
+    sumidero = memoria()
+    return {"pasos": percentiles(sumidero.eventos) if sumidero else {},
+            "contadores": dict(contadores)}
+
+
+def main(argv=None):
+    """
+    python -m motor_akinator.metricas metricas.jsonl
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print(main.__doc__.strip())
+        return 2
+    with open(argv[0], "r", encoding="utf-8") as f:
+        eventos = [json.loads(linea) for linea in f if linea.strip()]
+    for nombre, fila in percentiles(eventos).items():
+        valores = "  ".join(f"{k} {v:.3f}" for k, v in fila.items() if k != "veces")
+        print(f"{nombre:<28} {fila['veces']:>7}  {valores}")
+    return 0
+
+
+if os.environ.get(VARIABLE):
+    configurar(os.environ[VARIABLE])
+    atexit.register(desactivar)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,483 @@
+import json
+from collections import namedtuple
+from itertools import islice
+
+from . import metricas
+from .almacen import abrir_almacen
+from .indice import IndiceAtributos, compilar, contar_bits, posiciones_bits
+from .seleccion import crear_estrategia, entropia_masa, probabilidades_masa
+
+# =======================================================
+# 🧠 MOTOR DEL AKINATOR SIN INTERFAZ
+# -------------------------------------------------------
+# AkinatorEngine guarda la base de conocimiento (datos y
+# un índice con todos los grupos) una sola vez. Cada
+# partida es una Sesion ligera que solo guarda su máscara
+# de candidatos, las respuestas dadas y la pregunta actual.
+# El grupo (humanos o demonios) es un atributo más: se
+# pregunta cuando conviene y no antes de todo lo demás.
+# Cada respuesta apila el estado anterior (una tupla que
+# no cambia), así que deshacer un clic equivocado es
+# desapilar, sin volver a filtrar desde el principio.
+# Con anticipar=True la sesión puede preguntar "¿Es X?"
+# por el candidato más probable antes de quedarse con uno
+# solo, cuando eso cuesta en promedio menos preguntas que
+# seguir dividiendo; un "no" descarta a X y sigue.
+# Las interfaces (Tkinter o consola) solo muestran lo que
+# la sesión les dice.
+# =======================================================
+
+
+# Atributo que separa a humanos de demonios
+PREGUNTA_GRUPO = "Es un demonio"
+
+# Estados de una partida
+PREGUNTANDO = "preguntando"
+ADIVINADO = "adivinado"
+SIN_CANDIDATOS = "sin_candidatos"
+DUDOSO = "dudoso"
+
+Resultado = namedtuple("Resultado", ["estado", "personajes"])
+
+# Con más candidatos que esto, las preguntas que faltan se estiman
+# con la entropía en vez de recorrer todas las respuestas posibles
+CANDIDATOS_EXACTOS = 8
+
+# Formas de escribir las respuestas que se aceptan por teclado o por lotes
+RESPUESTAS = {"si": "si", "sí": "si", "s": "si", "no": "no", "n": "no",
+              "no_se": "no_se", "probablemente_si": "probablemente_si",
+              "probablemente_no": "probablemente_no"}
+
+
+def cargar_datos(archivo):
+    """
+    Carga los personajes desde el almacén que corresponde al JSON
+    (el JSON se importa la primera vez).
+    Si no existe, crea una estructura vacía con 'humanos' y 'demonios'.
+    """
+    with abrir_almacen(archivo) as almacen:
+        return almacen.cargar()
+
+
+def leer_json(archivo):
+    """
+    Lee un JSON de personajes sin pasar por el almacén. El de Adivina
+    Quién no separa humanos y demonios, así que se envuelve en un grupo.
+    """
+    with open(archivo, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if all(isinstance(v, str) for p in data.values() for v in p.values()):
+        data = {"personajes": data}
+    return data
+
+
+def texto_pregunta(atributo):
+    """
+    Convierte un atributo en el texto que ve el usuario.
+    """
+    return f"¿{atributo.replace('_', ' ')}?"
+
+
+def normalizar_respuesta(texto):
+    """
+    "Sí", "SI", "s"... → "si"; "No", "n"... → "no". None si no se entiende.
+    """
+    if not isinstance(texto, str):
+        return None
+    return RESPUESTAS.get(texto.strip().lower())
+
+
+def atributos_de_grupos(grupos):
+    """
+    {grupo: {atributo: valor}} con el atributo que separa cada grupo de
+    los demás: "Es un demonio" para humanos y demonios, "Es de <grupo>"
+    si hay otros grupos. Con un solo grupo no hace falta ninguno.
+    """
+    grupos = list(grupos)
+    if len(grupos) < 2:
+        return {}
+    if set(grupos) == {"humanos", "demonios"}:
+        return {g: {PREGUNTA_GRUPO: "si" if g == "demonios" else "no"} for g in grupos}
+    return {g: {f"Es de {otro}": "si" if otro == g else "no" for otro in grupos}
+            for g in grupos}
+
+
+def mejor_pregunta(estrategia, candidatos, respuestas):
+    """
+    Atributo que conviene preguntar sobre los candidatos (una vista del
+    índice), o None si ya no queda ninguno que los distinga.
+    Un atributo que no aplica al grupo de los candidatos nunca sale:
+    el índice lo tiene en "no" para todos ellos.
+    """
+    if len(candidatos) <= 1:
+        return None
+    with metricas.paso("motor.mejor_pregunta", candidatos=len(candidatos)) as p:
+        utiles = candidatos.indice.atributos_utiles(candidatos.mascara, respuestas)
+        p.anotar("atributos_puntuados", len(utiles))
+        for atributo in estrategia.ordenar(candidatos, utiles):
+            return atributo
+    return None
+
+
+class Adivinanza(str):
+    """
+    Pregunta "¿Es X?" por un personaje. Es un str ("Es X") para que las
+    interfaces la muestren como cualquier atributo; `personaje` es el
+    nombre y `posicion` su lugar en el índice.
+    """
+
+    def __new__(cls, personaje, posicion):
+        texto = super().__new__(cls, f"Es {personaje}")
+        texto.personaje = personaje
+        texto.posicion = posicion
+        return texto
+
+
+# ==============================
+# Adivinar antes de tiempo
+# ==============================
+def _masa(motor, indice, mascara):
+    if motor.priores is None:
+        return float(contar_bits(mascara)), 0.0
+    return motor.priores.masa(indice, mascara)
+
+
+def _mas_probable(motor, candidatos):
+    if motor.priores is None:
+        mascara = candidatos.mascara
+        return (mascara & -mascara).bit_length() - 1, 1.0
+    return motor.priores.mas_probable(candidatos.indice, candidatos.mascara)
+
+
+def preguntas_restantes(motor, candidatos, respuestas):
+    """
+    Preguntas que faltan en promedio para quedarse con un candidato
+    siguiendo la estrategia del motor (con los pesos de la popularidad,
+    si hay). Con pocos candidatos se recorren todas las respuestas; con
+    más se usa la entropía, lo mínimo si cada pregunta partiera perfecto.
+    """
+    if len(candidatos) <= 1:
+        return 0.0
+    indice, mascara = candidatos.indice, candidatos.mascara
+    if len(candidatos) > CANDIDATOS_EXACTOS:
+        return entropia_masa(*_masa(motor, indice, mascara))
+    utiles = indice.atributos_utiles(mascara, respuestas)
+    pregunta = next(iter(motor.estrategia.ordenar(candidatos, utiles)), None)
+    if pregunta is None:
+        # Nada los separa: solo queda ir preguntando "¿Es X?" del más probable al menos
+        pesos = sorted((_masa(motor, indice, 1 << i)[0] for i in posiciones_bits(mascara)),
+                       reverse=True)
+        total, restante, costo = sum(pesos), 1.0, 0.0
+        for peso in pesos[:-1]:
+            costo += restante
+            restante -= peso / total
+        return costo
+    si = mascara & indice.si.get(pregunta, 0)
+    no = mascara & indice.no.get(pregunta, 0)
+    p_si, p_no = probabilidades_masa(_masa(motor, indice, si), _masa(motor, indice, no),
+                                     _masa(motor, indice, mascara & ~(si | no)))
+    return (1 + p_si * preguntas_restantes(motor, candidatos.filtrar(pregunta, "si"),
+                                           {**respuestas, pregunta: "si"})
+            + p_no * preguntas_restantes(motor, candidatos.filtrar(pregunta, "no"),
+                                         {**respuestas, pregunta: "no"}))
+
+
+def adivinanza_temprana(motor, candidatos, respuestas, pregunta):
+    """
+    Adivinanza por el candidato más probable si preguntar por él cuesta
+    en promedio menos que seguir con `pregunta` (siempre, si ya no hay
+    pregunta que los separe); None si conviene seguir.
+    """
+    if len(candidatos) <= 1:
+        return None
+    if pregunta is not None and motor.priores is None and len(candidatos) > CANDIDATOS_EXACTOS:
+        return None  # todos igual de probables y muchos: adivinar nunca compensa
+    posicion, peso = _mas_probable(motor, candidatos)
+    indice = candidatos.indice
+    adivinanza = Adivinanza(indice.nombres[posicion], posicion)
+    if pregunta is None:
+        return adivinanza
+    p = peso / _masa(motor, indice, candidatos.mascara)[0]
+    resto = indice.vista(candidatos.mascara & ~(1 << posicion))
+    adivinar = 1 + (1 - p) * preguntas_restantes(motor, resto, respuestas)
+    seguir = preguntas_restantes(motor, candidatos, respuestas)
+    return adivinanza if adivinar < seguir - 1e-9 else None
+
+
+# ==============================
+# Base de conocimiento compartida
+# ==============================
+class AkinatorEngine:
+    """
+    Base de conocimiento de solo lectura para las sesiones.
+    Todas las sesiones comparten el mismo índice; aprender un
+    personaje publica un índice nuevo y las partidas en curso
+    siguen con el que tenían al empezar.
+    """
+
+    def __init__(self, data, estrategia="ganancia", faltante=None, modo="filtro",
+                 especular=False, popularidad=None, anticipar=False, **opciones):
+        self.data = data
+        self.faltante = faltante
+        # Preguntar "¿Es X?" antes de tiempo (solo en modo "filtro")
+        self.anticipar = anticipar
+        # Con popularidad ({nombre: partidas recientes}) los personajes más
+        # elegidos pesan más al escoger preguntas y al adivinar
+        self.priores = None
+        if popularidad:
+            from .popularidad import Priores
+            self.priores = Priores(popularidad)
+        # "filtro": descarta personajes (rápido); "bayes": los puntúa;
+        # "arbol": recorre un árbol de decisión precompilado
+        self.modo = modo
+        self.opciones = opciones
+        # Cada grupo se compila por separado y se unen en un solo índice,
+        # que además sabe qué atributos aplican a cada grupo
+        self._compilar()
+        if isinstance(estrategia, str):
+            estrategia = crear_estrategia(estrategia, self.priores)
+        self.estrategia = estrategia
+        self.arbol = None
+        if modo == "arbol":
+            from .arbol import ArbolDecision
+            self.arbol = ArbolDecision(self, **opciones)
+        # Con especular, la respuesta siguiente se calcula mientras el
+        # usuario lee la pregunta (ver especulacion.py)
+        self.especulador = None
+        if especular:
+            from .especulacion import Especulador
+            self.especulador = Especulador()
+
+    @classmethod
+    def desde_archivo(cls, archivo, **opciones):
+        return cls(cargar_datos(archivo), **opciones)
+
+    def _compilar(self):
+        self.distintivos = atributos_de_grupos(self.data)
+        self.indice = IndiceAtributos.unir(
+            {grupo: compilar(personajes, self.faltante)
+             for grupo, personajes in self.data.items()},
+            self.distintivos, self.faltante)
+
+    def nueva_sesion(self):
+        """
+        Crea una partida nueva ya iniciada.
+        """
+        if self.modo == "bayes":
+            from .bayes import SesionBayesiana
+            sesion = SesionBayesiana(self, **self.opciones)
+        elif self.modo == "arbol":
+            from .arbol import SesionArbol
+            sesion = SesionArbol(self)
+        else:
+            sesion = Sesion(self)
+        if self.especulador is not None:
+            return self.especulador.envolver(sesion)
+        return sesion
+
+    def atributos_grupo(self, grupo):
+        """
+        Atributos que tienen todos los personajes del grupo.
+        """
+        return self.distintivos.get(grupo, {})
+
+    def es_atributo_grupo(self, atributo):
+        return any(atributo in a for a in self.distintivos.values())
+
+    def vista(self, grupo=None):
+        """
+        Candidatos de un grupo, o de todos si no se indica.
+        """
+        if grupo is None:
+            return self.indice.vista()
+        return self.indice.vista(self.indice.grupos.get(grupo, 0))
+
+    def aprender(self, grupo, nombre, atributos):
+        """
+        Añade un personaje al grupo y publica el índice actualizado.
+        """
+        self.indice = self.indice.agregar(nombre, {**atributos, **self.atributos_grupo(grupo)},
+                                          grupo)
+        self.data.setdefault(grupo, {})[nombre] = atributos
+        if self.arbol is not None:
+            self.arbol.aprender((grupo, nombre))
+
+    def mas_probables(self, nombres):
+        """
+        Los nombres de más a menos elegido (tal cual si no hay popularidad).
+        """
+        if self.priores is None:
+            return list(nombres)
+        return self.priores.ordenar(nombres)
+
+    def actualizar(self, personajes):
+        """
+        Aplica personajes agregados o cambiados fuera de este motor
+        ([(grupo, nombre, atributos)], p. ej. por otra instancia) y publica
+        el índice nuevo. Los que ya están igual se ignoran. Devuelve
+        (agregados, cambiados).
+        """
+        agregados, cambiados = [], []
+        for grupo, nombre, atributos in personajes:
+            anterior = self.data.get(grupo, {}).get(nombre)
+            if anterior == atributos:
+                continue
+            (agregados if anterior is None else cambiados).append((grupo, nombre, atributos))
+        if not agregados and not cambiados:
+            return 0, 0
+        grupo_nuevo = any(grupo not in self.data for grupo, _, _ in agregados)
+        for grupo, nombre, atributos in agregados + cambiados:
+            self.data.setdefault(grupo, {})[nombre] = atributos
+        if grupo_nuevo:
+            # Cambia la pregunta que separa los grupos: se compila todo
+            self._compilar()
+        else:
+            self.indice = self.indice.actualizar(
+                [(nombre, {**atributos, **self.atributos_grupo(grupo)}, grupo)
+                 for grupo, nombre, atributos in agregados],
+                [(self.indice.buscar(nombre, grupo), {**atributos, **self.atributos_grupo(grupo)})
+                 for grupo, nombre, atributos in cambiados])
+        if self.arbol is not None:
+            if grupo_nuevo or cambiados:
+                self.arbol.reconstruir()
+            else:
+                self.arbol.aprender(*((grupo, nombre) for grupo, nombre, _ in agregados))
+        return len(agregados), len(cambiados)
+
+
+def copiar_campos(sesion):
+    """
+    Copia superficial de una sesión con __slots__ y sus respuestas aparte
+    (el historial es una pila de tuplas enlazadas, se puede compartir).
+    """
+    copia = object.__new__(type(sesion))
+    for campo in type(sesion).__slots__:
+        setattr(copia, campo, getattr(sesion, campo))
+    copia.respuestas = dict(sesion.respuestas)
+    return copia
+
+
+def contar_preguntas(historial):
+    """
+    Preguntas respondidas en la partida (incluidas las "¿Es X?", que no
+    quedan en respuestas): el largo de la pila del historial.
+    """
+    cantidad = 0
+    while historial is not None:
+        cantidad += 1
+        historial = historial[1]
+    return cantidad
+
+
+# ==============================
+# Sesión de juego
+# ==============================
+class Sesion:
+    """
+    Estado de una partida: start() / answer() / current_question() / result().
+    """
+
+    __slots__ = ("motor", "indice", "candidatos", "respuestas", "pregunta", "historial")
+
+    def __init__(self, motor):
+        self.motor = motor
+        self.start()
+
+    def start(self):
+        """
+        Empieza una partida nueva con todos los personajes como candidatos.
+        """
+        self.indice = self.motor.indice
+        self.candidatos = self.indice.vista()
+        self.respuestas = {}
+        # Pila de estados anteriores: ((candidatos, pregunta), anterior) o None
+        self.historial = None
+        self._siguiente_pregunta()
+
+    @property
+    def grupo(self):
+        """
+        Grupo de los candidatos que quedan, o None si son de varios.
+        """
+        return self.indice.grupo_de(self.candidatos.mascara)
+
+    def current_question(self):
+        """
+        Atributo que se está preguntando, o None si la partida terminó.
+        """
+        return self.pregunta
+
+    def answer(self, respuesta):
+        """
+        Procesa la respuesta ("si" o "no") a la pregunta actual.
+        """
+        if self.pregunta is None:
+            return
+        atributo = self.pregunta
+        self.historial = ((self.candidatos, atributo), self.historial)
+        if isinstance(atributo, Adivinanza):
+            # "¿Es X?": con "si" queda solo X; con "no" se descarta y se sigue
+            # (no va a respuestas: no es un atributo del personaje)
+            bit = 1 << atributo.posicion
+            mascara = self.candidatos.mascara
+            self.candidatos = self.indice.vista(mascara & bit if respuesta == "si"
+                                                else mascara & ~bit)
+            self._siguiente_pregunta()
+            return
+        self.respuestas[atributo] = respuesta
+        # Las respuestas anteriores ya están aplicadas en la máscara
+        # (len() se guarda en la vista, así que anotarlo casi no cuesta)
+        with metricas.paso("motor.filtrar", antes=len(self.candidatos)) as p:
+            self.candidatos = self.candidatos.filtrar(atributo, respuesta)
+            p.anotar("despues", len(self.candidatos))
+        self._siguiente_pregunta()
+
+    def result(self):
+        """
+        Estado de la partida y personajes que quedan.
+        """
+        if self.pregunta is not None:
+            return Resultado(PREGUNTANDO, [])
+        personajes = list(self.candidatos)
+        if len(personajes) == 1:
+            return Resultado(ADIVINADO, personajes)
+        if not personajes:
+            return Resultado(SIN_CANDIDATOS, personajes)
+        return Resultado(DUDOSO, self.motor.mas_probables(personajes))
+
+    def deshacer(self):
+        """
+        Vuelve a la pregunta anterior. False si no hay nada que deshacer.
+        """
+        if self.historial is None:
+            return False
+        (self.candidatos, self.pregunta), self.historial = self.historial
+        self.respuestas.pop(self.pregunta, None)
+        return True
+
+    def puede_deshacer(self):
+        return self.historial is not None
+
+    def preguntas_hechas(self):
+        return contar_preguntas(self.historial)
+
+    def copiar(self):
+        """
+        Partida independiente en el mismo punto (la vista de candidatos
+        no cambia nunca, así que se comparte).
+        """
+        return copiar_campos(self)
+
+    def probables(self, limite):
+        """
+        Hasta `limite` de los personajes que siguen siendo candidatos.
+        """
+        return list(islice(self.candidatos, limite))
+
+    def _siguiente_pregunta(self):
+        self.pregunta = mejor_pregunta(self.motor.estrategia, self.candidatos, self.respuestas)
+        if self.motor.anticipar:
+            adivinanza = adivinanza_temprana(self.motor, self.candidatos, self.respuestas,
+                                             self.pregunta)
+            if adivinanza is not None:
+                self.pregunta = adivinanza
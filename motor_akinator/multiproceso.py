@@ -0,0 +1,582 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import socket
+import sys
+import time
+from http import HTTPStatus
+
+from .almacen import GRUPOS_BASE, abrir_almacen
+from .binario import EXTENSION, abrir_binario, escribir_binario
+from .servidor import (INTERVALO_RECARGA, SESIONES_MAXIMAS, TTL, AlmacenSesiones, ErrorHTTP,
+                       ServidorJuego, atender, despachar, purgar_periodicamente,
+                       recargar_periodicamente)
+
+# =======================================================
+# 🧠 SERVIDOR EN VARIOS PROCESOS (PRE-FORK)
+# -------------------------------------------------------
+# Un solo proceso de Python juega todas las partidas con un
+# solo núcleo (GIL). Este modo las reparte entre N procesos
+# trabajadores sin que cada uno cargue su copia del JSON:
+#  - el proceso principal lee el almacén una vez y publica
+#    los personajes en un segmento de solo lectura (el
+#    formato .akb de binario.py) numerado por versión, con
+#    la popularidad de ese momento al lado (un JSON chico):
+#    la ven también los trabajadores que se relanzan;
+#  - cada trabajador abre el segmento con mmap: el índice
+#    sale de las columnas de bits del archivo y las filas
+#    de los personajes se leen del mapa, que el sistema
+#    comparte entre todos los procesos;
+#  - todos aceptan conexiones del mismo socket. Una partida
+#    vive en el proceso que la creó (su número va al
+#    principio de la clave) y si una petición llega a otro,
+#    este se la reenvía por un puerto interno;
+#  - los personajes nuevos van por una cola al proceso
+#    principal, el único que escribe en el almacén, que
+#    publica una versión nueva del segmento. Cada trabajador
+#    se pasa a ella para las partidas nuevas; las que están
+#    en curso siguen con la suya.
+#   python -m motor_akinator.multiproceso Akinator_KNYV2/personajes_kimetsu.json --procesos 4
+#   python -m motor_akinator.multiproceso Akinator_KNYV2/personajes_kimetsu.json --medir 1,2,4
+# =======================================================
+
+
+# Segundos entre cada vez que un trabajador mira si hay una versión nueva
+# (lee un entero compartido, no toca el almacén)
+INTERVALO_VERSION = 0.5
+
+# Versiones del segmento que se conservan en disco: un trabajador que
+# todavía no se pasó a la última puede abrir la anterior
+VERSIONES_CONSERVADAS = 2
+
+# Segundos que un trabajador espera al escritor antes de rendirse
+ESPERA_ESCRITOR = 30.0
+
+# Segundos que se espera a que arranquen los trabajadores
+ESPERA_ARRANQUE = 60.0
+
+
+def ruta_segmento(base, version):
+    """
+    personajes_kimetsu.<pid>, 3 → personajes_kimetsu.<pid>.3.akb
+    """
+    return f"{base}.{version}{EXTENSION}"
+
+
+def ruta_popularidad(base, version):
+    """
+    personajes_kimetsu.<pid>, 3 → personajes_kimetsu.<pid>.3.popularidad.json
+    """
+    return f"{base}.{version}.popularidad.json"
+
+
+def contexto_procesos():
+    """
+    Los trabajadores arrancan de un intérprete limpio (forkserver, o spawn
+    en Windows) y no heredan la memoria que usó el principal al leer el
+    almacén: lo único que comparten es el segmento.
+    """
+    metodos = multiprocessing.get_all_start_methods()
+    contexto = multiprocessing.get_context("forkserver" if "forkserver" in metodos else "spawn")
+    if contexto.get_start_method() == "forkserver":
+        contexto.set_forkserver_preload([__name__])
+    return contexto
+
+
+def memoria_propia(pid="self"):
+    """
+    KB de memoria propia del proceso (sin los archivos mapeados, que se
+    comparten), o None si el sistema no lo informa (fuera de Linux).
+    """
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="ascii") as f:
+            for linea in f:
+                if linea.startswith("RssAnon:"):
+                    return int(linea.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+# ==============================
+# Escritor: almacén y segmentos
+# ==============================
+class Publicador:
+    """
+    Único dueño del almacén. Guarda los personajes que piden los
+    trabajadores y, cuando el almacén cambió (por ellos o por otra
+    instancia), escribe una versión nueva del segmento.
+    """
+
+    def __init__(self, archivo, contexto):
+        self.almacen = abrir_almacen(archivo)
+        # Con el pid, dos servidores sobre los mismos datos no se pisan
+        self.base = f"{os.path.splitext(archivo)[0]}.{os.getpid()}"
+        self.version = contexto.RawValue("Q", 0)
+        self.pedidos = contexto.Queue()
+        self.firma = None
+        self.viejas = []
+
+    def publicar(self):
+        from .popularidad import leer_popularidad
+
+        # La firma se toma antes de leer: un cambio que entre mientras
+        # tanto se publica en la vuelta siguiente. Las partidas que
+        # registran otras instancias también cambian la firma
+        firma = self.almacen.firma()
+        version = self.version.value + 1
+        # Nadie la lee hasta que se publica el número de versión
+        with open(ruta_popularidad(self.base, version), "w", encoding="utf-8") as f:
+            json.dump(leer_popularidad(self.almacen), f, ensure_ascii=False)
+        escribir_binario(ruta_segmento(self.base, version), self.almacen.cargar(),
+                         marca=self.almacen.revision())
+        self.firma = firma
+        self.version.value = version
+        if version > VERSIONES_CONSERVADAS:
+            self.viejas.append(version - VERSIONES_CONSERVADAS)
+        self.viejas = [v for v in self.viejas if not self._borrar(v)]
+
+    def atender(self, respuestas, espera):
+        """
+        Guarda los personajes pedidos (espera hasta `espera` segundos al
+        primero y toma de una vez los que ya estén en la cola), publica
+        si el almacén cambió y contesta a cada trabajador.
+        """
+        pedidos = []
+        try:
+            pedidos.append(self.pedidos.get(timeout=espera))
+            while True:
+                pedidos.append(self.pedidos.get_nowait())
+        except queue.Empty:
+            pass
+        guardados = []
+        for _, _, grupo, nombre, atributos in pedidos:
+            try:
+                guardados.append(self.almacen.guardar_personaje(grupo, nombre, atributos))
+            except Exception as e:
+                guardados.append(str(e))
+        if self.almacen.firma() != self.firma:
+            self.publicar()
+        for (numero, pedido, *_), guardado in zip(pedidos, guardados):
+            respuestas[numero].put((pedido, guardado, self.version.value))
+
+    def cerrar(self):
+        self.almacen.cerrar()
+        for version in self.viejas + list(range(1, self.version.value + 1)):
+            self._borrar(version)
+
+    def _borrar(self, version):
+        for ruta in (ruta_segmento(self.base, version), ruta_popularidad(self.base, version)):
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                return False  # en Windows, si un trabajador todavía lo tiene abierto
+        return True
+
+
+# ==============================
+# Trabajadores
+# ==============================
+def adjuntar(base, version, opciones=None):
+    """
+    Motor sobre una versión del segmento, armado con las columnas del
+    archivo (sin leer personaje por personaje) y la popularidad que se
+    publicó con ella.
+    """
+    from .motor import AkinatorEngine
+
+    with open(ruta_popularidad(base, version), "r", encoding="utf-8") as f:
+        popularidad = json.load(f)
+    data = abrir_binario(ruta_segmento(base, version))
+    for grupo in GRUPOS_BASE:
+        data.setdefault(grupo, {})
+    return AkinatorEngine(data, popularidad=popularidad, **(opciones or {}))
+
+
+class Trabajador(ServidorJuego):
+    """
+    Servidor de un proceso trabajador: juega con el motor de la última
+    versión publicada y le pasa al escritor los personajes nuevos.
+    """
+
+    def __init__(self, numero, base, version, pedidos, respuestas, puertos,
+                 opciones=None, sesiones=None):
+        self.numero = numero
+        self.base = base
+        self.publicada = version
+        self.pedidos = pedidos
+        self.respuestas = respuestas
+        self.puertos = puertos
+        self.opciones = opciones
+        self.version = None
+        self.pedido = 0
+        super().__init__(None, self._adjuntar(), sesiones)
+
+    def dueno(self, clave):
+        """
+        Número del proceso que tiene la partida, o None si la clave no
+        es de ninguno.
+        """
+        numero, punto, _ = clave.partition(".")
+        if not punto or not numero.isdigit() or int(numero) >= len(self.puertos):
+            return None
+        return int(numero)
+
+    async def recargar(self):
+        """
+        Se pasa a la última versión publicada.
+        """
+        if self.publicada.value != self.version:
+            self.motor = await self._encargar(self._adjuntar)
+        return {"version": self.version}
+
+    def estado(self, cuerpo):
+        return {**super().estado(cuerpo), "proceso": self.numero, "version": self.version}
+
+    def _adjuntar(self):
+        # Si mientras tanto se publicaron dos versiones más, la leída ya
+        # puede estar borrada: se vuelve a leer la última
+        while True:
+            version = self.publicada.value
+            try:
+                motor = adjuntar(self.base, version, self.opciones)
+            except FileNotFoundError:
+                if self.publicada.value == version:
+                    raise
+                continue
+            self.version = version
+            return motor
+
+    def _guardar(self, grupo, nombre, atributos):
+        # Corre en el único escritor del proceso, así que hay a lo sumo
+        # un pedido pendiente; el número descarta respuestas atrasadas
+        if nombre in self.motor.indice.posicion:
+            raise ErrorHTTP(HTTPStatus.CONFLICT, f"el personaje {nombre!r} ya existe")
+        self.pedido += 1
+        pedido = (os.getpid(), self.pedido)
+        self.pedidos.put((self.numero, pedido, grupo, nombre, atributos))
+        limite = time.monotonic() + ESPERA_ESCRITOR
+        while True:
+            try:
+                respuesta, guardado, version = self.respuestas.get(
+                    timeout=max(0.0, limite - time.monotonic()))
+            except queue.Empty:
+                raise ErrorHTTP(HTTPStatus.SERVICE_UNAVAILABLE, "el escritor no responde")
+            if respuesta == pedido:
+                break
+        if guardado is False:
+            raise ErrorHTTP(HTTPStatus.CONFLICT, f"el personaje {nombre!r} ya existe")
+        if guardado is not True:
+            raise ErrorHTTP(HTTPStatus.INTERNAL_SERVER_ERROR, guardado)
+        # Quien lo enseñó lo ve enseguida; los demás procesos, en su
+        # próxima revisión
+        if version != self.version:
+            self.motor = self._adjuntar()
+        return {"grupo": grupo, "nombre": nombre}
+
+
+async def reenviar(puerto, metodo, ruta, cuerpo):
+    """
+    Pasa la petición al proceso dueño de la partida (por su puerto
+    interno) y devuelve su (estado, respuesta).
+    """
+    try:
+        lector, escritor = await asyncio.open_connection("127.0.0.1", puerto)
+    except OSError:
+        raise ErrorHTTP(HTTPStatus.BAD_GATEWAY, "el proceso de la partida no responde")
+    try:
+        escritor.write(f"{metodo} {ruta} HTTP/1.1\r\nContent-Length: {len(cuerpo)}\r\n"
+                       "Connection: close\r\n\r\n".encode("latin-1") + cuerpo)
+        await escritor.drain()
+        estado = HTTPStatus(int((await lector.readline()).split()[1]))
+        while await lector.readline() not in (b"\r\n", b"\n", b""):
+            pass
+        return estado, json.loads(await lector.read())
+    except (OSError, ValueError, IndexError):
+        raise ErrorHTTP(HTTPStatus.BAD_GATEWAY, "el proceso de la partida no responde")
+    finally:
+        escritor.close()
+
+
+async def despachar_trabajador(trabajador, metodo, ruta, cuerpo):
+    """
+    Como despachar, pero la partida de otro proceso se le reenvía a él.
+    """
+    partes = [p for p in ruta.split("/") if p]
+    if len(partes) == 2 and partes[0] == "partidas":
+        dueno = trabajador.dueno(partes[1])
+        if dueno is not None and dueno != trabajador.numero:
+            return await reenviar(trabajador.puertos[dueno], metodo, ruta, cuerpo)
+    return await despachar(trabajador, metodo, ruta, cuerpo)
+
+
+async def servir_trabajador(juego, publico, interno, listos):
+    """
+    Atiende el socket público (compartido con los demás procesos) y el
+    interno (solo las partidas propias que otros le reenvían).
+    """
+    await juego.iniciar()
+    servidores = [
+        await asyncio.start_server(lambda l, e: atender(juego, l, e, despachar_trabajador),
+                                   sock=publico),
+        await asyncio.start_server(lambda l, e: atender(juego, l, e), sock=interno)]
+    tareas = [asyncio.create_task(purgar_periodicamente(juego.sesiones,
+                                                        max(1, juego.sesiones.ttl / 4))),
+              asyncio.create_task(recargar_periodicamente(juego, INTERVALO_VERSION))]
+    listos.put(juego.numero)
+    try:
+        # Si el proceso principal muere, los trabajadores no siguen solos
+        atendiendo = [asyncio.create_task(servidor.serve_forever()) for servidor in servidores]
+        await asyncio.wait(atendiendo + [asyncio.create_task(vigilar_principal())],
+                           return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for tarea in tareas:
+            tarea.cancel()
+        for servidor in servidores:
+            servidor.close()
+        await juego.detener()
+
+
+async def vigilar_principal(intervalo=1.0):
+    principal = multiprocessing.parent_process()
+    while principal is None or principal.is_alive():
+        await asyncio.sleep(intervalo)
+
+
+def trabajar(numero, publico, interno, puertos, base, version, pedidos, respuestas, listos,
+             opciones, maximo, ttl):
+    """
+    Función de cada proceso trabajador.
+    """
+    sesiones = AlmacenSesiones(maximo, ttl, prefijo=f"{numero}.")
+    juego = Trabajador(numero, base, version, pedidos, respuestas, puertos, opciones, sesiones)
+    try:
+        asyncio.run(servir_trabajador(juego, publico, interno, listos))
+    except KeyboardInterrupt:
+        pass
+
+
+# ==============================
+# Proceso principal
+# ==============================
+class Prefork:
+    """
+    Publica el segmento, abre los sockets, lanza los trabajadores y,
+    mientras corren, hace de escritor (atender() en un bucle).
+    """
+
+    def __init__(self, archivo, procesos=None, host="127.0.0.1", puerto=8765,
+                 sesiones=SESIONES_MAXIMAS, ttl=TTL, **opciones):
+        self.contexto = contexto_procesos()
+        self.archivo = archivo
+        self.procesos = procesos or os.cpu_count() or 1
+        self.host = host
+        self.puerto = puerto
+        self.sesiones = sesiones
+        self.ttl = ttl
+        self.opciones = opciones
+        self.trabajadores = []
+
+    def iniciar(self):
+        self.publicador = Publicador(self.archivo, self.contexto)
+        self.publicador.publicar()
+        self.publico = socket.create_server((self.host, self.puerto), backlog=1024)
+        self.puerto = self.publico.getsockname()[1]
+        self.internos = [socket.create_server(("127.0.0.1", 0)) for _ in range(self.procesos)]
+        self.puertos = [interno.getsockname()[1] for interno in self.internos]
+        self.respuestas = [self.contexto.Queue() for _ in range(self.procesos)]
+        self.listos = self.contexto.Queue()
+        self.trabajadores = [self._lanzar(numero) for numero in range(self.procesos)]
+        limite = time.monotonic() + ESPERA_ARRANQUE
+        for _ in range(self.procesos):
+            while True:
+                try:
+                    self.listos.get(timeout=1)
+                    break
+                except queue.Empty:
+                    caidos = [p.name for p in self.trabajadores if not p.is_alive()]
+                    if caidos or time.monotonic() > limite:
+                        raise RuntimeError(f"no arrancaron los procesos: {caidos or 'tiempo agotado'}")
+
+    def atender(self, espera=INTERVALO_RECARGA):
+        """
+        Una vuelta del escritor. Relanza los trabajadores que murieron
+        (sus partidas se pierden; las de los demás siguen).
+        """
+        self.publicador.atender(self.respuestas, espera)
+        for numero, proceso in enumerate(self.trabajadores):
+            if not proceso.is_alive():
+                print(f"El proceso {numero} terminó ({proceso.exitcode}); se relanza",
+                      file=sys.stderr)
+                self.trabajadores[numero] = self._lanzar(numero)
+
+    def detener(self):
+        for proceso in self.trabajadores:
+            proceso.terminate()
+        for proceso in self.trabajadores:
+            proceso.join()
+        self.publico.close()
+        for interno in self.internos:
+            interno.close()
+        self.publicador.cerrar()
+
+    def _lanzar(self, numero):
+        proceso = self.contexto.Process(
+            target=trabajar, name=f"akinator-{numero}", daemon=True,
+            args=(numero, self.publico, self.internos[numero], self.puertos,
+                  self.publicador.base, self.publicador.version, self.publicador.pedidos,
+                  self.respuestas[numero], self.listos, self.opciones,
+                  self.sesiones, self.ttl))
+        proceso.start()
+        return proceso
+
+
+# ==============================
+# Medición
+# ==============================
+def _pedir(conexion, metodo, ruta, datos):
+    conexion.request(metodo, ruta, body=json.dumps(datos),
+                     headers={"Content-Type": "application/json"})
+    return json.loads(conexion.getresponse().read())
+
+
+def _cliente(puerto, ruta, segundos, semilla):
+    """
+    Juega partidas contra el servidor durante `segundos` con personajes
+    al azar (leídos del mismo segmento). Devuelve cuántas terminó.
+    """
+    import http.client
+    import random
+
+    from .motor import atributos_de_grupos
+
+    data = abrir_binario(ruta)
+    for grupo in GRUPOS_BASE:
+        data.setdefault(grupo, {})
+    distintivos = atributos_de_grupos(data)
+    elegibles = [(grupo, nombre) for grupo, personajes in data.items() for nombre in personajes]
+    azar = random.Random(semilla)
+    conexion = http.client.HTTPConnection("127.0.0.1", puerto)
+    partidas = 0
+    fin = time.monotonic() + segundos
+    while time.monotonic() < fin:
+        grupo, nombre = azar.choice(elegibles)
+        ficha = {**data[grupo][nombre], **distintivos.get(grupo, {})}
+        estado = _pedir(conexion, "POST", "/partidas", {})
+        while "pregunta" in estado:
+            estado = _pedir(conexion, "POST", f"/partidas/{estado['sesion']}",
+                            {"respuesta": ficha.get(estado["pregunta"], "no")})
+        partidas += 1
+    conexion.close()
+    return partidas
+
+
+def _memoria_cargando_json(archivo, opciones):
+    """
+    Memoria propia de un proceso que carga todos los personajes con
+    cargar_datos, como haría cada trabajador sin el segmento.
+    """
+    from .motor import AkinatorEngine
+
+    motor = AkinatorEngine.desde_archivo(archivo, **opciones)
+    memoria = memoria_propia()
+    motor.data.clear()
+    return memoria
+
+
+def medir(archivo, procesos=(1, 2, 4), segundos=10.0, clientes=None, **opciones):
+    """
+    Partidas por segundo y memoria propia de cada trabajador con cada
+    cantidad de procesos; los clientes juegan desde otros procesos.
+    """
+    contexto = contexto_procesos()
+    clientes = clientes or os.cpu_count() or 1
+    with contexto.Pool(1) as pool:
+        referencia = pool.apply(_memoria_cargando_json, (archivo, opciones))
+    filas = []
+    for cantidad in procesos:
+        servidor = Prefork(archivo, cantidad, puerto=0, **opciones)
+        servidor.iniciar()
+        try:
+            ruta = ruta_segmento(servidor.publicador.base, servidor.publicador.version.value)
+            with contexto.Pool(clientes) as pool:
+                pendiente = pool.starmap_async(
+                    _cliente, [(servidor.puerto, ruta, segundos, semilla)
+                               for semilla in range(clientes)])
+                while not pendiente.ready():
+                    servidor.atender(0.1)
+                partidas = sum(pendiente.get())
+            memoria = [memoria_propia(proceso.pid) for proceso in servidor.trabajadores]
+        finally:
+            servidor.detener()
+        filas.append({"procesos": cantidad, "partidas_por_segundo": partidas / segundos,
+                      "memoria_kb": memoria})
+    return {"memoria_kb_cargando_json": referencia, "clientes": clientes, "filas": filas}
+
+
+# ==============================
+# Línea de comandos
+# ==============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m motor_akinator.multiproceso",
+        description="Sirve partidas por HTTP con varios procesos que comparten los personajes.")
+    parser.add_argument("archivo", nargs="?", default="personajes_kimetsu.json")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--procesos", type=int, help="por defecto, uno por núcleo")
+    parser.add_argument("--sesiones", type=int, default=SESIONES_MAXIMAS,
+                        help="partidas abiertas a la vez en cada proceso")
+    parser.add_argument("--ttl", type=float, default=TTL,
+                        help="segundos sin actividad antes de cerrar una partida")
+    parser.add_argument("--estrategia", default="ganancia")
+    parser.add_argument("--modo", default="filtro", choices=("filtro", "bayes"))
+    parser.add_argument("--medir", metavar="PROCESOS",
+                        help="en vez de servir, medir con estas cantidades de procesos (p. ej. 1,2,4)")
+    parser.add_argument("--segundos", type=float, default=10.0, help="duración de cada medición")
+    parser.add_argument("--clientes", type=int, help="procesos que juegan al medir")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    opciones = {"estrategia": args.estrategia, "modo": args.modo}
+    if args.medir:
+        procesos = [int(p) for p in args.medir.split(",")]
+        resultado = medir(args.archivo, procesos, args.segundos, args.clientes, **opciones)
+        if args.json:
+            print(json.dumps(resultado, ensure_ascii=False, indent=2))
+            return 0
+        referencia = resultado["memoria_kb_cargando_json"]
+        if referencia is not None:
+            print(f"Un proceso con todo el JSON cargado: {referencia / 1024:.1f} MB propios")
+        print(f"{'procesos':>9}{'partidas/s':>12}  MB propios por proceso")
+        for fila in resultado["filas"]:
+            memoria = " ".join("?" if kb is None else f"{kb / 1024:.1f}"
+                               for kb in fila["memoria_kb"])
+            print(f"{fila['procesos']:>9}{fila['partidas_por_segundo']:>12.1f}  {memoria}")
+        return 0
+
+    servidor = Prefork(args.archivo, args.procesos, args.host, args.puerto,
+                       args.sesiones, args.ttl, **opciones)
+    # Un SIGTERM (p. ej. de systemd) también cierra a los trabajadores
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    servidor.iniciar()
+    print(f"Sirviendo en http://{args.host}:{servidor.puerto} con {servidor.procesos} procesos",
+          file=sys.stderr)
+    try:
+        while True:
+            servidor.atender()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.detener()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
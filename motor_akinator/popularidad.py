@@ -0,0 +1,239 @@
+import argparse
+import json
+import math
+import sys
+import time
+import weakref
+
+from .indice import contar_bits, posiciones_bits
+
+# =======================================================
+# 🧠 POPULARIDAD DE LOS PERSONAJES
+# -------------------------------------------------------
+# Unos pocos personajes (Tanjiro, Nezuko...) salen en la
+# mayoría de las partidas. Cada partida terminada se suma
+# en el almacén al personaje que era, y esas cuentas dan
+# la probabilidad previa de cada uno: las preguntas se
+# eligen para acortar las partidas del tráfico real (no de
+# un reparto uniforme) y el modo bayesiano arranca ya
+# inclinado hacia los populares.
+# Las partidas viejas cuentan menos: pierden la mitad de
+# su peso cada VIDA_MEDIA. Para no reescribir todas las
+# cuentas con el tiempo, cada partida se guarda con peso
+# 2 ** ((hora - EPOCA) / VIDA_MEDIA) y al leer se divide
+# por el peso de la hora actual (una sola fila por
+# personaje).
+#   python -m motor_akinator.popularidad personajes_kimetsu.json
+# → preguntas por partida con el tráfico real, sin y con
+#   la popularidad.
+# =======================================================
+
+
+VIDA_MEDIA = 30 * 86400
+EPOCA = 1704067200  # 2024-01-01 UTC
+
+# Partidas "de regalo" de cada personaje: uno que nadie eligió todavía
+# no queda con probabilidad cero
+SUAVIZADO = 1.0
+
+# Por debajo de este peso un personaje ya no cuenta como popular
+PESO_MINIMO = 0.01
+
+# Solo los más elegidos se ponderan aparte al escoger preguntas (los demás
+# pesan SUAVIZADO): así pesar una máscara no recorre a todos los personajes
+POPULARES = 64
+
+
+def escala(hora):
+    """
+    Peso con el que se guarda una partida jugada a esa hora.
+    (Los pesos se duplican cada VIDA_MEDIA: llegan al límite de un
+    float recién unos ochenta años después de EPOCA.)
+    """
+    return 2.0 ** ((hora - EPOCA) / VIDA_MEDIA)
+
+
+def hoy():
+    """
+    Comienzo del día actual: los pesos se leen a esa hora para que no
+    cambien durante el día (el árbol guardado sigue sirviendo).
+    """
+    return time.time() // 86400 * 86400
+
+
+def registrar_partida(almacen, nombre, preguntas, hora=None):
+    """
+    Suma una partida terminada en `nombre` tras `preguntas` preguntas.
+    """
+    almacen.sumar_partida(nombre, escala(time.time() if hora is None else hora), preguntas)
+
+
+def leer_popularidad(almacen, hora=None):
+    """
+    {nombre: partidas recientes}, cada una con el peso que le queda.
+    """
+    factor = escala(hoy() if hora is None else hora)
+    pesos = {}
+    for nombre, (peso, _) in almacen.partidas().items():
+        if peso / factor >= PESO_MINIMO:
+            pesos[nombre] = peso / factor
+    return pesos
+
+
+def preguntas_observadas(almacen):
+    """
+    Preguntas por partida de las partidas registradas (con el mismo
+    decaimiento), o None si no hay ninguna.
+    """
+    partidas = almacen.partidas().values()
+    peso = sum(p for p, _ in partidas)
+    return sum(q for _, q in partidas) / peso if peso else None
+
+
+# ==============================
+# Probabilidad previa sobre el índice
+# ==============================
+class Priores:
+    """
+    Peso de cada personaje: SUAVIZADO + sus partidas recientes.
+    Solo los POPULARES con más partidas se guardan aparte (por índice,
+    con su posición); para escoger preguntas los demás pesan SUAVIZADO,
+    así que la masa de una máscara se calcula con un conteo de bits más
+    unos pocos personajes populares.
+    """
+
+    def __init__(self, pesos, suavizado=SUAVIZADO):
+        self.pesos = pesos
+        self.suavizado = suavizado
+        self._por_indice = weakref.WeakKeyDictionary()
+
+    def _de(self, indice):
+        datos = self._por_indice.get(indice)
+        if datos is None:
+            s = self.suavizado
+            populares = 0
+            extra = {}
+            mayores = sorted(self.pesos.items(), key=lambda item: -item[1])[:POPULARES]
+            for nombre, partidas in mayores:
+                posicion = indice.posicion.get(nombre)
+                if posicion is None or partidas <= 0:
+                    continue
+                w = s + partidas
+                populares |= 1 << posicion
+                extra[posicion] = (partidas, w * math.log2(w) - s * math.log2(s))
+            datos = self._por_indice[indice] = (populares, extra)
+        return datos
+
+    def masa(self, indice, mascara):
+        """
+        (suma de pesos, suma de peso · log2(peso)) de los personajes de la
+        máscara: con eso sale la entropía de la máscara sin recorrerla.
+        """
+        populares, extra = self._de(indice)
+        s = self.suavizado
+        n = contar_bits(mascara)
+        peso, suma = s * n, n * s * math.log2(s)
+        for posicion in posiciones_bits(mascara & populares):
+            partidas, diferencia = extra[posicion]
+            peso += partidas
+            suma += diferencia
+        return peso, suma
+
+    def mas_probable(self, indice, mascara):
+        """
+        (posición, peso) del personaje de la máscara con más peso (el
+        primero si ninguno tiene partidas), o None si está vacía.
+        """
+        populares, extra = self._de(indice)
+        presentes = mascara & populares
+        if presentes:
+            posicion = max(posiciones_bits(presentes), key=lambda p: extra[p][0])
+            return posicion, self.suavizado + extra[posicion][0]
+        if not mascara:
+            return None
+        return (mascara & -mascara).bit_length() - 1, self.suavizado
+
+    def lista(self, indice):
+        """
+        Peso de cada personaje del índice, en orden.
+        """
+        return [self.suavizado + self.pesos.get(nombre, 0.0) for nombre in indice.nombres]
+
+    def ordenar(self, nombres):
+        """
+        Los nombres de más a menos elegido.
+        """
+        return sorted(nombres, key=lambda nombre: -self.pesos.get(nombre, 0.0))
+
+
+# ==============================
+# Antes / después
+# ==============================
+def comparar(data, popularidad, **opciones):
+    """
+    Preguntas medias por partida sin y con popularidad, jugando una
+    partida por personaje: "trafico" pondera cada partida con las veces
+    que se eligió el personaje; "uniforme" las cuenta a todas igual
+    (lo que pagan los personajes poco elegidos).
+    """
+    from .evaluador import jugar
+    from .motor import AkinatorEngine
+
+    resultado = {}
+    for clave, pesos in (("sin_popularidad", None), ("con_popularidad", popularidad)):
+        motor = AkinatorEngine(data, popularidad=pesos, **opciones)
+        trafico = peso_total = uniforme = partidas = 0
+        for grupo, personajes in data.items():
+            for nombre, ficha in personajes.items():
+                _, preguntas = jugar(motor, grupo, ficha, nombre)
+                uniforme += preguntas
+                partidas += 1
+                peso = popularidad.get(nombre, 0.0)
+                trafico += peso * preguntas
+                peso_total += peso
+        resultado[clave] = {"trafico": trafico / peso_total if peso_total else None,
+                            "uniforme": uniforme / partidas if partidas else None}
+    return resultado
+
+
+def main(argv=None):
+    from .almacen import abrir_almacen
+
+    parser = argparse.ArgumentParser(
+        prog="python -m motor_akinator.popularidad",
+        description="Compara la longitud de las partidas sin y con la popularidad registrada.")
+    parser.add_argument("archivo", nargs="?", default="personajes_kimetsu.json")
+    parser.add_argument("--estrategia", default="ganancia")
+    parser.add_argument("--modo", default="filtro", choices=("filtro", "bayes", "arbol"))
+    parser.add_argument("--anticipar", action="store_true",
+                        help="preguntar \"¿Es X?\" antes de tiempo cuando conviene")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    with abrir_almacen(args.archivo) as almacen:
+        data = almacen.cargar()
+        popularidad = leer_popularidad(almacen)
+        observadas = preguntas_observadas(almacen)
+    if not popularidad:
+        print("Todavía no hay partidas registradas.", file=sys.stderr)
+        return 1
+    opciones = {"ruta": None} if args.modo == "arbol" else {}
+    resultado = comparar(data, popularidad, estrategia=args.estrategia, modo=args.modo,
+                         anticipar=args.anticipar, **opciones)
+    resultado["observado"] = observadas
+    if args.json:
+        print(json.dumps(resultado, ensure_ascii=False, indent=2))
+        return 0
+    print(f"{len(popularidad)} personajes con partidas; "
+          f"más elegidos: {', '.join(Priores(popularidad).ordenar(popularidad)[:5])}")
+    print(f"Preguntas por partida registradas: {observadas:.2f}")
+    print(f"{'':<18}{'tráfico real':>14}{'uniforme':>10}")
+    for clave, titulo in (("sin_popularidad", "Sin popularidad"),
+                          ("con_popularidad", "Con popularidad")):
+        fila = resultado[clave]
+        print(f"{titulo:<18}{fila['trafico']:>14.2f}{fila['uniforme']:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
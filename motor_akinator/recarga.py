@@ -0,0 +1,54 @@
+from . import metricas
+
+# =======================================================
+# 🧠 RECARGA EN CALIENTE
+# -------------------------------------------------------
+# Varias instancias (kioscos, el servidor) pueden usar el
+# mismo almacén. Cada una sondea cada tanto si la base
+# cambió (solo mira tamaño y fecha de los archivos) y, si
+# cambió, lee del registro de cambios únicamente los
+# personajes agregados o modificados desde su última
+# lectura y se los pasa al motor, que publica un índice
+# nuevo sin recompilar todo. Las partidas en curso siguen
+# con el índice con el que empezaron; las nuevas ya ven
+# los cambios. Si el registro se recortó (la instancia
+# estuvo mucho tiempo sin sondear) se compara todo el
+# contenido del almacén, pero se aplica igual solo lo que
+# cambió.
+# =======================================================
+
+
+# Cada cuántos milisegundos sondean las interfaces
+INTERVALO_RECARGA = 2000
+
+
+class Recarga:
+    """
+    Mantiene un motor al día con su almacén. revisar() se llama
+    desde el mismo hilo que usa el motor (root.after, el escritor
+    del servidor...).
+    """
+
+    def __init__(self, motor, almacen):
+        self.motor = motor
+        self.almacen = almacen
+        self.firma = almacen.firma()
+
+    def revisar(self):
+        """
+        Aplica lo que cambió en el almacén. Devuelve (agregados, cambiados).
+        """
+        firma = self.almacen.firma()
+        if firma == self.firma:
+            return 0, 0
+        self.firma = firma
+        with metricas.paso("recarga.revisar") as p:
+            cambios = self.almacen.cambios()
+            if cambios is None:
+                cambios = [(grupo, nombre, atributos)
+                           for grupo, personajes in self.almacen.cargar().items()
+                           for nombre, atributos in personajes.items()]
+            agregados, cambiados = self.motor.actualizar(cambios)
+            p.anotar("agregados", agregados)
+            p.anotar("cambiados", cambiados)
+        return agregados, cambiados
@@ -0,0 +1,266 @@
+import math
+import sys
+
+from .indice import como_candidatos
+
+# =======================================================
+# 🧠 SELECCIÓN DE PREGUNTAS
+# -------------------------------------------------------
+# Estrategias intercambiables para escoger qué atributo
+# preguntar a continuación. Cada estrategia puntúa los
+# atributos pendientes sobre los candidatos actuales y el
+# juego pregunta primero el de mayor puntuación.
+# Con priores (ver popularidad.py) los candidatos no valen
+# todos lo mismo: las cuentas pasan a ser sumas de pesos.
+# =======================================================
+
+
+# ==============================
+# Conteos de una división
+# ==============================
+def contar_division(candidatos, atributo):
+    """
+    Cuenta cuántos candidatos tienen el atributo en "si", en "no"
+    y cuántos no lo tienen registrado (desconocido).
+    """
+    if hasattr(candidatos, "contar"):
+        return candidatos.contar(atributo)
+    si = no = 0
+    for atributos in candidatos.values():
+        valor = atributos.get(atributo)
+        if valor == "si":
+            si += 1
+        elif valor == "no":
+            no += 1
+    return si, no, len(candidatos) - si - no
+
+
+def probabilidades_respuesta(si, no, desconocidos):
+    """
+    Probabilidad de que el usuario responda "si" o "no".
+    Un personaje sin el atributo registrado cuenta mitad y mitad.
+    """
+    total = si + no + desconocidos
+    if total == 0:
+        return 0.0, 0.0
+    p_si = (si + desconocidos / 2) / total
+    return p_si, 1.0 - p_si
+
+
+def candidatos_esperados(si, no, desconocidos):
+    """
+    Número esperado de candidatos que quedan después de responder.
+    Los personajes sin el atributo sobreviven a cualquier respuesta.
+    """
+    p_si, p_no = probabilidades_respuesta(si, no, desconocidos)
+    return p_si * (si + desconocidos) + p_no * (no + desconocidos)
+
+
+def ganancia_informacion(si, no, desconocidos):
+    """
+    Bits de información que aporta la pregunta, suponiendo
+    que todos los candidatos son igual de probables.
+    """
+    total = si + no + desconocidos
+    if total <= 1:
+        return 0.0
+    p_si, p_no = probabilidades_respuesta(si, no, desconocidos)
+    restante = 0.0
+    if p_si > 0:
+        restante += p_si * math.log2(si + desconocidos)
+    if p_no > 0:
+        restante += p_no * math.log2(no + desconocidos)
+    return math.log2(total) - restante
+
+
+# ==============================
+# Con candidatos que no son igual de probables
+# ==============================
+def entropia_masa(peso, suma):
+    """
+    Entropía (bits) de un conjunto a partir de la suma de sus pesos y
+    de la suma de peso · log2(peso).
+    """
+    return math.log2(peso) - suma / peso if peso > 0 else 0.0
+
+
+def dividir_masa(priores, candidatos, atributo):
+    """
+    Como contar_division, pero cada parte como (peso, suma) de priores.masa.
+    """
+    indice, mascara = candidatos.indice, candidatos.mascara
+    si = mascara & indice.si.get(atributo, 0)
+    no = mascara & indice.no.get(atributo, 0)
+    return (priores.masa(indice, si), priores.masa(indice, no),
+            priores.masa(indice, mascara & ~(si | no)))
+
+
+def probabilidades_masa(si, no, desconocidos):
+    total = si[0] + no[0] + desconocidos[0]
+    if total <= 0:
+        return 0.0, 0.0
+    p_si = (si[0] + desconocidos[0] / 2) / total
+    return p_si, 1.0 - p_si
+
+
+def ganancia_ponderada(si, no, desconocidos):
+    """
+    ganancia_informacion con pesos: con todos los pesos iguales da lo mismo.
+    """
+    p_si, p_no = probabilidades_masa(si, no, desconocidos)
+    antes = entropia_masa(si[0] + no[0] + desconocidos[0], si[1] + no[1] + desconocidos[1])
+    return (antes
+            - p_si * entropia_masa(si[0] + desconocidos[0], si[1] + desconocidos[1])
+            - p_no * entropia_masa(no[0] + desconocidos[0], no[1] + desconocidos[1]))
+
+
+def candidatos_esperados_ponderados(si, no, desconocidos):
+    """
+    candidatos_esperados con pesos (en unidades de peso, no de personajes).
+    """
+    p_si, p_no = probabilidades_masa(si, no, desconocidos)
+    return p_si * (si[0] + desconocidos[0]) + p_no * (no[0] + desconocidos[0])
+
+
+# ==============================
+# Estrategias
+# ==============================
+class EstrategiaOrden:
+    """
+    Comportamiento original: pregunta los atributos en el orden
+    en que llegan, sin puntuarlos.
+    """
+
+    nombre = "orden"
+
+    def __init__(self, priores=None):
+        # Sin priores todos los candidatos son igual de probables
+        self.priores = priores
+
+    def ponderada(self, candidatos):
+        return self.priores is not None and hasattr(candidatos, "mascara")
+
+    def puntuar(self, candidatos, atributo):
+        return 0.0
+
+    def ordenar(self, candidatos, atributos):
+        return list(atributos)
+
+    def elegir(self, candidatos, atributos):
+        ordenados = self.ordenar(candidatos, atributos)
+        return ordenados[0] if ordenados else None
+
+
+class EstrategiaGanancia(EstrategiaOrden):
+    """
+    Pregunta primero el atributo con mayor ganancia de información
+    esperada (el que más se acerca a partir 50/50 a los candidatos).
+    """
+
+    nombre = "ganancia"
+
+    def puntuar(self, candidatos, atributo):
+        if self.ponderada(candidatos):
+            return ganancia_ponderada(*dividir_masa(self.priores, candidatos, atributo))
+        return ganancia_informacion(*contar_division(candidatos, atributo))
+
+    def ordenar(self, candidatos, atributos):
+        # sorted es estable y se ordena también por nombre para
+        # que la partida no dependa del orden de iteración del set
+        return sorted(atributos, key=lambda a: (-self.puntuar(candidatos, a), a))
+
+
+class EstrategiaCandidatosEsperados(EstrategiaGanancia):
+    """
+    Pregunta primero el atributo que deja menos candidatos
+    esperados después de la respuesta.
+    """
+
+    nombre = "candidatos_esperados"
+
+    def puntuar(self, candidatos, atributo):
+        if self.ponderada(candidatos):
+            return -candidatos_esperados_ponderados(
+                *dividir_masa(self.priores, candidatos, atributo))
+        return -candidatos_esperados(*contar_division(candidatos, atributo))
+
+
+ESTRATEGIAS = {
+    EstrategiaOrden.nombre: EstrategiaOrden,
+    EstrategiaGanancia.nombre: EstrategiaGanancia,
+    EstrategiaCandidatosEsperados.nombre: EstrategiaCandidatosEsperados,
+}
+
+
+def crear_estrategia(nombre="ganancia", priores=None):
+    """
+    Devuelve una estrategia a partir de su nombre.
+    """
+    try:
+        return ESTRATEGIAS[nombre](priores)
+    except KeyError:
+        raise ValueError(f"Estrategia desconocida: '{nombre}'. "
+                         f"Opciones: {', '.join(ESTRATEGIAS)}") from None
+
+
+# ==============================
+# Longitud esperada de la partida
+# ==============================
+def simular_partida(candidatos, personaje, estrategia):
+    """
+    Juega una partida contra la estrategia respondiendo con los atributos
+    del personaje (un atributo que no tiene se responde "no").
+    Devuelve el número de preguntas hechas.
+    """
+    candidatos = como_candidatos(candidatos)
+    indice = candidatos.indice
+    respuestas = {}
+    preguntas = 0
+    while len(candidatos) > 1:
+        utiles = indice.atributos_utiles(candidatos.mascara, respuestas)
+        atributo = estrategia.elegir(candidatos, utiles)
+        if atributo is None:
+            break
+        respuestas[atributo] = personaje.get(atributo, "no")
+        candidatos = candidatos.filtrar(atributo, respuestas[atributo])
+        preguntas += 1
+    return preguntas
+
+
+def preguntas_esperadas(candidatos, estrategia):
+    """
+    Número medio de preguntas que necesita la estrategia para
+    llegar a un solo candidato, suponiendo que cualquier personaje
+    del grupo es igual de probable.
+    """
+    if not candidatos:
+        return 0.0
+    candidatos = como_candidatos(candidatos)
+    total = sum(simular_partida(candidatos, atributos, estrategia)
+                for atributos in candidatos.values())
+    return total / len(candidatos)
+
+
+# ==============================
+# Reporte por línea de comandos
+# ==============================
+def main(argv=None):
+    """
+    Muestra el número esperado de preguntas por grupo y estrategia:
+        python -m motor_akinator.seleccion Akinator_KNYV2/personajes_kimetsu.json
+    """
+    from .motor import leer_json
+
+    argv = sys.argv[1:] if argv is None else argv
+    data = leer_json(argv[0] if argv else "personajes_kimetsu.json")
+
+    for grupo, personajes in data.items():
+        cota = math.log2(len(personajes)) if personajes else 0.0
+        print(f"{grupo} ({len(personajes)} personajes, mínimo teórico {cota:.2f})")
+        for nombre, clase in ESTRATEGIAS.items():
+            media = preguntas_esperadas(personajes, clase())
+            print(f"  {nombre:<22} {media:.2f} preguntas")
+
+
+if __name__ == "__main__":
+    main()
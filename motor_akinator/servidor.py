@@ -0,0 +1,395 @@
+import argparse
+import asyncio
+import json
+import secrets
+import sys
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+
+from . import metricas
+from .arranque import cargar_juego
+from .lotes import estado_sesion, respuesta_valida
+from .recarga import Recarga
+
+# =======================================================
+# 🧠 SERVIDOR DE PARTIDAS (HTTP + asyncio)
+# -------------------------------------------------------
+# Sirve el juego a muchos usuarios desde un solo proceso,
+# sin dependencias fuera de la biblioteca estándar:
+#   POST   /partidas                  → partida nueva
+#   POST   /partidas/<id>  {"respuesta": "si"}
+#   DELETE /partidas/<id>             → abandonar
+#   POST   /personajes  {"grupo", "nombre", "atributos"}
+#   GET    /estado
+# Cada partida es una Sesion del motor (máscara de
+# candidatos + respuestas), no una copia de los datos. Las
+# partidas inactivas se cierran por tiempo (TTL) y, si hay
+# demasiadas, la menos usada (LRU). Los personajes nuevos
+# pasan por una cola con un único escritor, así que dos
+# aprendizajes a la vez nunca se pisan en el almacén. El
+# mismo escritor aplica cada tanto lo que otras instancias
+# guardaron en el almacén (ver recarga.py). Para usar
+# todos los núcleos, ver multiproceso.py.
+#   python -m motor_akinator.servidor Akinator_KNYV2/personajes_kimetsu.json
+# =======================================================
+
+
+SESIONES_MAXIMAS = 10000
+
+# Segundos sin actividad tras los que se cierra una partida
+TTL = 600
+
+# Segundos entre revisiones del almacén
+INTERVALO_RECARGA = 2.0
+
+# Tamaño máximo del cuerpo de una petición
+CUERPO_MAXIMO = 1 << 20
+
+
+class ErrorHTTP(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+# ==============================
+# Partidas abiertas
+# ==============================
+class AlmacenSesiones:
+    """
+    Partidas abiertas de la más antigua a la más reciente en uso.
+    Acotado por cantidad (se cierra la menos usada) y por tiempo.
+    Las claves empiezan con `prefijo` (el número de proceso en
+    multiproceso.py, para saber de quién es cada partida).
+    """
+
+    def __init__(self, maximo=SESIONES_MAXIMAS, ttl=TTL, reloj=time.monotonic, prefijo=""):
+        self.maximo = maximo
+        self.ttl = ttl
+        self.reloj = reloj
+        self.prefijo = prefijo
+        self._sesiones = OrderedDict()
+        self.cerradas = 0
+
+    def __len__(self):
+        return len(self._sesiones)
+
+    def agregar(self, sesion):
+        clave = self.prefijo + secrets.token_urlsafe(12)
+        self._sesiones[clave] = (sesion, self.reloj())
+        while len(self._sesiones) > self.maximo:
+            self._sesiones.popitem(last=False)
+            self.cerradas += 1
+        return clave
+
+    def obtener(self, clave):
+        """
+        La sesión (y se marca como recién usada), o None si no existe o expiró.
+        """
+        entrada = self._sesiones.get(clave)
+        if entrada is None:
+            return None
+        sesion, uso = entrada
+        ahora = self.reloj()
+        if ahora - uso > self.ttl:
+            del self._sesiones[clave]
+            self.cerradas += 1
+            return None
+        self._sesiones[clave] = (sesion, ahora)
+        self._sesiones.move_to_end(clave)
+        return sesion
+
+    def quitar(self, clave):
+        return self._sesiones.pop(clave, None) is not None
+
+    def purgar(self):
+        """
+        Cierra las partidas que pasaron el TTL. Como están ordenadas por
+        último uso, basta con mirar desde el principio.
+        """
+        limite = self.reloj() - self.ttl
+        cerradas = 0
+        while self._sesiones:
+            clave, (_, uso) = next(iter(self._sesiones.items()))
+            if uso > limite:
+                break
+            del self._sesiones[clave]
+            cerradas += 1
+        self.cerradas += cerradas
+        return cerradas
+
+
+# ==============================
+# Juego
+# ==============================
+class ServidorJuego:
+    """
+    Lógica del servidor sin la parte de red: cada método recibe el
+    cuerpo JSON ya leído y devuelve (estado, respuesta).
+    """
+
+    def __init__(self, almacen, motor, sesiones=None):
+        self.almacen = almacen
+        self.motor = motor
+        self.sesiones = AlmacenSesiones() if sesiones is None else sesiones
+        # Sin almacén (los trabajadores de multiproceso.py) no hay nada que sondear
+        self.recarga = None if almacen is None else Recarga(motor, almacen)
+        self._encargos = None
+        self._escritor = None
+
+    async def iniciar(self):
+        self._encargos = asyncio.Queue()
+        self._escritor = asyncio.create_task(self._escribir())
+
+    async def detener(self):
+        if self._escritor is not None:
+            self._escritor.cancel()
+            try:
+                await self._escritor
+            except asyncio.CancelledError:
+                pass
+
+    def nueva_partida(self, cuerpo):
+        sesion = self.motor.nueva_sesion()
+        clave = self.sesiones.agregar(sesion)
+        return self._estado(clave, sesion)
+
+    def responder(self, clave, cuerpo):
+        sesion = self.sesiones.obtener(clave)
+        if sesion is None:
+            raise ErrorHTTP(HTTPStatus.NOT_FOUND, "la partida no existe o ya terminó")
+        respuesta = respuesta_valida(self.motor, cuerpo.get("respuesta"))
+        if respuesta is None:
+            raise ErrorHTTP(HTTPStatus.BAD_REQUEST, f"respuesta no válida: {cuerpo.get('respuesta')!r}")
+        if sesion.current_question() is not None:
+            sesion.answer(respuesta)
+        return self._estado(clave, sesion)
+
+    def abandonar(self, clave, cuerpo):
+        if not self.sesiones.quitar(clave):
+            raise ErrorHTTP(HTTPStatus.NOT_FOUND, "la partida no existe o ya terminó")
+        return {"sesion": clave, "fin": True}
+
+    async def aprender(self, cuerpo):
+        """
+        Encola el personaje nuevo y espera a que el escritor lo guarde.
+        """
+        grupo, nombre, atributos = (cuerpo.get("grupo"), cuerpo.get("nombre"),
+                                    cuerpo.get("atributos"))
+        if not isinstance(nombre, str) or not nombre.strip():
+            raise ErrorHTTP(HTTPStatus.BAD_REQUEST, "falta 'nombre'")
+        if grupo not in self.motor.data:
+            raise ErrorHTTP(HTTPStatus.BAD_REQUEST, f"grupo desconocido: {grupo!r}")
+        if (not isinstance(atributos, dict)
+                or any(v not in ("si", "no") for v in atributos.values())):
+            raise ErrorHTTP(HTTPStatus.BAD_REQUEST, "'atributos' debe ser {atributo: \"si\"/\"no\"}")
+        return await self._encargar(self._guardar, grupo, nombre.strip(), atributos)
+
+    async def recargar(self):
+        """
+        Aplica lo que otras instancias guardaron en el almacén.
+        """
+        agregados, cambiados = await self._encargar(self.recarga.revisar)
+        return {"agregados": agregados, "cambiados": cambiados}
+
+    async def _encargar(self, funcion, *args):
+        hecho = asyncio.get_running_loop().create_future()
+        await self._encargos.put((funcion, args, hecho))
+        return await hecho
+
+    def estado(self, cuerpo):
+        return {"partidas": len(self.sesiones), "cerradas": self.sesiones.cerradas,
+                "personajes": len(self.motor.indice), "modo": self.motor.modo}
+
+    def _estado(self, clave, sesion):
+        salida = estado_sesion(clave, sesion)
+        # Una partida terminada ya no ocupa lugar
+        if sesion.current_question() is None:
+            self.sesiones.quitar(clave)
+        return salida
+
+    async def _escribir(self):
+        # Único escritor: los aprendizajes (y las recargas) se aplican de a
+        # uno, fuera del bucle de eventos para no frenar las partidas
+        loop = asyncio.get_running_loop()
+        while True:
+            funcion, args, hecho = await self._encargos.get()
+            try:
+                resultado = await loop.run_in_executor(None, funcion, *args)
+            except Exception as e:
+                resultado = e
+            if not hecho.done():
+                if isinstance(resultado, Exception):
+                    hecho.set_exception(resultado)
+                else:
+                    hecho.set_result(resultado)
+
+    def _guardar(self, grupo, nombre, atributos):
+        if nombre in self.motor.indice.posicion:
+            raise ErrorHTTP(HTTPStatus.CONFLICT, f"el personaje {nombre!r} ya existe")
+        with metricas.paso("servidor.aprender"):
+            # Otra instancia pudo guardarlo antes de que llegue la recarga
+            if not self.almacen.guardar_personaje(grupo, nombre, atributos):
+                raise ErrorHTTP(HTTPStatus.CONFLICT, f"el personaje {nombre!r} ya existe")
+            self.motor.aprender(grupo, nombre, atributos)
+        return {"grupo": grupo, "nombre": nombre}
+
+
+# ==============================
+# HTTP mínimo
+# ==============================
+async def leer_peticion(lector):
+    """
+    (método, ruta, cabeceras, cuerpo) o None si el cliente cerró.
+    """
+    linea = await lector.readline()
+    if not linea:
+        return None
+    try:
+        metodo, ruta, _ = linea.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise ErrorHTTP(HTTPStatus.BAD_REQUEST, "línea de petición mal formada")
+    cabeceras = {}
+    while True:
+        linea = await lector.readline()
+        if linea in (b"\r\n", b"\n", b""):
+            break
+        clave, _, valor = linea.decode("latin-1").partition(":")
+        cabeceras[clave.strip().lower()] = valor.strip()
+    largo = int(cabeceras.get("content-length") or 0)
+    if largo > CUERPO_MAXIMO:
+        raise ErrorHTTP(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "cuerpo demasiado grande")
+    cuerpo = await lector.readexactly(largo) if largo else b""
+    return metodo.upper(), ruta.split("?", 1)[0], cabeceras, cuerpo
+
+
+def escribir_respuesta(escritor, estado, datos, mantener=True):
+    cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+    cabecera = (f"HTTP/1.1 {estado.value} {estado.phrase}\r\n"
+                "Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(cuerpo)}\r\n"
+                f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n")
+    escritor.write(cabecera.encode("latin-1") + cuerpo)
+
+
+async def despachar(juego, metodo, ruta, cuerpo):
+    partes = [p for p in ruta.split("/") if p]
+    try:
+        datos = json.loads(cuerpo) if cuerpo else {}
+    except ValueError:
+        raise ErrorHTTP(HTTPStatus.BAD_REQUEST, "el cuerpo no es JSON")
+    if not isinstance(datos, dict):
+        raise ErrorHTTP(HTTPStatus.BAD_REQUEST, "el cuerpo debe ser un objeto JSON")
+
+    if partes == ["partidas"] and metodo == "POST":
+        return HTTPStatus.CREATED, juego.nueva_partida(datos)
+    if len(partes) == 2 and partes[0] == "partidas":
+        if metodo == "POST":
+            return HTTPStatus.OK, juego.responder(partes[1], datos)
+        if metodo == "DELETE":
+            return HTTPStatus.OK, juego.abandonar(partes[1], datos)
+    if partes == ["personajes"] and metodo == "POST":
+        return HTTPStatus.CREATED, await juego.aprender(datos)
+    if partes == ["estado"] and metodo == "GET":
+        return HTTPStatus.OK, juego.estado(datos)
+    raise ErrorHTTP(HTTPStatus.NOT_FOUND, f"{metodo} {ruta} no existe")
+
+
+async def atender(juego, lector, escritor, despacho=despachar):
+    """
+    Atiende las peticiones de una conexión (con keep-alive).
+    `despacho` decide qué hacer con cada petición (ver multiproceso.py).
+    """
+    try:
+        while True:
+            try:
+                peticion = await leer_peticion(lector)
+                if peticion is None:
+                    break
+                metodo, ruta, cabeceras, cuerpo = peticion
+                mantener = cabeceras.get("connection", "").lower() != "close"
+                with metricas.paso("servidor.peticion", metodo=metodo):
+                    estado, datos = await despacho(juego, metodo, ruta, cuerpo)
+            except ErrorHTTP as e:
+                estado, datos, mantener = e.estado, {"error": str(e)}, False
+            except (asyncio.IncompleteReadError, ValueError) as e:
+                estado, datos, mantener = HTTPStatus.BAD_REQUEST, {"error": str(e)}, False
+            escribir_respuesta(escritor, estado, datos, mantener)
+            await escritor.drain()
+            if not mantener:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        escritor.close()
+
+
+async def purgar_periodicamente(sesiones, intervalo):
+    while True:
+        await asyncio.sleep(intervalo)
+        sesiones.purgar()
+
+
+async def recargar_periodicamente(juego, intervalo):
+    while True:
+        await asyncio.sleep(intervalo)
+        try:
+            await juego.recargar()
+        except Exception as e:
+            print(f"No se pudo recargar el almacén: {e}", file=sys.stderr)
+
+
+async def servir(juego, host="127.0.0.1", puerto=8765, listo=None):
+    """
+    Corre el servidor hasta que se cancela la tarea. `listo` (un
+    asyncio.Event) se activa cuando ya acepta conexiones.
+    """
+    await juego.iniciar()
+    servidor = await asyncio.start_server(lambda l, e: atender(juego, l, e), host, puerto)
+    purga = asyncio.create_task(purgar_periodicamente(juego.sesiones,
+                                                      max(1, juego.sesiones.ttl / 4)))
+    recarga = asyncio.create_task(recargar_periodicamente(juego, INTERVALO_RECARGA))
+    if listo is not None:
+        listo.set()
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        purga.cancel()
+        recarga.cancel()
+        await juego.detener()
+
+
+# ==============================
+# Línea de comandos
+# ==============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m motor_akinator.servidor",
+        description="Sirve partidas por HTTP a muchos usuarios a la vez.")
+    parser.add_argument("archivo", nargs="?", default="personajes_kimetsu.json")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--sesiones", type=int, default=SESIONES_MAXIMAS,
+                        help="partidas abiertas a la vez")
+    parser.add_argument("--ttl", type=float, default=TTL,
+                        help="segundos sin actividad antes de cerrar una partida")
+    parser.add_argument("--estrategia", default="ganancia")
+    parser.add_argument("--modo", default="filtro", choices=("filtro", "bayes", "arbol"))
+    args = parser.parse_args(argv)
+
+    almacen, _, motor = cargar_juego(args.archivo, estrategia=args.estrategia, modo=args.modo)
+    juego = ServidorJuego(almacen, motor, AlmacenSesiones(args.sesiones, args.ttl))
+    print(f"Sirviendo en http://{args.host}:{args.puerto}", file=sys.stderr)
+    try:
+        asyncio.run(servir(juego, args.host, args.puerto))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        almacen.cerrar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
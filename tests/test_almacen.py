@@ -0,0 +1,45 @@
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from motor_akinator.almacen import abrir_almacen, ruta_base_datos
+
+
+class PruebasAlmacen(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.datos = os.path.join(self.carpeta.name, "personajes.json")
+        with open(self.datos, "w", encoding="utf-8") as f:
+            json.dump({"humanos": {"A": {"x": "si"}}, "demonios": {"B": {"x": "no"}}}, f)
+
+    def tearDown(self):
+        self.carpeta.cleanup()
+
+    def test_importa_una_sola_vez_sin_leer_el_json(self):
+        with abrir_almacen(self.datos) as almacen:
+            self.assertEqual(almacen.cargar()["humanos"], {"A": {"x": "si"}})
+        # Ya importado: el JSON no se vuelve a leer
+        with open(self.datos, "w", encoding="utf-8") as f:
+            f.write("no es json")
+        with abrir_almacen(self.datos) as almacen:
+            self.assertEqual(almacen.cargar()["demonios"], {"B": {"x": "no"}})
+
+    def test_abrir_no_espera_al_escritor(self):
+        abrir_almacen(self.datos).cerrar()
+        escritor = sqlite3.connect(ruta_base_datos(self.datos), isolation_level=None)
+        escritor.execute("BEGIN IMMEDIATE")
+        try:
+            inicio = time.monotonic()
+            with abrir_almacen(self.datos) as almacen:
+                self.assertEqual(len(almacen.cargar()["humanos"]), 1)
+            self.assertLess(time.monotonic() - inicio, 5)
+        finally:
+            escritor.execute("ROLLBACK")
+            escritor.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from motor_akinator.analisis import analizar, revisar_personaje
+from motor_akinator.motor import AkinatorEngine
+
+
+def motor_de_prueba():
+    return AkinatorEngine({
+        "humanos": {
+            "A": {"x": "si", "y": "si"},
+            "B": {"x": "si"},
+            "C": {"x": "no", "y": "no"},
+        },
+        "demonios": {
+            "D": {"z": "si"},
+            "E": {"z": "no"},
+        },
+    })
+
+
+class PruebasAnalisis(unittest.TestCase):
+    def test_desconocido_no_separa(self):
+        identicos = analizar(motor_de_prueba().indice, distancia=0)["identicos"]
+        self.assertEqual([c.personajes for c in identicos], [["A", "B"]])
+        self.assertEqual(identicos[0].sugerencias, ["y"])
+
+    def test_parecidos_con_una_contradiccion(self):
+        parecidos = analizar(motor_de_prueba().indice, distancia=1)["parecidos"]
+        self.assertEqual([(c.personajes, c.diferencias) for c in parecidos],
+                         [(["B", "C"], ["x"]), (["C", "E"], ["Es un demonio"]),
+                          (["D", "E"], ["z"])])
+
+    def test_cadena_no_une_separables(self):
+        # B no se separa de A ni de C, pero x separa a A de C
+        motor = AkinatorEngine({"humanos": {
+            "A": {"x": "si", "y": "si"},
+            "B": {"y": "si"},
+            "C": {"x": "no", "y": "si"},
+            "D": {"y": "no"},
+        }})
+        identicos = analizar(motor.indice, distancia=0)["identicos"]
+        self.assertEqual([c.personajes for c in identicos], [["A", "B"], ["B", "C"]])
+
+    def test_revisar_personaje_nuevo(self):
+        confusion = revisar_personaje(motor_de_prueba(), "humanos", "F", {"x": "si"})
+        self.assertEqual(confusion.personajes, ["A", "B"])
+
+    def test_revisar_personaje_separable(self):
+        confusion = revisar_personaje(motor_de_prueba(), "humanos", "F", {"x": "no", "y": "si"})
+        self.assertEqual(confusion.personajes, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+
+from motor_akinator.arbol import huella_personajes
+from motor_akinator.motor import ADIVINADO, AkinatorEngine
+
+
+def jugar(motor, grupo, nombre):
+    ficha = {**motor.data[grupo][nombre], **motor.atributos_grupo(grupo)}
+    sesion = motor.nueva_sesion()
+    while sesion.current_question() is not None:
+        sesion.answer(ficha.get(sesion.current_question(), "no"))
+    return sesion.result(), sesion.grupo
+
+
+def datos():
+    return {"humanos": {"Zed": {"x": "si"}, "A": {"x": "no", "w": "no"}},
+            "demonios": {"Zed": {"y": "si"}, "B": {"y": "no", "z": "no"}}}
+
+
+class PruebasArbol(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.ruta = os.path.join(self.carpeta.name, "personajes.arbol.json")
+
+    def tearDown(self):
+        self.carpeta.cleanup()
+
+    def comprobar(self, motor):
+        for grupo, personajes in motor.data.items():
+            for nombre in personajes:
+                resultado, grupo_final = jugar(motor, grupo, nombre)
+                self.assertEqual((resultado.estado, resultado.personajes, grupo_final),
+                                 (ADIVINADO, [nombre], grupo))
+
+    def test_mismo_nombre_en_dos_grupos(self):
+        self.comprobar(AkinatorEngine(datos(), modo="arbol", ruta=self.ruta))
+
+    def test_aprendidos_y_recargados(self):
+        motor = AkinatorEngine(datos(), modo="arbol", ruta=self.ruta)
+        motor.aprender("demonios", "C", {"y": "no", "z": "si"})
+        motor.aprender("humanos", "H", {"x": "no", "w": "si"})
+        self.comprobar(motor)
+        motor.arbol.guardar()
+        # Al recompilar, H queda antes que los demonios: el árbol guardado no sirve
+        self.comprobar(AkinatorEngine(motor.data, modo="arbol", ruta=self.ruta))
+
+    def test_huella_incremental_y_escritura_diferida(self):
+        motor = AkinatorEngine(datos(), modo="arbol", ruta=self.ruta)
+        escrito = os.path.getmtime(self.ruta)
+        os.utime(self.ruta, (0, 0))
+        motor.aprender("humanos", "H", {"x": "no", "w": "si"})
+        self.assertEqual(os.path.getmtime(self.ruta), 0)
+        self.assertEqual(motor.arbol.pendientes, 1)
+        self.assertEqual(motor.arbol.personajes, huella_personajes(motor.data, motor.indice))
+        motor.arbol.guardar_pendientes()
+        self.assertGreaterEqual(os.path.getmtime(self.ruta), escrito)
+        self.assertEqual(motor.arbol.pendientes, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from motor_akinator.almacen import abrir_almacen
+from motor_akinator.ingesta import ingerir
+
+
+class PruebasIngesta(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.datos = os.path.join(self.carpeta.name, "personajes.json")
+        with open(self.datos, "w", encoding="utf-8") as f:
+            json.dump({"humanos": {"A": {"Es pilar": "si"}}, "demonios": {}}, f)
+
+    def tearDown(self):
+        self.carpeta.cleanup()
+
+    def test_insertar_por_lotes(self):
+        filas = [("humanos", f"P{i}", json.dumps({"x": "si" if i % 2 else "no"})) for i in range(7)]
+        with abrir_almacen(self.datos) as almacen:
+            self.assertEqual(almacen.insertar_filas(iter(filas), por_lote=3), 7)
+            self.assertEqual(almacen.insertar_filas(iter(filas), por_lote=3), 0)
+            nombres = [nombre for _, nombre, _ in almacen.personajes()]
+        self.assertEqual(nombres, ["A"] + [f"P{i}" for i in range(7)])
+
+    def test_falla_a_mitad_no_guarda_nada(self):
+        def filas():
+            for i in range(7):
+                yield "humanos", f"P{i}", json.dumps({"x": "si"})
+            raise ValueError("archivo cortado")
+
+        with abrir_almacen(self.datos) as almacen:
+            with self.assertRaises(ValueError):
+                almacen.insertar_filas(filas(), por_lote=3)
+            self.assertEqual([nombre for _, nombre, _ in almacen.personajes()], ["A"])
+
+    def test_repetidos_contra_el_almacen(self):
+        entrada = io.StringIO("nombre,grupo,es_pilar\nA,humanos,si\nB,humanos,si\nC,humanos,no\n")
+        resumen = ingerir(self.datos, entrada)
+        self.assertEqual(resumen["insertadas"], 1)
+        self.assertEqual(resumen["nombre_repetido"], 1)
+        self.assertEqual(resumen["vector_repetido"], 1)
+        self.assertEqual(resumen["atributos_nuevos"], [])
+
+    def test_atributos_nuevos_solo_de_filas_guardadas(self):
+        # La fila repetida trae "Usa agua"; solo la guardada suma "Usa fuego"
+        entrada = io.StringIO('{"nombre": "A", "grupo": "humanos", "Usa agua": "si"}\n'
+                              '{"nombre": "D", "grupo": "humanos", "usa_fuego": "si"}\n'
+                              '{"nombre": "E", "grupo": "humanos", "Usa fuego": "no"}\n')
+        resumen = ingerir(self.datos, entrada, "jsonl")
+        self.assertEqual(resumen["insertadas"], 2)
+        self.assertEqual(resumen["atributos_nuevos"], ["usa_fuego"])
+        with abrir_almacen(self.datos) as almacen:
+            guardados = {nombre: atributos for _, nombre, atributos in almacen.personajes()}
+        self.assertEqual(guardados["E"], {"usa_fuego": "no"})
+
+    def test_rechaza_respuestas_con_duda(self):
+        entrada = io.StringIO("nombre,grupo,x,y\n"
+                              "P,humanos,no,probablemente_si\n"
+                              "Q,humanos,si,no_se\n"
+                              "R,humanos,si,probablemente no\n"
+                              "S,humanos,sí,NO\n")
+        resumen = ingerir(self.datos, entrada)
+        self.assertEqual(resumen["insertadas"], 1)
+        self.assertEqual(resumen["invalidas"], 3)
+        with abrir_almacen(self.datos) as almacen:
+            guardados = {nombre: atributos for _, nombre, atributos in almacen.personajes()}
+        self.assertEqual(guardados["S"], {"x": "si", "y": "no"})
+        self.assertNotIn("P", guardados)
+
+
+if __name__ == "__main__":
+    unittest.main()
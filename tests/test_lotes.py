@@ -0,0 +1,28 @@
+import io
+import json
+import unittest
+
+from motor_akinator.lotes import correr, leer_eventos
+from motor_akinator.motor import AkinatorEngine
+
+
+class PruebasLotes(unittest.TestCase):
+    def test_sesion_de_tipo_invalido(self):
+        lineas = ['{"sesion": ["x"]}', '{"sesion": {"a": 1}}', '{"sesion": true}', '{"sesion": 7}']
+        eventos = list(leer_eventos(lineas))
+        self.assertEqual([e.get("error", "")[:8] for e in eventos[:3]], ["línea 1:", "línea 2:", "línea 3:"])
+        self.assertEqual(eventos[3], {"sesion": 7})
+
+    def test_lote_sigue_tras_sesion_invalida(self):
+        motor = AkinatorEngine({"humanos": {"A": {"x": "si"}, "B": {"x": "no"}}})
+        entrada = io.StringIO('{"sesion": ["x"]}\n{"sesion": "s"}\n{"sesion": "s", "respuesta": "si"}\n')
+        salida = io.StringIO()
+        correr(motor, entrada, salida)
+        eventos = [json.loads(l) for l in salida.getvalue().splitlines()]
+        self.assertIn("error", eventos[0])
+        self.assertEqual(eventos[1]["pregunta"], "x")
+        self.assertEqual(eventos[2]["personajes"], ["A"])
+
+
+if __name__ == "__main__":
+    unittest.main()
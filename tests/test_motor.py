@@ -0,0 +1,23 @@
+import unittest
+
+from motor_akinator.motor import ADIVINADO, AkinatorEngine, Adivinanza
+
+
+class PruebasPreguntasHechas(unittest.TestCase):
+    def test_cuenta_adivinanzas_y_deshacer(self):
+        motor = AkinatorEngine({"humanos": {"A": {"x": "si"}, "B": {"x": "si"}, "C": {"x": "no"}}},
+                               anticipar=True)
+        sesion = motor.nueva_sesion()
+        sesion.answer("si")
+        self.assertIsInstance(sesion.current_question(), Adivinanza)
+        sesion.answer("no")
+        self.assertEqual(sesion.result().estado, ADIVINADO)
+        # "¿Es X?" no queda en respuestas pero sí es una pregunta hecha
+        self.assertEqual(len(sesion.respuestas), 1)
+        self.assertEqual(sesion.preguntas_hechas(), 2)
+        sesion.deshacer()
+        self.assertEqual(sesion.preguntas_hechas(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
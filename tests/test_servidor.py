@@ -0,0 +1,44 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from http import HTTPStatus
+
+from motor_akinator.almacen import abrir_almacen
+from motor_akinator.motor import AkinatorEngine
+from motor_akinator.servidor import ErrorHTTP, ServidorJuego
+
+
+class PruebasServidor(unittest.TestCase):
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.datos = os.path.join(self.carpeta.name, "personajes.json")
+        with open(self.datos, "w", encoding="utf-8") as f:
+            json.dump({"humanos": {"A": {"x": "si"}}}, f)
+
+    def tearDown(self):
+        self.carpeta.cleanup()
+
+    def test_conflicto_si_otra_instancia_ya_lo_guardo(self):
+        with abrir_almacen(self.datos) as almacen, abrir_almacen(self.datos) as otra:
+            juego = ServidorJuego(almacen, AkinatorEngine(almacen.cargar()))
+            # La otra instancia lo guarda antes de que llegue la recarga
+            self.assertTrue(otra.guardar_personaje("humanos", "B", {"x": "no"}))
+
+            async def aprender():
+                await juego.iniciar()
+                try:
+                    return await juego.aprender(
+                        {"grupo": "humanos", "nombre": "B", "atributos": {"x": "si"}})
+                finally:
+                    await juego.detener()
+
+            with self.assertRaises(ErrorHTTP) as error:
+                asyncio.run(aprender())
+            self.assertEqual(error.exception.estado, HTTPStatus.CONFLICT)
+            self.assertNotIn("B", juego.motor.indice.posicion)
+
+
+if __name__ == "__main__":
+    unittest.main()